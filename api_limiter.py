@@ -0,0 +1,240 @@
+# =====================================================================================
+#  파일: api_limiter.py (API 요청 속도 제한) - v1.1
+#  - 검색(/api/search)과 구독(/api/subscribe, /api/subscribe/bulk) 라우트에 클라이언트 IP 별 토큰 버킷과
+#    라우트 전체(global) 토큰 버킷을 함께 적용합니다. 어느 쪽이든 토큰이 없으면 DB 에 닿기 전에
+#    429 와 Retry-After(초)로 응답하므로, 한 클라이언트가 라우트를 두드려도 다른 사용자의 지연과
+#    SQLite 쓰기 잠금에 영향을 주지 않습니다.
+#  - 버킷은 (남은 토큰, 마지막 갱신 시각, 만료 시각) 세 값뿐이며, 토큰이 가득 찰 시간이 지나면
+#    없는 것과 같으므로 만료된 항목은 주기적으로 지웁니다.
+#  - 기본 저장소는 워커 프로세스 메모리(MemoryStore)입니다. API_RATE_LIMIT_FILE 을 지정하면 그 파일을
+#    mmap 한 고정 크기 해시 테이블(SharedStore)을 gunicorn 워커가 함께 사용하므로, 워커 수와 관계없이
+#    서버 전체에 같은 한도가 적용됩니다.
+#  - 클라이언트는 X-Forwarded-For 의 뒤에서 API_TRUSTED_PROXY_HOPS 번째 주소로 구분합니다. 배포 환경
+#    (goorm 도메인 webtoon-ending.run.goorm.site, Procfile 의 gunicorn)은 리버스 프록시 한 단 뒤에서 실행되어
+#    request.remote_addr 가 항상 프록시 주소이므로 기본값은 1 입니다. 0 이면 모든 방문자가 버킷 하나를 나눠 씁니다.
+#    프록시 없이 서버를 직접 공개할 때는 0 으로 설정하세요. (그대로 두면 클라이언트가 X-Forwarded-For 를 꾸며
+#    버킷을 바꿀 수 있습니다) 프록시가 여러 단이면 그 수만큼 지정합니다.
+#  - 요청당 비용은 수 마이크로초입니다. (python benchmark.py limiter)
+# =====================================================================================
+
+import fcntl
+import functools
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from flask import jsonify, request
+
+ENABLED = os.getenv('API_RATE_LIMIT', '1') == '1'
+SHARED_FILE = os.getenv('API_RATE_LIMIT_FILE')            # 지정하면 워커 간 공유 (예: /dev/shm/webtoon-ratelimit)
+TRUSTED_PROXY_HOPS = int(os.getenv('API_TRUSTED_PROXY_HOPS', '1'))  # 앞단 프록시 수 (X-Forwarded-For 에서 클라이언트 IP 를 읽을 위치)
+MAX_KEYS = 100_000           # MemoryStore 가 만료 전 정리를 시작하는 항목 수
+SWEEP_INTERVAL_SEC = 60.0    # MemoryStore 의 만료 항목 정리 간격
+SHARED_SLOTS = 1 << 16       # SharedStore 의 슬롯 수 (슬롯당 32바이트, 2MB)
+SHARED_PROBES = 8            # SharedStore 에서 한 키가 차지할 수 있는 슬롯 후보 수
+CLOCK_RESET_SEC = 60.0       # 저장된 시각이 이보다 더 미래이면 재부팅으로 시계가 초기화된 것으로 봅니다.
+
+
+class RatePolicy:
+    """라우트 하나의 한도. rate 는 초당 토큰, burst 는 버킷 크기입니다. (global_* 은 모든 클라이언트 합계)"""
+    __slots__ = ('name', 'rate', 'burst', 'global_rate', 'global_burst')
+
+    def __init__(self, name, rate, burst, global_rate, global_burst):
+        self.name = name
+        self.rate, self.burst = rate, burst
+        self.global_rate, self.global_burst = global_rate, global_burst
+
+
+def _refill(tokens, updated, now, rate, burst):
+    if updated - now > CLOCK_RESET_SEC:
+        # 공유 파일이 재부팅 전 시계 값을 갖고 있는 경우
+        return float(burst)
+    return min(burst, tokens + max(now - updated, 0.0) * rate)
+
+def _take(client, shared, now, policy):
+    """
+    (tokens, updated) 두 버킷에서 토큰을 하나씩 꺼냅니다. 둘 다 있어야 꺼내며, 하나라도 모자라면 아무것도 꺼내지 않습니다.
+    반환값: (클라이언트 버킷 남은 토큰, 전체 버킷 남은 토큰, 기다릴 초 - 허용이면 0)
+    """
+    client_tokens = _refill(client[0], client[1], now, policy.rate, policy.burst)
+    global_tokens = _refill(shared[0], shared[1], now, policy.global_rate, policy.global_burst)
+    if client_tokens >= 1 and global_tokens >= 1:
+        return client_tokens - 1, global_tokens - 1, 0.0
+    wait = max((1 - client_tokens) / policy.rate if client_tokens < 1 else 0.0,
+               (1 - global_tokens) / policy.global_rate if global_tokens < 1 else 0.0)
+    return client_tokens, global_tokens, wait
+
+
+# --- 1. 워커 메모리 저장소 ---
+class MemoryStore:
+    """키 -> [남은 토큰, 마지막 갱신, 만료 시각] 의 dict. 워커 프로세스마다 따로 유지됩니다."""
+
+    def __init__(self, max_keys=MAX_KEYS, sweep_interval=SWEEP_INTERVAL_SEC):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def acquire(self, policy, client_key, now=None):
+        """토큰을 꺼내면 0, 모자라면 기다려야 할 초를 반환합니다."""
+        with self._lock:
+            # 잠금을 기다리는 동안 다른 스레드가 더 늦은 시각을 기록할 수 있으므로 시각은 잠금 안에서 읽습니다.
+            now = time.monotonic() if now is None else now
+            if now >= self._next_sweep or len(self._buckets) > self.max_keys:
+                self._sweep(now)
+            client_key = (policy.name, client_key)
+            global_key = (policy.name, None)
+            client = self._buckets.get(client_key) or (policy.burst, now)
+            shared = self._buckets.get(global_key) or (policy.global_burst, now)
+            client_tokens, global_tokens, wait = _take(client, shared, now, policy)
+            if wait:
+                return wait
+            # 토큰이 가득 찰 때까지 쓰이지 않으면 없는 항목과 같으므로 그때 지웁니다.
+            self._buckets[client_key] = [client_tokens, now, now + (policy.burst - client_tokens) / policy.rate]
+            self._buckets[global_key] = [global_tokens, now, now + (policy.global_burst - global_tokens) / policy.global_rate]
+            return 0.0
+
+    def _sweep(self, now):
+        self._next_sweep = now + self.sweep_interval
+        self._buckets = {key: entry for key, entry in self._buckets.items() if entry[2] > now}
+        if len(self._buckets) > self.max_keys:
+            # 만료 전인 항목이 너무 많으면(IP 를 바꿔 가며 보내는 경우) 가장 오래 쓰이지 않은 절반을 버립니다.
+            keep = sorted(self._buckets.items(), key=lambda item: item[1][1])[len(self._buckets) // 2:]
+            self._buckets = dict(keep)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# --- 2. 워커 간 공유 저장소 (mmap 파일) ---
+_SLOT = struct.Struct('<Qddd')  # 키 해시, 남은 토큰, 마지막 갱신, 만료 시각
+
+def _key_hash(key):
+    # 파이썬 hash() 는 프로세스마다 다르므로 워커 간에 같은 값이 나오는 해시를 사용합니다. (0 은 빈 슬롯)
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+
+
+class SharedStore:
+    """
+    파일을 mmap 한 (키 해시, 토큰, 갱신, 만료) 슬롯 배열. 시각은 모든 프로세스가 같은 time.monotonic() 입니다.
+    키는 해시 위치부터 SHARED_PROBES 개의 슬롯 중 같은 해시, 빈 슬롯, 만료된 슬롯 순서로 자리를 찾고,
+    모두 쓰이는 중이면 가장 먼저 만료될 슬롯을 덮어씁니다. 파일 잠금(flock)으로 프로세스 간 갱신을 직렬화합니다.
+    """
+
+    def __init__(self, path, slots=SHARED_SLOTS, probes=SHARED_PROBES):
+        self.path, self.slots, self.probes = path, slots, probes
+        size = slots * _SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size != size:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size != size:
+                    os.ftruncate(self._fd, 0)
+                    os.ftruncate(self._fd, size)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()  # flock 은 같은 프로세스의 스레드끼리는 막지 않습니다.
+
+    def _find(self, key, now, exclude=None):
+        """키의 슬롯 오프셋과 현재 (토큰, 갱신) 값을 찾습니다. 새 키이면 (오프셋, None). exclude 슬롯은 새 자리로 쓰지 않습니다."""
+        key_hash = _key_hash(key)
+        start = key_hash % self.slots
+        victim, victim_expires = None, None
+        for i in range(self.probes):
+            offset = ((start + i) % self.slots) * _SLOT.size
+            slot_hash, tokens, updated, expires = _SLOT.unpack_from(self._map, offset)
+            if slot_hash == key_hash:
+                return key_hash, offset, (tokens, updated)
+            if offset == exclude:
+                continue
+            if slot_hash == 0 or expires <= now:
+                return key_hash, offset, None
+            if victim is None or expires < victim_expires:
+                victim, victim_expires = offset, expires
+        return key_hash, victim, None
+
+    def acquire(self, policy, client_key, now=None):
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.monotonic() if now is None else now
+                global_hash, global_offset, shared = self._find(f'{policy.name}\0*', now)
+                client_hash, client_offset, client = self._find(f'{policy.name}\0{client_key}', now, exclude=global_offset)
+                client_tokens, global_tokens, wait = _take(client or (policy.burst, now), shared or (policy.global_burst, now), now, policy)
+                if wait:
+                    return wait
+                _SLOT.pack_into(self._map, client_offset, client_hash, client_tokens, now,
+                                now + (policy.burst - client_tokens) / policy.rate)
+                _SLOT.pack_into(self._map, global_offset, global_hash, global_tokens, now,
+                                now + (policy.global_burst - global_tokens) / policy.global_rate)
+                return 0.0
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+# --- 3. Flask 확장 ---
+def client_ip():
+    """
+    요청한 클라이언트의 IP. TRUSTED_PROXY_HOPS 만큼 X-Forwarded-For 를 뒤에서부터 거슬러 읽습니다.
+    헤더가 없거나 주소가 모자라면(프록시를 거치지 않은 요청) 연결한 주소를 사용합니다.
+    """
+    if TRUSTED_PROXY_HOPS:
+        forwarded = [part.strip() for part in request.headers.get('X-Forwarded-For', '').split(',') if part.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_HOPS:
+            return forwarded[-TRUSTED_PROXY_HOPS]
+    return request.remote_addr or '-'
+
+
+class RateLimiter:
+    """
+    라우트에 `@limiter.limit(policy)` 로 토큰 버킷 한도를 적용하는 Flask 확장.
+    한도를 넘은 요청은 뷰 함수를 호출하지 않고 429 와 Retry-After 로 응답합니다.
+    """
+
+    def __init__(self, app=None, store=None, enabled=ENABLED):
+        self.store = store
+        self.enabled = enabled
+        self.on_reject = None  # (정책 이름, 기다릴 초) 를 받는 콜백 (지표 기록용)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.store is None:
+            self.store = SharedStore(SHARED_FILE) if SHARED_FILE else MemoryStore()
+        app.extensions['api_limiter'] = self
+
+    def check(self, policy):
+        """현재 요청이 한도 안이면 None, 넘었으면 429 응답을 반환합니다."""
+        if not self.enabled:
+            return None
+        wait = self.store.acquire(policy, client_ip())
+        if not wait:
+            return None
+        if self.on_reject is not None:
+            self.on_reject(policy.name, wait)
+        retry_after = max(1, math.ceil(wait))
+        response = jsonify({'status': 'error', 'message': f'요청이 너무 많습니다. {retry_after}초 후에 다시 시도해주세요.'})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    def limit(self, policy):
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapped(*args, **kwargs):
+                rejected = self.check(policy)
+                if rejected is not None:
+                    return rejected
+                return view(*args, **kwargs)
+            return wrapped
+        return decorator
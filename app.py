@@ -1,42 +1,220 @@
 # =====================================================================================
-#  파일: app.py (웹 서버 및 API) - v3.4
-#  - [로직 개선] 요일별 목록 API가 'weekday' 값이 있는 웹툰만 조회하도록 수정하여,
-#    단기 휴재작(요일별)과 장기 휴재작(전체 휴재탭)을 명확히 분리합니다.
-#  - [검색 기능 강화] 띄어쓰기에 관계없이 일관된 검색 결과를 제공합니다.
+#  파일: app.py (웹 서버 및 API) - v3.16
+#  - [자동완성] /api/suggest?q= 가 워커 메모리의 정렬된 제목/작가 배열에서 접두 일치(자모·초성 포함)
+#    후보를 연재중 우선으로 돌려줍니다. 색인은 데이터 버전이 바뀔 때만 다시 만듭니다. (suggest_index.py)
+#  - [메모리 카탈로그] CATALOG_MODE=1 이면 webtoons 테이블을 워커 메모리의 열 배열로 읽어 두고,
+#    연재 목록·휴재/완결 페이지·검색을 SQLite 조회 없이 응답합니다. (catalog.py)
+#  - [내보내기 복원] 저장소에는 DB 대신 NDJSON 내보내기 파일이 커밋되므로, 시작할 때 DB 가 없거나
+#    파일보다 오래되었으면 파일로 DB 를 만들어 교체합니다. 이 서버에만 있는 구독은 합쳐집니다. (dataset_export.py)
 # =====================================================================================
 
 import sqlite3
+import os
 import re
-from flask import Flask, jsonify, request, g, render_template
+import base64
+from flask import Flask, Response, jsonify, request, g, render_template
 from flask_cors import CORS
 import math
+import search_index
+import suggest_index
+import catalog
+import change_log
+import migrations
+import dataset_export
+import snapshot
+from response_cache import PayloadCache
+from db_pool import ReadConnectionPool
+import write_coalescer
+import request_metrics
+from api_limiter import RateLimiter, RatePolicy
+from write_coalescer import SubscriptionWriter
 
 # --- 1. Flask 앱 초기화 및 설정 ---
 app = Flask(__name__)
 CORS(app)
+# 라우트별 응답 시간·DB 시간·캐시 적중률을 /metrics 로 제공합니다. (request_metrics.py)
+request_metrics.init_app(app)
 DATABASE = 'webtoons.db'
 
+# 검색은 입력할 때마다, 구독은 클릭할 때마다 호출됩니다. 한도를 넘으면 429 + Retry-After (api_limiter.py)
+# API_RATE_LIMIT_FILE 이 없으면 한도는 워커마다 따로 적용됩니다. (전체 한도 = 워커 수 x global_rate)
+SEARCH_LIMIT = RatePolicy('search', rate=5, burst=20, global_rate=200, global_burst=400)
+SUBSCRIBE_LIMIT = RatePolicy('subscribe', rate=1, burst=10, global_rate=50, global_burst=100)
+# 자동완성은 글자를 입력할 때마다 호출되지만 DB 에 닿지 않으므로 한도를 넉넉히 둡니다.
+SUGGEST_LIMIT = RatePolicy('suggest', rate=20, burst=40, global_rate=1000, global_burst=2000)
+api_limiter = RateLimiter(app)
+api_limiter.on_reject = request_metrics.record_rate_limited
+
 
 # --- 2. 데이터베이스 연결 관리 ---
+# 워커의 스레드마다 읽기 전용 연결을 유지하고 재사용합니다. (db_pool.py)
+db_pool = ReadConnectionPool(DATABASE)
+
+def restore_database():
+    """DB 가 없거나 커밋된 내보내기 파일보다 오래되었으면 파일에서 복원합니다. (gunicorn 워커 중 하나만 복원)"""
+    try:
+        restored = dataset_export.restore_if_stale(DATABASE)
+    except (dataset_export.ExportFormatError, migrations.SchemaVersionError, snapshot.SnapshotValidationError,
+            ValueError, EOFError, OSError, sqlite3.Error) as e:
+        # 복원하지 못해도 기존 DB 로 계속 응답할 수 있으므로 서버는 시작합니다.
+        print(f"경고: 내보내기 파일에서 DB 를 복원하지 못했습니다 - {e}")
+        return
+    if restored is not None:
+        meta, counts, elapsed = restored
+        print(f"{dataset_export.EXPORT_PATH} 에서 DB 복원: 데이터 버전 {meta['dataset_version']}, 웹툰 {counts.get('webtoons', 0)}개, {elapsed:.2f}초")
+
+def migrate_database():
+    """운영 DB 의 스키마를 최신 버전으로 올립니다. DB 가 아직 없으면 크롤러가 만들 때 적용합니다. (migrations.py)"""
+    if not os.path.exists(DATABASE):
+        return
+    conn = db_pool.open_writer()
+    try:
+        migrations.apply(conn)
+    except (migrations.SchemaVersionError, sqlite3.OperationalError) as e:
+        # 적용하지 못해도 기존 스키마로 읽기는 계속할 수 있으므로 서버는 시작합니다.
+        print(f"경고: DB 스키마 마이그레이션을 적용하지 못했습니다 - {e}")
+    finally:
+        conn.close()
+
+restore_database()
+migrate_database()
+
 def get_db():
-    """Application Context 내에서 유일한 DB 연결을 가져옵니다."""
+    """현재 스레드의 읽기 전용 DB 연결을 가져옵니다. (요청 간 재사용)"""
     if 'db' not in g:
-        g.db = sqlite3.connect(DATABASE)
-        g.db.row_factory = sqlite3.Row
+        g.db = db_pool.acquire()
     return g.db
 
+# 구독 쓰기는 전용 스레드가 모아서 짧은 주기로 한 번에 커밋합니다. (write_coalescer.py)
+subscription_writer = SubscriptionWriter(lambda: db_pool.open_writer(), is_current=lambda conn: db_pool.is_current(conn))
+MAX_BULK_SUBSCRIBE = 100
+
 @app.teardown_appcontext
 def close_db(exception=None):
-    """요청(request)이 끝나면 자동으로 호출되어 DB 연결을 닫습니다."""
+    """요청(request)이 끝나면 자동으로 호출되어 읽기 연결을 반납합니다."""
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        db_pool.release(db, exception)
 
 # --- 3. 유틸리티 함수 ---
 def is_valid_email(email):
     """서버 단에서 이메일 형식의 유효성을 검증합니다."""
     return re.match(r"^[^\s@]+@[^\s@]+\.[^\s@]+$", email)
 
+SQLITE_MAX_INTEGER = 2 ** 63 - 1  # SQLite 에 바인딩할 수 있는 가장 큰 정수
+MAX_PAGE = SQLITE_MAX_INTEGER // 100  # OFFSET((page - 1) * 100)이 SQLite 정수 범위를 넘지 않는 가장 큰 page
+
+def encode_cursor(rowid):
+    """페이지네이션 커서를 클라이언트가 해석할 필요 없는 불투명 문자열로 만듭니다."""
+    return base64.urlsafe_b64encode(f'r{rowid}'.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor_value):
+    """encode_cursor 로 만든 문자열에서 rowid 를 복원합니다. 형식이 잘못되었거나 rowid 범위를 벗어나면 None 을 반환합니다."""
+    try:
+        decoded = base64.urlsafe_b64decode(cursor_value + '=' * (-len(cursor_value) % 4)).decode()
+        rowid = int(decoded[1:]) if decoded.startswith('r') else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return rowid if rowid is not None and 0 <= rowid <= SQLITE_MAX_INTEGER else None
+
+def count_webtoons_by_status(conn, status):
+    """크롤러가 트리거로 유지하는 상태별 카운터를 읽습니다. 카운터가 없는 DB는 COUNT(*) 로 계산합니다."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT count FROM webtoon_status_counts WHERE status = ?", (status,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    except sqlite3.OperationalError:
+        cursor.execute("SELECT COUNT(*) FROM webtoons WHERE status = ?", (status,))
+        return cursor.fetchone()[0]
+
+def load_dataset_version():
+    """크롤러가 기록한 데이터 버전을 읽습니다. 버전 정보가 없는 DB는 파일 수정 시각을 버전으로 사용합니다."""
+    try:
+        row = get_db().execute("SELECT value FROM dataset_meta WHERE key = 'dataset_version'").fetchone()
+        if row is not None:
+            return f'v{row[0]}'
+    except sqlite3.OperationalError:
+        pass
+    return f'm{os.stat(db_pool.database).st_mtime_ns}'
+
+payload_cache = PayloadCache(load_dataset_version)
+
+def load_catalog_rows():
+    """메모리 카탈로그를 만들 webtoons 행 전체를 읽습니다."""
+    rows = get_db().execute("SELECT title_id, title_text, author, weekday, status FROM webtoons").fetchall()
+    request_metrics.add_rows(len(rows))
+    return [tuple(row) for row in rows]
+
+# CATALOG_MODE=1 일 때만 사용합니다. 데이터 버전이 바뀐 뒤 첫 요청에서 다시 읽습니다. (catalog.py)
+catalog_cache = catalog.CatalogCache(load_catalog_rows)
+
+def get_catalog():
+    """현재 데이터 버전의 메모리 카탈로그. 카탈로그 모드가 아니거나 webtoons 테이블이 없으면 None (SQLite 로 조회)"""
+    if not catalog_cache.enabled:
+        return None
+    try:
+        return catalog_cache.get(payload_cache.current_version())
+    except sqlite3.OperationalError:
+        return None
+
+def load_suggest_rows():
+    """
+    자동완성 색인을 만들 (title_id, title_text, author, status) 행 전체를 읽습니다.
+    색인 생성 스레드에서 호출되므로 앱 문맥을 직접 열어 읽기 연결을 빌리고 돌려줍니다.
+    """
+    with app.app_context():
+        webtoon_catalog = get_catalog()
+        if webtoon_catalog is not None:
+            return webtoon_catalog.suggest_rows()
+        rows = get_db().execute("SELECT title_id, title_text, author, status FROM webtoons").fetchall()
+        return [tuple(row) for row in rows]
+
+suggest_cache = suggest_index.SuggestIndexCache(load_suggest_rows)
+
+def warm_suggest_index():
+    """워커가 시작할 때 자동완성 색인 생성을 미리 시작합니다. (첫 /api/suggest 요청이 생성을 기다리지 않도록)"""
+    try:
+        with app.app_context():
+            suggest_cache.refresh(payload_cache.current_version())
+    except (sqlite3.Error, OSError):
+        pass  # DB 가 아직 없으면 첫 요청 때 만듭니다.
+
+warm_suggest_index()
+
+def cached_json_response(cache_key, builder):
+    """
+    데이터 버전별로 미리 직렬화·압축해 둔 JSON 응답을 반환합니다.
+    클라이언트가 같은 ETag 를 보내면 본문 없이 304 로 응답합니다.
+    """
+    built = []
+    def build():
+        built.append(True)
+        with request_metrics.db_timer():
+            return builder()
+    payload = payload_cache.get(cache_key, build)
+    request_metrics.record_cache(hit=not built)
+
+    if request.accept_encodings['br'] and payload.br is not None:
+        encoding, body = 'br', payload.br
+    elif request.accept_encodings['gzip']:
+        encoding, body = 'gzip', payload.gzip
+    else:
+        encoding, body = None, payload.identity
+    # 인코딩마다 바이트가 다르므로 강한 ETag 도 인코딩별로 구분합니다.
+    etag = f'{payload.etag}-{encoding}' if encoding else payload.etag
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, content_type='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 # --- 4. 기본 라우트 ---
 @app.route('/')
 def index():
@@ -46,19 +224,51 @@ def index():
 # --- 5. API 엔드포인트 ---
 
 @app.route('/api/search', methods=['GET'])
+@api_limiter.limit(SEARCH_LIMIT)
 def search_webtoons():
-    """전체 DB에서 웹툰 제목을 검색하여 결과를 반환합니다."""
+    """전체 DB에서 웹툰 제목/작가/초성을 검색하여 결과를 반환합니다."""
     query = request.args.get('q', '').strip()
 
     if not query:
         return jsonify([])
 
-    query_no_spaces = query.replace(' ', '')
-    
+    webtoon_catalog = get_catalog()
+    if webtoon_catalog is not None:
+        return jsonify(webtoon_catalog.search(query, limit=100))
+
     conn = get_db()
+    with request_metrics.db_timer():
+        try:
+            search_results = search_index.search(conn, query, limit=100)
+        except sqlite3.OperationalError:
+            # 크롤러가 아직 검색 색인을 만들지 않은 DB라면 기존 방식으로 검색합니다.
+            search_results = _search_without_index(conn, query)
+    request_metrics.add_rows(len(search_results))
+
+    return jsonify(search_results)
+
+@app.route('/api/suggest', methods=['GET'])
+@api_limiter.limit(SUGGEST_LIMIT)
+def suggest_webtoons():
+    """입력 중인 검색어로 시작하는 제목/작가의 웹툰을 연재중 우선으로 최대 limit 개 반환합니다."""
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', suggest_index.DEFAULT_LIMIT, type=int)
+    limit = min(max(limit, 1), suggest_index.MAX_LIMIT)
+
+    if not query:
+        return jsonify([])
+
+    # 데이터 버전이 바뀌면 백그라운드에서 새 색인을 만들고, 그동안은 이전 색인으로 답합니다.
+    index = suggest_cache.get(payload_cache.current_version())
+    if index is None:
+        # 아직 색인이 없음 (시작 직후 생성 중이거나, 크롤러가 webtoons 테이블을 만들기 전)
+        return jsonify([])
+    return jsonify(index.suggest(query, limit))
+
+def _search_without_index(conn, query):
+    """검색 색인이 없을 때 사용하는 전체 테이블 검색 (제목 기준)."""
+    query_no_spaces = query.replace(' ', '')
     cursor = conn.cursor()
-    
-    search_pattern = f'%{query_no_spaces}%'
     cursor.execute(
         """
         SELECT title_id, title_text, author, status 
@@ -67,17 +277,21 @@ def search_webtoons():
         ORDER BY rowid DESC 
         LIMIT 100
         """,
-        (search_pattern,)
+        (f'%{query_no_spaces}%',)
     )
-    
-    search_results = [dict(row) for row in cursor.fetchall()]
-    
-    return jsonify(search_results)
+    return [dict(row) for row in cursor.fetchall()]
 
 
 @app.route('/api/webtoons/ongoing', methods=['GET'])
 def get_ongoing_webtoons():
     """요일별 웹툰 목록(연재 및 단기 휴재 포함)을 그룹화하여 반환합니다."""
+    return cached_json_response(('ongoing',), _build_ongoing_payload)
+
+def _build_ongoing_payload():
+    webtoon_catalog = get_catalog()
+    if webtoon_catalog is not None:
+        return webtoon_catalog.ongoing()
+
     conn = get_db()
     cursor = conn.cursor()
     
@@ -88,6 +302,7 @@ def get_ongoing_webtoons():
     cursor.execute(query)
     
     all_daily_webtoons = [dict(row) for row in cursor.fetchall()]
+    request_metrics.add_rows(len(all_daily_webtoons))
 
     grouped_by_day = { 'mon': [], 'tue': [], 'wed': [], 'thu': [], 'fri': [], 'sat': [], 'sun': [], 'daily': [] }
     for webtoon in all_daily_webtoons:
@@ -95,72 +310,109 @@ def get_ongoing_webtoons():
         if day_eng in grouped_by_day:
             grouped_by_day[day_eng].append(webtoon)
             
-    return jsonify(grouped_by_day)
+    return grouped_by_day
 
 @app.route('/api/webtoons/hiatus', methods=['GET'])
 def get_hiatus_webtoons():
     """[페이지네이션] 휴재중인 웹툰 전체 목록을 페이지별로 반환합니다."""
-    page = request.args.get('page', 1, type=int)
-    per_page = 100
-    offset = (page - 1) * per_page
-
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) FROM webtoons WHERE status = '휴재'")
-    total_items = cursor.fetchone()[0]
-    total_pages = math.ceil(total_items / per_page)
-
-    cursor.execute(
-        "SELECT title_id, title_text, author, status FROM webtoons WHERE status = '휴재' ORDER BY rowid DESC LIMIT ? OFFSET ?",
-        (per_page, offset)
-    )
-    hiatus_webtoons = [dict(row) for row in cursor.fetchall()]
-    
-    return jsonify({
-        'webtoons': hiatus_webtoons,
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total_pages': total_pages,
-            'total_items': total_items
-        }
-    })
+    return _get_paginated_webtoons('휴재')
 
 @app.route('/api/webtoons/completed', methods=['GET'])
 def get_completed_webtoons():
     """[페이지네이션] 완결된 웹툰 목록을 페이지별로 반환합니다."""
-    page = request.args.get('page', 1, type=int)
+    return _get_paginated_webtoons('완결')
+
+def _get_paginated_webtoons(status):
+    """
+    상태별 웹툰 목록을 최신 등록순(rowid 내림차순)으로 반환합니다.
+    - ?cursor=<next_cursor> : 이전 응답의 마지막 rowid 다음부터 조회 (keyset, 깊은 페이지도 일정한 비용)
+    - ?page=<n>            : 기존 페이지 번호 방식 (index.html 호환)
+    """
+    cursor_param = request.args.get('cursor')
+    if cursor_param:
+        last_rowid = decode_cursor(cursor_param)
+        if last_rowid is None:
+            return jsonify({'status': 'error', 'message': '잘못된 cursor 값입니다.'}), 400
+        cache_key = (status, 'cursor', last_rowid)
+        return cached_json_response(cache_key, lambda: _build_page_payload(status, last_rowid=last_rowid))
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    if page > MAX_PAGE:
+        return jsonify({'status': 'error', 'message': '잘못된 page 값입니다.'}), 400
+    return cached_json_response((status, 'page', page), lambda: _build_page_payload(status, page=page))
+
+def _build_page_payload(status, page=None, last_rowid=None):
     per_page = 100
-    offset = (page - 1) * per_page
+    webtoon_catalog = get_catalog()
+    if webtoon_catalog is not None:
+        offset = (page - 1) * per_page if page is not None else 0
+        webtoons = webtoon_catalog.by_status(status, per_page + 1, offset=offset, before=last_rowid)
+        return _page_payload(webtoons, per_page, webtoon_catalog.count(status), page)
 
     conn = get_db()
     cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) FROM webtoons WHERE status = '완결'")
-    total_items = cursor.fetchone()[0]
-    total_pages = math.ceil(total_items / per_page)
 
-    cursor.execute(
-        "SELECT title_id, title_text, author, status FROM webtoons WHERE status = '완결' ORDER BY rowid DESC LIMIT ? OFFSET ?",
-        (per_page, offset)
-    )
-    completed_webtoons = [dict(row) for row in cursor.fetchall()]
-    
-    return jsonify({
-        'webtoons': completed_webtoons,
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total_pages': total_pages,
-            'total_items': total_items
-        }
-    })
+    if last_rowid is not None:
+        cursor.execute(
+            "SELECT title_id, title_text, author, status FROM webtoons WHERE status = ? AND rowid < ? ORDER BY rowid DESC LIMIT ?",
+            (status, last_rowid, per_page + 1)
+        )
+    else:
+        offset = (page - 1) * per_page
+        cursor.execute(
+            "SELECT title_id, title_text, author, status FROM webtoons WHERE status = ? ORDER BY rowid DESC LIMIT ? OFFSET ?",
+            (status, per_page + 1, offset)
+        )
+    webtoons = [dict(row) for row in cursor.fetchall()]
+    request_metrics.add_rows(len(webtoons))
+    return _page_payload(webtoons, per_page, count_webtoons_by_status(conn, status), page)
+
+def _page_payload(webtoons, per_page, total_items, page=None):
+    # 한 건을 더 조회해 다음 페이지 존재 여부를 판단합니다. title_id 는 rowid 의 별칭입니다.
+    has_next = len(webtoons) > per_page
+    webtoons = webtoons[:per_page]
+    next_cursor = encode_cursor(webtoons[-1]['title_id']) if has_next else None
 
+    pagination = {
+        'per_page': per_page,
+        'total_pages': math.ceil(total_items / per_page),
+        'total_items': total_items,
+        'next_cursor': next_cursor
+    }
+    if page is not None:
+        pagination['page'] = page
+
+    return {'webtoons': webtoons, 'pagination': pagination}
+
+
+def _parse_title_ids(values):
+    """
+    요청의 웹툰 ID 목록을 정수로 변환합니다. 형식이 잘못되었거나 SQLite 정수 범위(1 ~ 2**63-1)를
+    벗어난 값이 있으면 None 을 반환합니다. (true/false 는 1/0 으로 바꾸지 않고 거절합니다)
+    """
+    try:
+        title_ids = [int(value) for value in values if not isinstance(value, bool)]
+    except (TypeError, ValueError, OverflowError):  # OverflowError: JSON 의 1e400 (무한대)
+        return None
+    if len(title_ids) != len(values) or not all(1 <= title_id <= SQLITE_MAX_INTEGER for title_id in title_ids):
+        return None
+    return title_ids
+
+def _subscription_results(results):
+    return [{'titleId': title_id, 'result': result} for title_id, result in results]
+
+def _write_timeout_response(error):
+    """쓰기 스레드가 밀려 구독 결과를 기다리지 못한 경우. 구독은 중복 기록되지 않으므로 다시 요청하도록 안내합니다."""
+    response = jsonify({'status': 'error', 'message': '요청이 많아 구독을 처리하지 못했습니다. 잠시 후 다시 시도해주세요.',
+                        'retryable': True, 'cancelled': error.cancelled})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
 
 @app.route('/api/subscribe', methods=['POST'])
+@api_limiter.limit(SUBSCRIBE_LIMIT)
 def subscribe():
-    """사용자의 구독 요청을 처리합니다."""
+    """사용자의 구독 요청을 처리합니다. 동시에 들어온 요청은 쓰기 스레드가 모아서 한 번에 커밋합니다."""
     data = request.json
     email, title_id = data.get('email'), data.get('titleId')
 
@@ -168,15 +420,92 @@ def subscribe():
         return jsonify({'status': 'error', 'message': '이메일과 웹툰 ID가 필요합니다.'}), 400
     if not is_valid_email(email):
         return jsonify({'status': 'error', 'message': '올바른 이메일 형식이 아닙니다.'}), 400
+    title_ids = _parse_title_ids([title_id])
+    if title_ids is None:
+        return jsonify({'status': 'error', 'message': '올바른 웹툰 ID가 아닙니다.'}), 400
+
+    try:
+        with request_metrics.db_timer():
+            results = subscription_writer.subscribe(email, title_ids)
+    except sqlite3.Error as e:
+        return jsonify({'status': 'error', 'message': f'데이터베이스 오류: {e}'}), 500
+    except write_coalescer.WriteTimeout as e:
+        return _write_timeout_response(e)
+    request_metrics.add_rows(len(results))
+    if results[0][1] == write_coalescer.NOT_FOUND:
+        return jsonify({'status': 'error', 'message': f'ID {title_id} 웹툰을 찾을 수 없습니다.', 'results': _subscription_results(results)}), 404
+    return jsonify({'status': 'success', 'message': f'ID {title_id} 구독 완료!', 'results': _subscription_results(results)})
+
+@app.route('/api/subscribe/bulk', methods=['POST'])
+@api_limiter.limit(SUBSCRIBE_LIMIT)
+def subscribe_bulk():
+    """여러 웹툰을 한 번에 구독합니다. 웹툰 ID는 한 번의 쿼리로 검증하고 한 트랜잭션으로 기록합니다."""
+    data = request.json or {}
+    email, title_ids = data.get('email'), data.get('titleIds')
+
+    if not email or not isinstance(title_ids, list) or not title_ids:
+        return jsonify({'status': 'error', 'message': '이메일과 웹툰 ID 목록이 필요합니다.'}), 400
+    if len(title_ids) > MAX_BULK_SUBSCRIBE:
+        return jsonify({'status': 'error', 'message': f'한 번에 최대 {MAX_BULK_SUBSCRIBE}개까지 구독할 수 있습니다.'}), 400
+    if not is_valid_email(email):
+        return jsonify({'status': 'error', 'message': '올바른 이메일 형식이 아닙니다.'}), 400
+    title_ids = _parse_title_ids(title_ids)
+    if title_ids is None:
+        return jsonify({'status': 'error', 'message': '올바른 웹툰 ID가 아닙니다.'}), 400
 
     try:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("INSERT OR IGNORE INTO subscriptions (email, title_id) VALUES (?, ?)", (email, str(title_id)))
-        conn.commit()
-        return jsonify({'status': 'success', 'message': f'ID {title_id} 구독 완료!'})
+        with request_metrics.db_timer():
+            results = subscription_writer.subscribe(email, list(dict.fromkeys(title_ids)))
     except sqlite3.Error as e:
         return jsonify({'status': 'error', 'message': f'데이터베이스 오류: {e}'}), 500
+    except write_coalescer.WriteTimeout as e:
+        return _write_timeout_response(e)
+    request_metrics.add_rows(len(results))
+    subscribed = sum(1 for _, result in results if result == write_coalescer.SUBSCRIBED)
+    return jsonify({'status': 'success', 'message': f'{subscribed}개 웹툰 구독 완료!', 'results': _subscription_results(results)})
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """
+    ?since=<version> 이후의 웹툰 변경 기록을 version 순서로 반환합니다. (최대 limit 개, has_more 로 이어 받기)
+    since 없이 요청하면 변경 없이 현재 version 만 알려 줍니다. 응답의 reset 이 true 면 전체 목록을 다시 받아야 합니다.
+    """
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', change_log.MAX_CHANGES_PER_RESPONSE, type=int)
+    if 'since' in request.args and (since is None or since < 0):
+        return jsonify({'status': 'error', 'message': '잘못된 since 값입니다.'}), 400
+    limit = min(max(limit, 1), change_log.MAX_CHANGES_PER_RESPONSE)
+    return cached_json_response(('changes', since, limit), lambda: _build_changes_payload(since, limit))
+
+def _build_changes_payload(since, limit):
+    conn = get_db()
+    try:
+        if since is None:
+            latest = change_log.latest_version(conn)
+            return {'since': None, 'version': latest, 'latest': latest, 'reset': False, 'has_more': False, 'changes': []}
+        payload = change_log.changes_since(conn, since, limit)
+    except sqlite3.OperationalError:
+        # 크롤러가 아직 변경 기록 테이블을 만들지 않은 DB
+        return {'since': since, 'version': 0, 'latest': 0, 'reset': bool(since), 'has_more': False, 'changes': []}
+    request_metrics.add_rows(len(payload['changes']))
+    return payload
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    """DB 연결 상태와 연결 풀 사용 현황을 반환합니다."""
+    try:
+        get_db().execute("SELECT 1").fetchone()
+        db_status = 'ok'
+    except sqlite3.Error as e:
+        db_status = f'error: {e}'
+    return jsonify({
+        'status': 'ok' if db_status == 'ok' else 'error',
+        'db': db_status,
+        'pool': db_pool.stats(),
+        'subscription_writer': subscription_writer.stats(),
+        'catalog': catalog_cache.stats(),
+        'suggest': suggest_cache.stats()
+    }), 200 if db_status == 'ok' else 503
 
 # --- 6. 실행 ---
 if __name__ == '__main__':
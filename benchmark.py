@@ -0,0 +1,825 @@
+# ===================================================================
+# 파일: benchmark.py (성능 측정 스크립트)
+# - 합성 데이터셋(webtoons.db 와 같은 스키마)을 임시 폴더에 만들어
+#   실제 DB를 건드리지 않고 핫 패스의 지연 시간을 측정합니다.
+# - 측정 대상: 검색 색인, API 엔드포인트(Flask test client), 크롤러 분류(fixture 대역 서버),
+#   DB 동기화, 완결 알림 발송(로컬 SMTP 대역 서버), 크롤러 요청 제어(장애 주입 대역 서버),
+#   API 요청 속도 제한(토큰 버킷 저장소와 Flask 요청당 부가 비용), 자동완성 색인(생성 시간·메모리·조회 지연),
+#   메모리 카탈로그와 SQLite 경로의 읽기 API 처리량·워커 메모리 비교,
+#   데이터셋 내보내기(크기·결정성)와 내보내기 파일만으로 시작하는 API 서버의 첫 응답까지 걸리는 시간
+# - 사용법: python benchmark.py search --sizes 10000 100000 1000000
+#           python benchmark.py api --sizes 10000 100000 --subscriptions 1000000
+#           python benchmark.py classify --sizes 10000 100000
+#           python benchmark.py sync --sizes 10000 100000 1000000
+#           python benchmark.py notify --subscribers 2000 --pool-sizes 1 4 8
+#             (notify 는 로컬 SMTP 대역 서버로 aiosmtpd 패키지가 필요합니다)
+#           python benchmark.py fetch --titles 20000
+#             (지연/오류/429 를 주입한 대역 서버에서 고정 동시성과 적응형 요청 제어를 비교합니다)
+#           python benchmark.py limiter --clients 1 1000 100000
+#           python benchmark.py suggest --sizes 10000 100000
+#           python benchmark.py catalog --sizes 5000 100000
+#           python benchmark.py export --sizes 10000 100000 --subscriptions 100000
+#           python benchmark.py all --json results.json
+# - --json 경로를 주면 커밋/환경 정보와 함께 결과를 JSON 으로 저장하여 커밋 간 비교에 사용합니다.
+# ===================================================================
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import crawl_limiter
+import crawler
+from crawler import setup_database
+import dataset_export
+import search_index
+import suggest_index
+
+STATUSES = ('연재중', '휴재', '완결')
+WEEKDAY_VALUES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun', 'daily')
+ENDPOINT_STATUSES = {'hiatus': '휴재', 'completed': '완결'}
+
+
+# --- 1. 합성 데이터셋 생성 ---
+def _syllable_pool(rng, size=1000):
+    """자주 쓰이는 음절 분포를 흉내 내기 위해 한정된 개수의 한글 음절 풀을 만듭니다."""
+    return [chr(0xAC00 + rng.randrange(11172)) for _ in range(size)]
+
+def _random_word(rng, pool, min_len=2, max_len=4):
+    return ''.join(rng.choice(pool) for _ in range(rng.randint(min_len, max_len)))
+
+def generate_dataset(path, n_titles, n_subscriptions=0, seed=42):
+    """n_titles 개의 웹툰과 n_subscriptions 개의 구독을 가진 합성 DB를 만들고 검색 색인까지 생성합니다."""
+    rng = random.Random(seed)
+    pool = _syllable_pool(rng)
+    setup_database(path)
+    conn = sqlite3.connect(path)
+    rows = []
+    for i in range(n_titles):
+        title = ' '.join(_random_word(rng, pool) for _ in range(rng.randint(1, 3)))
+        author = _random_word(rng, pool, 2, 3)
+        status = rng.choices(STATUSES, weights=(45, 12, 43))[0]
+        weekday = rng.choice(WEEKDAY_VALUES) if status == '연재중' else None
+        rows.append((100000 + i, title, author, weekday, status))
+    conn.executemany("INSERT INTO webtoons (title_id, title_text, author, weekday, status) VALUES (?, ?, ?, ?, ?)", rows)
+    if n_subscriptions:
+        # 수백만 건도 메모리에 모아 두지 않도록 생성기로 넣습니다. (중복 쌍은 UNIQUE 제약으로 무시)
+        n_users = max(n_subscriptions // 3, 1)
+        subscriptions = ((f'user{rng.randrange(n_users)}@example.com', 100000 + rng.randrange(n_titles)) for _ in range(n_subscriptions))
+        conn.executemany("INSERT OR IGNORE INTO subscriptions (email, title_id) VALUES (?, ?)", subscriptions)
+    search_index.rebuild(conn.cursor())
+    conn.commit()
+    return conn
+
+
+# --- 2. 측정 유틸리티 ---
+def _percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+    return {
+        'p50': statistics.median(ordered),
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+def _time_calls(func, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _percentiles(samples)
+
+@contextlib.contextmanager
+def _quiet():
+    """측정 중에는 크롤러의 진행 로그를 출력하지 않습니다."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def _run_metadata():
+    """결과를 커밋 간에 비교할 수 있도록 측정 환경을 기록합니다."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'argv': sys.argv[1:],
+    }
+
+
+# --- 3. 검색 벤치마크 ---
+def _legacy_search(conn, query):
+    """색인 도입 전의 REPLACE() LIKE 전체 스캔 검색."""
+    pattern = f"%{query.replace(' ', '')}%"
+    return conn.execute(
+        "SELECT title_id, title_text, author, status FROM webtoons WHERE REPLACE(title_text, ' ', '') LIKE ? ORDER BY rowid DESC LIMIT 100",
+        (pattern,)
+    ).fetchall()
+
+def _sample_queries(conn, rng, count):
+    """실제 제목/작가에서 접두·중간·초성·작가 검색어를 뽑습니다."""
+    rows = conn.execute("SELECT title_text, author FROM webtoons ORDER BY random() LIMIT ?", (count,)).fetchall()
+    queries = []
+    for title, author in rows:
+        norm = search_index.normalize(title)
+        kind = rng.choice(('prefix', 'infix', 'chosung', 'author'))
+        if kind == 'prefix':
+            queries.append(norm[:3])
+        elif kind == 'infix' and len(norm) > 3:
+            start = rng.randrange(1, len(norm) - 2)
+            queries.append(norm[start:start + 3])
+        elif kind == 'chosung':
+            queries.append(search_index.to_chosung(norm[:4]))
+        else:
+            queries.append(author)
+    return queries
+
+def bench_search(sizes, repeat, skip_legacy_above):
+    rng = random.Random(7)
+    results = []
+    print(f"{'titles':>8} | {'indexed p50':>11} | {'indexed p95':>11} | {'legacy p50':>10} | {'legacy p95':>10}  (ms)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            conn = generate_dataset(os.path.join(tmp, f'search_{size}.db'), size)
+            queries = [(conn, q) for q in _sample_queries(conn, rng, repeat)]
+            indexed = _time_calls(search_index.search, queries)
+            legacy = _time_calls(_legacy_search, queries) if size <= skip_legacy_above else None
+            if legacy:
+                legacy_cols = f"{legacy['p50']:>10.3f} | {legacy['p95']:>10.3f}"
+            else:
+                legacy_cols = f"{'-':>10} | {'-':>10}"
+            print(f"{size:>8} | {indexed['p50']:>11.3f} | {indexed['p95']:>11.3f} | {legacy_cols}")
+            results.append({'titles': size, 'indexed_ms': indexed, 'legacy_ms': legacy})
+            conn.close()
+    return results
+
+
+# --- 4. API 엔드포인트 벤치마크 ---
+def _api_requests(conn, rng, repeat):
+    """측정할 (이름, URL) 목록. 깊은 페이지와 cursor 이어 읽기를 모두 포함합니다."""
+    requests = [('search', f'/api/search?q={query}') for query in _sample_queries(conn, rng, repeat)]
+    requests += [('ongoing', '/api/webtoons/ongoing')] * repeat
+    for status in ('hiatus', 'completed'):
+        requests += [(f'{status}_page1', f'/api/webtoons/{status}?page=1')] * repeat
+        total_pages = math.ceil(conn.execute("SELECT COUNT(*) FROM webtoons WHERE status = ?", (ENDPOINT_STATUSES[status],)).fetchone()[0] / 100)
+        requests += [(f'{status}_deep_page', f'/api/webtoons/{status}?page={rng.randint(1, max(total_pages, 1))}') for _ in range(repeat)]
+    return requests
+
+def _walk_cursor(client, status):
+    """next_cursor 를 따라 목록 끝까지 읽고, 읽은 페이지 수를 반환합니다."""
+    url, pages = f'/api/webtoons/{status}', 0
+    while url:
+        pagination = client.get(url).get_json()['pagination']
+        pages += 1
+        url = f"/api/webtoons/{status}?cursor={pagination['next_cursor']}" if pagination.get('next_cursor') else None
+    return pages
+
+def bench_api(sizes, repeat, n_subscriptions):
+    import app as webapp
+    from db_pool import ReadConnectionPool
+
+    webapp.suggest_cache.wait()  # 시작할 때의 자동완성 색인 생성이 측정과 겹치지 않도록
+    rng = random.Random(11)
+    results = []
+    print(f"{'titles':>8} | {'endpoint':<22} | {'cold p50':>8} | {'cold p95':>8} | {'warm p50':>8} | {'warm p95':>8}  (ms)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f'api_{size}.db')
+            generate_dataset(path, size, n_subscriptions).close()
+            webapp.db_pool.close_all()
+            webapp.db_pool = ReadConnectionPool(path)
+            webapp.payload_cache.clear()  # 이전 DB 에서 읽은 데이터 버전을 버립니다.
+            webapp.api_limiter.enabled = False  # 한 IP 로 반복 요청하므로 속도 제한은 끕니다. (limiter 벤치마크 참고)
+            client = webapp.app.test_client()
+            conn = sqlite3.connect(path)
+            by_endpoint = {}
+            for name, url in _api_requests(conn, rng, repeat):
+                by_endpoint.setdefault(name, []).append(url)
+            conn.close()
+
+            for name, urls in by_endpoint.items():
+                def cold(url):
+                    webapp.payload_cache.clear()
+                    assert client.get(url).status_code == 200
+                def warm(url):
+                    assert client.get(url).status_code == 200
+                cold_ms = _time_calls(cold, [(url,) for url in urls])
+                warm_ms = _time_calls(warm, [(url,) for url in urls])
+                print(f"{size:>8} | {name:<22} | {cold_ms['p50']:>8.3f} | {cold_ms['p95']:>8.3f} | {warm_ms['p50']:>8.3f} | {warm_ms['p95']:>8.3f}")
+                results.append({'titles': size, 'endpoint': name, 'cold_ms': cold_ms, 'warm_ms': warm_ms})
+
+            for status in ('hiatus', 'completed'):
+                webapp.payload_cache.clear()
+                start = time.perf_counter()
+                pages = _walk_cursor(client, status)
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"{size:>8} | {status + '_cursor_walk':<22} | {pages}페이지 전체 {elapsed:.1f}ms")
+                results.append({'titles': size, 'endpoint': f'{status}_cursor_walk', 'pages': pages, 'total_ms': elapsed})
+            webapp.db_pool.close_all()
+    webapp.api_limiter.enabled = True
+    return results
+
+
+# --- 5. 크롤러 분류 벤치마크 (fixture 대역 서버) ---
+def generate_fixture_payloads(n_titles, seed=42):
+    """
+    네이버 API 와 같은 형태의 요일별/완결 목록 응답을 만듭니다.
+    반환값: {요청 경로: 응답 dict} (FixtureServer 의 manifest 키와 같은 형식)
+    """
+    rng = random.Random(seed)
+    pool = _syllable_pool(rng)
+    weekday_lists = {day: [] for day in crawler.WEEKDAYS}
+    finished = []
+    for i in range(n_titles):
+        title_id, author = 100000 + i, _random_word(rng, pool, 2, 3)
+        # 실제 응답처럼 크롤러가 쓰지 않는 필드(썸네일, 작가 목록, 배지 등)도 포함합니다.
+        webtoon = {
+            'titleId': title_id,
+            'titleName': ' '.join(_random_word(rng, pool) for _ in range(rng.randint(1, 3))),
+            'author': author,
+            'rest': rng.random() < 0.1,
+            'adult': False,
+            'up': rng.random() < 0.3,
+            'new': False,
+            'bm': False,
+            'starScore': round(rng.uniform(7, 10), 2),
+            'viewCount': 0,
+            'thumbnailUrl': f'https://image-comic.pstatic.net/webtoon/{title_id}/thumbnail/thumbnail_IMAG21_{rng.getrandbits(64):016x}.jpg',
+            'thumbnailBadgeList': [],
+            'titleBadgeList': [],
+            'artistList': [
+                {'id': rng.randrange(10 ** 6), 'artistTypeList': ['ARTIST_WRITER', 'ARTIST_PAINTER'], 'name': author},
+            ],
+            'genreList': [{'type': 'DRAMA', 'description': '드라마'}],
+            'webtoonLevelCode': 'WEBTOON',
+            'novelOriginAuthors': [],
+        }
+        if rng.random() < 0.45:
+            weekday_lists[rng.choice(list(crawler.WEEKDAYS))].append(webtoon)
+            if rng.random() < 0.2:
+                finished.append(dict(webtoon))  # 두 목록에 모두 나오는 웹툰 (1순위가 우선)
+        else:
+            finished.append(webtoon)
+
+    payloads = {crawler.WEEKDAY_API_PATH.format(day=day): {'titleList': titles} for day, titles in weekday_lists.items()}
+    total_pages = max(math.ceil(len(finished) / 100), 1)
+    for page in range(1, total_pages + 1):
+        payloads[crawler.FINISHED_API_PATH.format(page=page)] = {
+            'titleList': finished[(page - 1) * 100:page * 100],
+            'pageInfo': {'totalPages': total_pages, 'totalRows': len(finished), 'pageSize': 100},
+        }
+    return payloads
+
+def _write_fixtures(fixture_dir, payloads):
+    os.makedirs(fixture_dir, exist_ok=True)
+    manifest = {}
+    for i, (key, payload) in enumerate(payloads.items()):
+        file_name = f'{i:06d}.json'
+        with open(os.path.join(fixture_dir, file_name), 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        manifest[key] = file_name
+    with open(os.path.join(fixture_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+async def _peak_memory_fetch_all(fixture_dir):
+    """수집·분류 한 번 동안 파이썬 힙의 최대 사용량(MB)과 결과가 차지하는 메모리(MB)를 잽니다."""
+    from http_cache import FixtureServer
+    async with FixtureServer(fixture_dir) as base_url:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        with _quiet():
+            result = await crawler._fetch_all_naver_data(base_url, limiter=crawl_limiter.CrawlLimiter(rate=0))
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    del result
+    return {'peak_mb': (peak - baseline) / 2 ** 20, 'retained_mb': (retained - baseline) / 2 ** 20}
+
+async def _time_fetch_all(fixture_dir, repeat):
+    from http_cache import FixtureServer
+    samples = []
+    async with FixtureServer(fixture_dir) as base_url:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with _quiet():
+                await crawler._fetch_all_naver_data(base_url, limiter=crawl_limiter.CrawlLimiter(rate=0))
+            samples.append((time.perf_counter() - start) * 1000)
+    return _percentiles(samples)
+
+def bench_classify(sizes, repeat):
+    results = []
+    print(f"{'titles':>8} | {'classify p50':>12} | {'classify p95':>12} | {'fetch+classify p50':>18} | {'p95':>8}  (ms) | {'peak':>7} | {'retained':>8}  (MB)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            payloads = generate_fixture_payloads(size)
+            ongoing_results = [crawler._extract_title_list(payloads[crawler.WEEKDAY_API_PATH.format(day=day)]) for day in crawler.WEEKDAYS]
+            candidates = {}
+            for key in sorted(k for k in payloads if k not in {crawler.WEEKDAY_API_PATH.format(day=day) for day in crawler.WEEKDAYS}):
+                for record in crawler._extract_title_list(payloads[key]):
+                    candidates.setdefault(record.title_id, record)
+            with _quiet():
+                classify_ms = _time_calls(crawler._classify_webtoons, [(ongoing_results, candidates, {})] * repeat)
+
+            fixture_dir = os.path.join(tmp, f'fixtures_{size}')
+            _write_fixtures(fixture_dir, payloads)
+            fetch_ms = asyncio.run(_time_fetch_all(fixture_dir, max(repeat // 5, 3)))
+            memory = asyncio.run(_peak_memory_fetch_all(fixture_dir))
+            print(f"{size:>8} | {classify_ms['p50']:>12.3f} | {classify_ms['p95']:>12.3f} | {fetch_ms['p50']:>18.3f} | {fetch_ms['p95']:>8.3f}       | {memory['peak_mb']:>7.1f} | {memory['retained_mb']:>8.1f}")
+            results.append({'titles': size, 'classify_ms': classify_ms, 'fetch_and_classify_ms': fetch_ms, 'memory_mb': memory, 'requests': len(payloads)})
+    return results
+
+
+# --- 6. DB 동기화 벤치마크 ---
+def _today_from_db(conn, rng, change_ratio, new_ratio):
+    """DB 내용을 '오늘 분류한 레코드'로 바꾸고, 일부 웹툰의 상태를 바꾸거나 새 웹툰을 추가합니다."""
+    records = {}
+    rows = conn.execute("SELECT title_id, title_text, author, weekday, status FROM webtoons").fetchall()
+    for title_id, title_text, author, weekday, status in rows:
+        if rng.random() < change_ratio:
+            status = rng.choice([s for s in STATUSES if s != status])
+            weekday = rng.choice(WEEKDAY_VALUES) if status == '연재중' else None
+        records[title_id] = crawler.WebtoonRecord(title_id, title_text, author, weekday, status=status)
+    next_id = max(row[0] for row in rows) + 1
+    for i in range(int(len(rows) * new_ratio)):
+        records[next_id + i] = crawler.WebtoonRecord(next_id + i, f'신작 {i}', '작가', status='완결')
+    return records
+
+def bench_sync(sizes, change_ratio, new_ratio):
+    rng = random.Random(13)
+    results = []
+    print(f"{'titles':>8} | {'changed sync':>12} | {'rows written':>12} | {'no-op sync':>10}  (ms, 변경 비율 {change_ratio:.1%} / 신규 {new_ratio:.1%})")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            conn = generate_dataset(os.path.join(tmp, f'sync_{size}.db'), size)
+            records = _today_from_db(conn, rng, change_ratio, new_ratio)
+            with _quiet():
+                start = time.perf_counter()
+                counts = crawler._synchronize_database(conn, records)
+                changed_ms = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                crawler._synchronize_database(conn, records)
+                noop_ms = (time.perf_counter() - start) * 1000
+            written = counts['new'] + counts['changed']
+            print(f"{size:>8} | {changed_ms:>12.1f} | {written:>12} | {noop_ms:>10.1f}")
+            results.append({'titles': size, 'changed_sync_ms': changed_ms, 'noop_sync_ms': noop_ms, 'counts': counts})
+            conn.close()
+    return results
+
+
+# --- 7. 완결 알림 발송 벤치마크 ---
+class _SmtpSink:
+    """받은 메일 수만 세는 aiosmtpd 핸들러. latency_ms 로 원격 서버의 응답 지연을 흉내 냅니다."""
+
+    def __init__(self, latency_ms):
+        self.latency = latency_ms / 1000
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.received += 1
+        return '250 OK'
+
+def bench_notify(n_subscribers, n_completed, pool_sizes, latency_ms):
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        print("notify 벤치마크에는 aiosmtpd 패키지가 필요합니다. (pip install aiosmtpd)")
+        return []
+
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    sink = _SmtpSink(latency_ms)
+    controller = Controller(sink, hostname='127.0.0.1', port=port)
+    controller.start()
+    crawler.SMTP_HOST, crawler.SMTP_PORT, crawler.SMTP_STARTTLS = '127.0.0.1', port, False
+    os.environ['EMAIL_ADDRESS'] = 'bench@example.com'
+    os.environ.pop('EMAIL_PASSWORD', None)
+
+    results = []
+    print(f"{'pool':>4} | {'emails':>6} | {'seconds':>7} | {'emails/s':>8}  (SMTP 지연 {latency_ms}ms)")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for pool_size in pool_sizes:
+                conn = generate_dataset(os.path.join(tmp, f'notify_{pool_size}.db'), max(n_completed * 10, 1000), n_subscribers)
+                completed_ids = {row[0] for row in conn.execute(
+                    "SELECT title_id FROM subscriptions GROUP BY title_id ORDER BY COUNT(*) DESC LIMIT ?", (n_completed,))}
+                records = {row[0]: crawler.WebtoonRecord(row[0], row[1], row[2], status='완결') for row in conn.execute("SELECT title_id, title_text, author FROM webtoons")}
+                crawler.SMTP_POOL_SIZE = pool_size
+                before = sink.received
+                start = time.perf_counter()
+                with _quiet():
+                    crawler.send_completion_notifications(conn, completed_ids, records)
+                elapsed = time.perf_counter() - start
+                sent = sink.received - before
+                print(f"{pool_size:>4} | {sent:>6} | {elapsed:>7.2f} | {sent / elapsed:>8.1f}")
+                results.append({'pool_size': pool_size, 'emails': sent, 'seconds': elapsed, 'emails_per_sec': sent / elapsed})
+                conn.close()
+    finally:
+        controller.stop()
+    return results
+
+
+# --- 8. 크롤러 요청 제어 벤치마크 (장애 주입 대역 서버) ---
+FETCH_SCENARIOS = {
+    'clean': {'latency': 0.02},
+    'errors_5pct': {'latency': 0.02, 'error_rate': 0.05},
+    'throttle_c3': {'latency': 0.05, 'max_concurrency': 3, 'retry_after': 1},
+    'throttle_c3_no_header': {'latency': 0.05, 'max_concurrency': 3},
+}
+
+async def _run_fetch_scenario(fixture_dir, faults, limiter):
+    from http_cache import FixtureServer
+    server = FixtureServer(fixture_dir, seed=7, **faults)
+    metrics = crawler.RunMetrics()
+    async with server as base_url:
+        start = time.perf_counter()
+        with _quiet():
+            await crawler._fetch_all_naver_data(base_url, metrics=metrics, limiter=limiter)
+        elapsed = time.perf_counter() - start
+    counters = metrics.finish('성공')['counters']
+    return {
+        'seconds': elapsed,
+        'server_requests': server.request_count,
+        'server_429': server.throttled_count,
+        'server_errors': server.error_count,
+        'failed_urls': counters['failed_requests'],
+        'backoffs': counters.get('concurrency_backoffs', 0),
+        'final_concurrency': counters.get('final_concurrency'),
+    }
+
+def bench_fetch(n_titles, max_concurrency):
+    """같은 fixture 를 장애 주입 조건별로, 고정 동시성과 적응형(AIMD) 요청 제어로 각각 수집합니다."""
+    results = []
+    print(f"{'scenario':>22} | {'mode':>8} | {'seconds':>7} | {'requests':>8} | {'429':>5} | {'5xx':>5} | {'failed':>6} | {'backoffs':>8} | {'final c':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_dir = os.path.join(tmp, 'fixtures')
+        _write_fixtures(fixture_dir, generate_fixture_payloads(n_titles))
+        for name, faults in FETCH_SCENARIOS.items():
+            for mode in ('fixed', 'adaptive'):
+                limiter = crawl_limiter.CrawlLimiter(rate=0, max_concurrency=max_concurrency, adaptive=mode == 'adaptive')
+                result = asyncio.run(_run_fetch_scenario(fixture_dir, faults, limiter))
+                print(f"{name:>22} | {mode:>8} | {result['seconds']:>7.2f} | {result['server_requests']:>8} | {result['server_429']:>5} | "
+                      f"{result['server_errors']:>5} | {result['failed_urls']:>6} | {result['backoffs']:>8} | {str(result['final_concurrency']):>7}")
+                results.append(dict(result, scenario=name, mode=mode, faults=faults))
+    return results
+
+
+# --- 9. API 요청 속도 제한 벤치마크 ---
+def _time_acquire(store, policy, keys, calls):
+    """store.acquire 한 번의 평균 시간(마이크로초)과 거절 비율."""
+    rejected = 0
+    start = time.perf_counter()
+    for i in range(calls):
+        if store.acquire(policy, keys[i % len(keys)]):
+            rejected += 1
+    return (time.perf_counter() - start) / calls * 1e6, rejected / calls
+
+def _time_requests(client, url, addresses, calls):
+    samples = []
+    for i in range(calls):
+        environ = {'REMOTE_ADDR': addresses[i % len(addresses)]}
+        start = time.perf_counter()
+        client.get(url, environ_base=environ)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+def bench_limiter(client_counts, calls):
+    """
+    토큰 버킷 저장소(워커 메모리 / mmap 공유 파일)의 acquire 비용과, 제한을 켠 Flask 요청의 부가 비용을 잽니다.
+    허용 위주(한도 여유)와 거절 위주(한 IP 가 한도를 넘겨 두드림) 두 경우를 모두 측정합니다.
+    """
+    import api_limiter
+    import app as webapp
+
+    open_policy = api_limiter.RatePolicy('bench', rate=1e9, burst=1e9, global_rate=1e9, global_burst=1e9)
+    tight_policy = api_limiter.RatePolicy('bench_tight', rate=5, burst=20, global_rate=1e9, global_burst=1e9)
+    results = []
+    print(f"{'store':>8} | {'clients':>8} | {'allow us/op':>11} | {'flood us/op':>11} | {'flood 429':>9} | {'keys':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for clients in client_counts:
+            keys = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(clients)]
+            for name in ('memory', 'shared'):
+                store = api_limiter.MemoryStore() if name == 'memory' else api_limiter.SharedStore(os.path.join(tmp, f'rl_{clients}'))
+                allow_us, _ = _time_acquire(store, open_policy, keys, calls)
+                flood_us, flood_rejected = _time_acquire(store, tight_policy, keys[:1], calls)
+                size = len(store) if name == 'memory' else '-'
+                print(f"{name:>8} | {clients:>8} | {allow_us:>11.2f} | {flood_us:>11.2f} | {flood_rejected:>8.1%} | {size:>7}")
+                results.append({'store': name, 'clients': clients, 'allow_us': allow_us, 'flood_us': flood_us, 'flood_rejected': flood_rejected})
+                if name == 'shared':
+                    store.close()
+
+    # Flask 전체 요청 경로에서의 부가 비용: 빈 검색어(DB 조회 없음)를 1000개 IP 로 보냅니다.
+    client = webapp.app.test_client()
+    addresses = [f'10.0.{i >> 8}.{i & 255}' for i in range(1000)]
+    saved = {slot: getattr(webapp.SEARCH_LIMIT, slot) for slot in ('rate', 'burst', 'global_rate', 'global_burst')}
+    for slot in saved:
+        setattr(webapp.SEARCH_LIMIT, slot, 1e9)
+    try:
+        timings = {}
+        for enabled in (False, True):
+            webapp.api_limiter.enabled = enabled
+            _time_requests(client, '/api/search?q=', addresses, 200)  # 워밍업
+            timings[enabled] = _time_requests(client, '/api/search?q=', addresses, calls // 10)
+    finally:
+        for slot, value in saved.items():
+            setattr(webapp.SEARCH_LIMIT, slot, value)
+        webapp.api_limiter.enabled = True
+    print(f"Flask /api/search 요청 p50: 제한 끔 {timings[False]:.1f}us / 제한 켬 {timings[True]:.1f}us (차이 {timings[True] - timings[False]:+.1f}us)")
+    results.append({'flask_request_us': {'disabled': timings[False], 'enabled': timings[True]}})
+    return results
+
+
+# --- 10. 자동완성 벤치마크 ---
+def _suggest_queries(rows, rng, count):
+    """입력 도중의 검색어를 흉내 냅니다: 제목 접두어, 조합 중인 마지막 글자(초성만 입력), 초성, 작가 접두어."""
+    queries = []
+    for title, author in rng.sample(rows, min(count, len(rows))):
+        norm = search_index.normalize(title)
+        cut = rng.randint(1, min(len(norm), 4))
+        kind = rng.choice(('prefix', 'composing', 'chosung', 'author'))
+        if kind == 'prefix':
+            queries.append(norm[:cut])
+        elif kind == 'composing':
+            queries.append(norm[:cut - 1] + search_index.to_chosung(norm[cut - 1]) if cut > 1 else search_index.to_chosung(norm[0]))
+        elif kind == 'chosung':
+            queries.append(search_index.to_chosung(norm[:cut]))
+        else:
+            queries.append(author[:rng.randint(1, len(author))])
+    return queries
+
+def bench_suggest(sizes, repeat):
+    """자동완성 색인의 생성 시간과 메모리, 입력 도중 검색어의 조회 지연(마이크로초)을 잽니다."""
+    rng = random.Random(11)
+    results = []
+    print(f"{'titles':>8} | {'build s':>7} | {'memory MB':>9} | {'keys':>8} | {'hot':>6} | {'p50 us':>7} | {'p95 us':>7} | {'max us':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            conn = generate_dataset(os.path.join(tmp, f'suggest_{size}.db'), size)
+            rows = conn.execute("SELECT title_id, title_text, author, status FROM webtoons").fetchall()
+            conn.close()
+            tracemalloc.start()
+            start = time.perf_counter()
+            index = suggest_index.SuggestIndex(rows)
+            build_sec = time.perf_counter() - start
+            memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+            tracemalloc.stop()
+
+            queries = _suggest_queries([(title, author) for _, title, author, _ in rows], rng, repeat)
+            for query in queries[:100]:
+                index.suggest(query)  # 워밍업
+            samples = []
+            for query in queries:
+                start = time.perf_counter()
+                index.suggest(query)
+                samples.append((time.perf_counter() - start) * 1e6)
+            latency = _percentiles(samples)
+            stats = index.stats()
+            print(f"{size:>8} | {build_sec:>7.2f} | {memory_mb:>9.1f} | {stats['keys']:>8} | {stats['hot_prefixes']:>6} | "
+                  f"{latency['p50']:>7.1f} | {latency['p95']:>7.1f} | {max(samples):>7.1f}")
+            results.append(dict(stats, titles=size, build_sec=build_sec, memory_mb=memory_mb,
+                                latency_us=dict(latency, max=max(samples))))
+    return results
+
+
+# --- 11. 메모리 카탈로그 벤치마크 ---
+def _encode_cursor(rowid):
+    """app.encode_cursor 와 같은 형식 (app 을 이 프로세스에 불러오지 않기 위해 따로 둡니다)"""
+    return base64.urlsafe_b64encode(f'r{rowid}'.encode()).decode().rstrip('=')
+
+def _rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+def _catalog_worker(path, catalog_mode, urls_by_endpoint):
+    """
+    새 프로세스에서 app 을 불러 한 가지 모드로 읽기 API 를 측정합니다. (모드끼리 메모리가 섞이지 않도록)
+    응답 캐시(payload_cache)를 매번 비워, 캐시 적중이 아니라 응답을 만드는 비용을 잽니다.
+    """
+    with _quiet():
+        import app as webapp
+    from db_pool import ReadConnectionPool
+
+    webapp.suggest_cache.wait()  # 시작할 때의 자동완성 색인 생성이 측정과 겹치지 않도록
+    webapp.db_pool.close_all()
+    webapp.db_pool = ReadConnectionPool(path)
+    webapp.payload_cache.clear()  # import 때 읽은 데이터 버전은 다른 DB 의 것이므로 새 DB 에서 다시 읽습니다.
+    webapp.api_limiter.enabled = False
+    webapp.catalog_cache.enabled = catalog_mode
+    client = webapp.app.test_client()
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    client.get('/api/webtoons/ongoing')  # 카탈로그 모드면 여기서 카탈로그를 읽습니다.
+    first_sec = time.perf_counter() - start
+
+    throughput = {}
+    for name, urls in urls_by_endpoint.items():
+        for url in urls[:20]:
+            client.get(url)  # 워밍업 (SQLite 페이지 캐시)
+        start = time.perf_counter()
+        for url in urls:
+            webapp.payload_cache.clear()
+            assert client.get(url).status_code == 200
+        throughput[name] = len(urls) / (time.perf_counter() - start)
+    return {'first_request_sec': first_sec, 'rss_mb': _rss_mb() - rss_before, 'req_per_sec': throughput}
+
+def bench_catalog(sizes, repeat):
+    """SQLite 경로와 메모리 카탈로그(CATALOG_MODE)의 읽기 API 처리량(요청/초)과 워커당 메모리 증가량을 비교합니다."""
+    rng = random.Random(13)
+    results = []
+    context = multiprocessing.get_context('spawn')
+    print(f"{'titles':>8} | {'mode':>7} | {'first s':>7} | {'RSS +MB':>7} | " + ' | '.join(f'{name:>11}' for name in ('search', 'ongoing', 'page', 'cursor')) + '  (req/s)')
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f'catalog_{size}.db')
+            with _quiet():
+                generate_dataset(path, size).close()
+            conn = sqlite3.connect(path)
+            completed_ids = [row[0] for row in conn.execute("SELECT title_id FROM webtoons WHERE status = '완결'")]
+            total_pages = max(math.ceil(len(completed_ids) / 100), 1)
+            urls_by_endpoint = {
+                'search': [f'/api/search?q={query}' for query in _sample_queries(conn, rng, repeat)],
+                'ongoing': ['/api/webtoons/ongoing'] * max(repeat // 10, 10),
+                'page': [f'/api/webtoons/completed?page={rng.randint(1, total_pages)}' for _ in range(repeat)],
+                'cursor': [f'/api/webtoons/completed?cursor={_encode_cursor(rng.choice(completed_ids))}' for _ in range(repeat)],
+            }
+            conn.close()
+            for mode in ('sqlite', 'catalog'):
+                with context.Pool(1) as pool:
+                    result = pool.apply(_catalog_worker, (path, mode == 'catalog', urls_by_endpoint))
+                rps = result['req_per_sec']
+                print(f"{size:>8} | {mode:>7} | {result['first_request_sec']:>7.3f} | {result['rss_mb']:>7.1f} | "
+                      + ' | '.join(f"{rps[name]:>11.0f}" for name in ('search', 'ongoing', 'page', 'cursor')))
+                results.append(dict(result, titles=size, mode=mode))
+    return results
+
+# --- 12. 데이터셋 내보내기/콜드 스타트 벤치마크 ---
+def _cold_start_worker(directory):
+    """새 프로세스에서 내보내기 파일만 있는 폴더로 이동해 app 을 불러오고, 첫 응답까지의 시간을 잽니다."""
+    os.chdir(directory)
+    start = time.perf_counter()
+    with _quiet():
+        import app as webapp
+    response = webapp.app.test_client().get('/api/webtoons/ongoing')
+    assert response.status_code == 200
+    return time.perf_counter() - start
+
+def bench_export(sizes, n_subscriptions):
+    """
+    DB 와 내보내기 파일(평문/gzip)의 크기, 내보내기·복원 시간, 같은 DB 를 두 번 내보냈을 때 바이트가 같은지,
+    webtoons.db 없이 내보내기 파일만으로 시작한 API 서버가 첫 응답을 하기까지의 시간을 측정합니다.
+    """
+    results = []
+    context = multiprocessing.get_context('spawn')
+    print(f"{'titles':>8} | {'DB MB':>6} | {'plain MB':>8} | {'gz MB':>6} | {'export s':>8} | {'gz s':>6} | {'same':>4} | {'restore s':>9} | {'cold s':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f'export_{size}.db')
+            with _quiet():
+                generate_dataset(path, size, n_subscriptions).close()
+            plain, again, packed = (os.path.join(tmp, name) for name in ('export.ndjson', 'again.ndjson', 'export.ndjson.gz'))
+            start = time.perf_counter()
+            dataset_export.export(path, plain)
+            export_sec = time.perf_counter() - start
+            start = time.perf_counter()
+            dataset_export.export(path, packed)
+            export_gz_sec = time.perf_counter() - start
+            dataset_export.export(path, again)
+            with open(plain, 'rb') as f1, open(again, 'rb') as f2:
+                deterministic = f1.read() == f2.read()
+
+            restored = os.path.join(tmp, f'restored_{size}.db')
+            start = time.perf_counter()
+            with _quiet():
+                dataset_export.restore(restored, plain)
+            restore_sec = time.perf_counter() - start
+
+            cold_dir = os.path.join(tmp, f'cold_{size}')
+            os.mkdir(cold_dir)
+            os.replace(plain, os.path.join(cold_dir, 'webtoons.ndjson'))
+            with context.Pool(1) as pool:
+                cold_sec = pool.apply(_cold_start_worker, (cold_dir,))
+
+            result = {
+                'titles': size, 'subscriptions': n_subscriptions,
+                'db_bytes': os.path.getsize(path), 'plain_bytes': os.path.getsize(os.path.join(cold_dir, 'webtoons.ndjson')),
+                'gzip_bytes': os.path.getsize(packed), 'export_sec': export_sec, 'export_gzip_sec': export_gz_sec,
+                'deterministic': deterministic, 'restore_sec': restore_sec, 'cold_start_sec': cold_sec,
+            }
+            print(f"{size:>8} | {result['db_bytes'] / 1e6:>6.1f} | {result['plain_bytes'] / 1e6:>8.1f} | {result['gzip_bytes'] / 1e6:>6.1f} | "
+                  f"{export_sec:>8.2f} | {export_gz_sec:>6.2f} | {'yes' if deterministic else 'NO':>4} | {restore_sec:>9.2f} | {cold_sec:>6.2f}")
+            results.append(result)
+    return results
+
+# --- 13. 실행 ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='웹툰 알리미 성능 측정')
+    parser.add_argument('--json', metavar='PATH', help='결과를 JSON 으로 저장할 경로 (- 이면 표준 출력)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search_parser = subparsers.add_parser('search', help='검색 API 의 색인 조회 지연 시간 측정')
+    search_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    search_parser.add_argument('--repeat', type=int, default=200)
+    search_parser.add_argument('--skip-legacy-above', type=int, default=300000, help='이 크기를 넘으면 기존 LIKE 스캔 측정을 생략')
+
+    api_parser = subparsers.add_parser('api', help='Flask test client 로 검색/연재/휴재·완결 목록 API 지연 시간 측정')
+    api_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    api_parser.add_argument('--repeat', type=int, default=100)
+    api_parser.add_argument('--subscriptions', type=int, default=0, help='데이터셋에 넣을 구독 수')
+
+    classify_parser = subparsers.add_parser('classify', help='fixture 응답으로 크롤러 수집·분류 시간 측정')
+    classify_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    classify_parser.add_argument('--repeat', type=int, default=20)
+
+    sync_parser = subparsers.add_parser('sync', help='DB 동기화(_synchronize_database) 시간 측정')
+    sync_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    sync_parser.add_argument('--change-ratio', type=float, default=0.01, help='상태가 바뀌는 웹툰 비율')
+    sync_parser.add_argument('--new-ratio', type=float, default=0.005, help='새로 추가되는 웹툰 비율')
+
+    notify_parser = subparsers.add_parser('notify', help='로컬 SMTP 대역 서버로 완결 알림 발송 처리량 측정')
+    notify_parser.add_argument('--subscribers', type=int, default=2000)
+    notify_parser.add_argument('--completed', type=int, default=20, help='새로 완결 처리할 웹툰 수')
+    notify_parser.add_argument('--pool-sizes', type=int, nargs='+', default=[1, 4, 8])
+    notify_parser.add_argument('--smtp-latency-ms', type=float, default=20.0)
+
+    fetch_parser = subparsers.add_parser('fetch', help='지연/오류/429 를 주입한 대역 서버로 크롤러 요청 제어 비교')
+    fetch_parser.add_argument('--titles', type=int, default=20000)
+    fetch_parser.add_argument('--max-concurrency', type=int, default=8)
+
+    limiter_parser = subparsers.add_parser('limiter', help='API 요청 속도 제한(토큰 버킷)의 요청당 비용 측정')
+    limiter_parser.add_argument('--clients', type=int, nargs='+', default=[1, 1000, 100000], help='서로 다른 클라이언트 IP 수')
+    limiter_parser.add_argument('--calls', type=int, default=200000)
+
+    suggest_parser = subparsers.add_parser('suggest', help='자동완성 색인의 생성 시간·메모리·조회 지연 측정')
+    suggest_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    suggest_parser.add_argument('--repeat', type=int, default=2000)
+
+    catalog_parser = subparsers.add_parser('catalog', help='메모리 카탈로그(CATALOG_MODE)와 SQLite 경로의 읽기 API 처리량·메모리 비교')
+    catalog_parser.add_argument('--sizes', type=int, nargs='+', default=[5000, 100000])
+    catalog_parser.add_argument('--repeat', type=int, default=500)
+
+    export_parser = subparsers.add_parser('export', help='데이터셋 내보내기 크기·결정성, 복원 시간, 내보내기 파일만으로 시작한 API 서버의 첫 응답 시간 측정')
+    export_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    export_parser.add_argument('--subscriptions', type=int, default=100000, help='데이터셋에 넣을 구독 수')
+
+    all_parser = subparsers.add_parser('all', help='모든 벤치마크를 기본값으로 실행')
+    all_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+
+    args = parser.parse_args()
+    results = {}
+    if args.command in ('search', 'all'):
+        results['search'] = bench_search(args.sizes, getattr(args, 'repeat', 200), getattr(args, 'skip_legacy_above', 300000))
+    if args.command in ('api', 'all'):
+        results['api'] = bench_api(args.sizes, getattr(args, 'repeat', 100), getattr(args, 'subscriptions', 0))
+    if args.command in ('classify', 'all'):
+        results['classify'] = bench_classify(args.sizes, getattr(args, 'repeat', 20))
+    if args.command in ('sync', 'all'):
+        results['sync'] = bench_sync(args.sizes, getattr(args, 'change_ratio', 0.01), getattr(args, 'new_ratio', 0.005))
+    if args.command in ('notify', 'all'):
+        results['notify'] = bench_notify(
+            getattr(args, 'subscribers', 2000), getattr(args, 'completed', 20),
+            getattr(args, 'pool_sizes', [1, 4, 8]), getattr(args, 'smtp_latency_ms', 20.0)
+        )
+
+    if args.command in ('fetch', 'all'):
+        results['fetch'] = bench_fetch(getattr(args, 'titles', 20000), getattr(args, 'max_concurrency', 8))
+    if args.command in ('limiter', 'all'):
+        results['limiter'] = bench_limiter(getattr(args, 'clients', [1, 1000, 100000]), getattr(args, 'calls', 200000))
+    if args.command in ('suggest', 'all'):
+        results['suggest'] = bench_suggest(args.sizes, getattr(args, 'repeat', 2000))
+    if args.command in ('catalog', 'all'):
+        results['catalog'] = bench_catalog(args.sizes, getattr(args, 'repeat', 500))
+    if args.command in ('export', 'all'):
+        results['export'] = bench_export(args.sizes, getattr(args, 'subscriptions', 100000))
+
+    if args.json:
+        report = {'meta': _run_metadata(), 'results': results}
+        if args.json == '-':
+            json.dump(report, sys.stdout, ensure_ascii=False, indent=1)
+            print()
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=1)
+            print(f"결과 저장: {args.json}")
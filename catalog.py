@@ -0,0 +1,169 @@
+# =====================================================================================
+#  파일: catalog.py (메모리 카탈로그) - v1.0
+#  - webtoons 테이블 전체를 워커마다 한 번 읽어 열(column) 배열로 보관하고, 상태별·요일별 위치 목록과
+#    검색용 n-gram 위치 목록을 미리 만들어 둡니다. 연재 목록, 휴재/완결 페이지, 검색 API 가
+#    SQLite 조회와 sqlite3.Row → dict 변환 없이 이 배열에서 바로 응답을 만듭니다.
+#  - 위치는 title_id(= rowid) 내림차순이므로 상태별 목록은 그대로 '최신 등록순' 이고,
+#    cursor 이어 읽기는 bisect 한 번으로 시작 위치를 찾습니다.
+#  - 응답 내용과 순서는 SQLite 경로(app.py, search_index.search)와 같습니다.
+#  - CATALOG_MODE=1 일 때만 사용합니다. app.py 는 데이터 버전이 바뀌면 카탈로그를 다시 읽습니다.
+#    (python benchmark.py catalog)
+# =====================================================================================
+
+import os
+import threading
+from array import array
+from bisect import bisect_right
+
+from search_index import _query_grams, is_chosung_query, ngrams, normalize, to_chosung
+
+ENABLED = os.getenv('CATALOG_MODE', '0') == '1'
+VALID_WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun', 'daily')
+
+
+class Catalog:
+    """(title_id, title_text, author, weekday, status) 행 전체를 담은 읽기 전용 카탈로그."""
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda row: row[0], reverse=True)
+        values = {}  # 상태·요일처럼 종류가 적은 문자열은 한 객체를 공유합니다.
+        self.ids = array('q', [row[0] for row in rows])
+        self.titles = [row[1] for row in rows]
+        self.authors = [row[2] for row in rows]
+        self.weekdays = [values.setdefault(row[3], row[3]) for row in rows]
+        self.statuses = [values.setdefault(row[4], row[4]) for row in rows]
+
+        self._by_status, self._by_weekday = {}, {}
+        for pos, (status, weekday) in enumerate(zip(self.statuses, self.weekdays)):
+            self._by_status.setdefault(status, array('I')).append(pos)
+            if weekday in VALID_WEEKDAYS:
+                self._by_weekday.setdefault(weekday, array('I')).append(pos)
+        # cursor(title_id) 위치 찾기용: 상태별 -title_id 오름차순
+        self._status_keys = {status: array('q', [-self.ids[pos] for pos in positions])
+                             for status, positions in self._by_status.items()}
+        for positions in self._by_weekday.values():
+            positions.reverse()  # 요일 탭은 SQLite 인덱스(weekday, title_id) 순서와 같은 title_id 오름차순
+
+        self._title_norm, self._author_norm, self._title_chosung = [], [], []
+        postings = {}
+        for pos, (title_text, author) in enumerate(zip(self.titles, self.authors)):
+            title_norm, author_norm = normalize(title_text), normalize(author)
+            title_chosung = to_chosung(title_norm)
+            self._title_norm.append(title_norm)
+            self._author_norm.append(author_norm)
+            self._title_chosung.append(title_chosung)
+            for gram in ngrams(title_norm) | ngrams(author_norm) | ngrams(title_chosung):
+                postings.setdefault(gram, []).append(pos)
+        # 위치 목록은 배열 하나에 이어 붙이고 gram 마다 (시작 << 32 | 끝) 정수 하나만 둡니다.
+        # (gram 마다 배열 객체를 두면 객체 오버헤드로 메모리가 몇 배가 됩니다)
+        self._postings = array('I')
+        self._grams = {}
+        for gram, positions in postings.items():
+            start = len(self._postings)
+            self._postings.extend(positions)
+            self._grams[gram] = start << 32 | len(self._postings)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, pos):
+        return {'title_id': self.ids[pos], 'title_text': self.titles[pos], 'author': self.authors[pos], 'status': self.statuses[pos]}
+
+    # --- 목록 ---
+    def ongoing(self):
+        """요일 값이 있는 웹툰을 요일별로 묶어 반환합니다. (app.py 의 연재 목록 응답과 같은 형태)"""
+        grouped = {}
+        for weekday in VALID_WEEKDAYS:
+            grouped[weekday] = [
+                {'title_id': self.ids[pos], 'title_text': self.titles[pos], 'author': self.authors[pos],
+                 'weekday': weekday, 'status': self.statuses[pos]}
+                for pos in self._by_weekday.get(weekday, ())
+            ]
+        return grouped
+
+    def by_status(self, status, limit, offset=0, before=None):
+        """상태별 목록을 최신 등록순으로 limit 개 반환합니다. before 를 주면 그 title_id 보다 오래된 것부터 시작합니다."""
+        positions = self._by_status.get(status)
+        if positions is None:
+            return []
+        start = bisect_right(self._status_keys[status], -before) if before is not None else offset
+        return [self._row(pos) for pos in positions[start:start + limit]]
+
+    def count(self, status):
+        positions = self._by_status.get(status)
+        return len(positions) if positions is not None else 0
+
+    def suggest_rows(self):
+        """자동완성 색인(suggest_index.SuggestIndex)에 넘길 (title_id, title_text, author, status) 행."""
+        return list(zip(self.ids, self.titles, self.authors, self.statuses))
+
+    # --- 검색 ---
+    def search(self, query, limit=100):
+        """search_index.search 와 같은 조건·순서로 검색합니다. (n-gram 후보 → 포함 여부 확인 → 순위 정렬)"""
+        query_norm = normalize(query)
+        if not query_norm:
+            return []
+        postings = []
+        for gram in _query_grams(query_norm):
+            span = self._grams.get(gram)
+            if span is None:
+                return []
+            postings.append(self._postings[span >> 32:span & 0xFFFFFFFF])
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for positions in postings[1:]:
+            candidates.intersection_update(positions)
+            if not candidates:
+                return []
+
+        chosung_only = is_chosung_query(query_norm)
+        ranked = []
+        for pos in candidates:
+            title_at = self._title_norm[pos].find(query_norm)
+            author_at = self._author_norm[pos].find(query_norm)
+            chosung_at = self._title_chosung[pos].find(query_norm)
+            if (chosung_only or (title_at < 0 and author_at < 0)) and chosung_at < 0:
+                continue
+            if title_at == 0:
+                rank = 0
+            elif title_at > 0:
+                rank = 1
+            elif author_at == 0:
+                rank = 2
+            elif author_at > 0:
+                rank = 3
+            else:
+                rank = 4 if chosung_at == 0 else 5
+            ranked.append((rank, pos))  # 같은 순위는 위치(= 최신 등록순) 순서
+        ranked.sort()
+        return [self._row(pos) for _, pos in ranked[:limit]]
+
+    def stats(self):
+        return {'titles': len(self.ids), 'grams': len(self._grams)}
+
+
+class CatalogCache:
+    """데이터 버전마다 한 번만 카탈로그를 읽습니다. enabled 가 False 이면 get() 은 None 을 반환합니다."""
+
+    def __init__(self, row_loader, enabled=ENABLED):
+        self._row_loader = row_loader
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._version = None
+        self._catalog = None
+
+    def get(self, version):
+        if not self.enabled:
+            return None
+        catalog = self._catalog
+        if catalog is not None and self._version == version:
+            return catalog
+        with self._lock:
+            if self._catalog is None or self._version != version:
+                self._catalog = Catalog(self._row_loader())
+                self._version = version
+            return self._catalog
+
+    def stats(self):
+        catalog = self._catalog
+        return {'enabled': self.enabled, 'version': self._version, **(catalog.stats() if catalog is not None else {})}
@@ -0,0 +1,104 @@
+# =====================================================================================
+#  파일: change_log.py (웹툰 변경 기록) - v1.0
+#  - 크롤러의 DB 동기화가 새로 추가하거나 바꾼 웹툰(상태·요일·제목/작가)을 webtoon_changes 테이블에
+#    한 줄씩 기록합니다. 각 줄은 계속 증가하는 version(AUTOINCREMENT)을 가집니다.
+#  - app.py 의 /api/changes?since=<version> 은 그 이후의 변경만 돌려주므로, 주기적으로 확인하는
+#    클라이언트와 중간 캐시는 전체 목록 대신 변경분(보통 수 KB)만 받습니다.
+#  - 오래된 기록은 RETENTION_DAYS 가 지나면 지웁니다. 클라이언트의 since 가 지워진 구간에 있으면
+#    reset 을 알려 전체 목록을 다시 받게 합니다.
+# =====================================================================================
+
+from datetime import datetime, timedelta
+
+RETENTION_DAYS = 90
+MAX_CHANGES_PER_RESPONSE = 1000
+
+NEW, STATUS, WEEKDAY, INFO = 'new', 'status', 'weekday', 'info'
+
+
+# --- 1. 테이블 생성 및 기록 (crawler.py) ---
+def create_tables(cursor):
+    """변경 기록 테이블이 없는 경우 생성합니다."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS webtoon_changes (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        title_id INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        title_text TEXT NOT NULL,
+        author TEXT,
+        weekday TEXT,
+        status TEXT NOT NULL,
+        old_weekday TEXT,
+        old_status TEXT,
+        changed_at TEXT NOT NULL
+    )""")
+    # 웹툰별 변경 이력 조회용 (since 조회는 version 기본 키로 충분합니다)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_webtoon_changes_title ON webtoon_changes (title_id, version)")
+
+def change_kind(old_row, new_row):
+    """webtoons 행 (title_text, author, weekday, status) 의 이전/새 값으로 변경 종류를 정합니다."""
+    if old_row is None:
+        return NEW
+    if old_row[3] != new_row[3]:
+        return STATUS
+    if old_row[2] != new_row[2]:
+        return WEEKDAY
+    return INFO
+
+def record(cursor, changes, now=None):
+    """
+    (title_id, 이전 행 또는 None, 새 행) 목록을 기록하고, 보존 기간이 지난 기록을 지웁니다.
+    호출자의 트랜잭션 안에서 실행되므로 webtoons 변경과 함께 커밋됩니다. 반환값: 기록한 줄 수
+    """
+    now = now or datetime.now()
+    changed_at = now.isoformat(timespec='seconds')
+    rows = []
+    for title_id, old_row, new_row in changes:
+        title_text, author, weekday, status = new_row
+        old_weekday, old_status = (old_row[2], old_row[3]) if old_row is not None else (None, None)
+        rows.append((title_id, change_kind(old_row, new_row), title_text, author, weekday, status, old_weekday, old_status, changed_at))
+    cursor.executemany("""
+    INSERT INTO webtoon_changes (title_id, kind, title_text, author, weekday, status, old_weekday, old_status, changed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", rows)
+    cutoff = (now - timedelta(days=RETENTION_DAYS)).isoformat(timespec='seconds')
+    cursor.execute("DELETE FROM webtoon_changes WHERE changed_at < ?", (cutoff,))
+    return len(rows)
+
+
+# --- 2. 변경분 조회 (app.py) ---
+def latest_version(conn):
+    """지금까지 기록된 가장 큰 version. (지워진 기록 포함, 기록이 없으면 0)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'webtoon_changes'").fetchone()
+    return row[0] if row else 0
+
+def changes_since(conn, since, limit=MAX_CHANGES_PER_RESPONSE):
+    """
+    since 다음 version 부터 최대 limit 개의 변경을 version 순서로 반환합니다.
+    since 가 보존 기간 밖이거나 서버보다 앞서 있으면(스냅샷 복원 등) reset=True 로 전체 목록을 다시 받게 합니다.
+    """
+    latest = latest_version(conn)
+    oldest = conn.execute("SELECT MIN(version) FROM webtoon_changes").fetchone()[0]
+    first_kept = oldest if oldest is not None else latest + 1
+    if since > latest or since < first_kept - 1:
+        return {'since': since, 'version': latest, 'latest': latest, 'reset': True, 'has_more': False, 'changes': []}
+
+    rows = conn.execute("""
+    SELECT version, title_id, kind, title_text, author, weekday, status, old_weekday, old_status, changed_at
+    FROM webtoon_changes WHERE version > ? ORDER BY version LIMIT ?""", (since, limit + 1)).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes = [
+        {
+            'version': version, 'title_id': title_id, 'kind': kind, 'title_text': title_text, 'author': author,
+            'weekday': weekday, 'status': status, 'old_weekday': old_weekday, 'old_status': old_status, 'changed_at': changed_at,
+        }
+        for version, title_id, kind, title_text, author, weekday, status, old_weekday, old_status, changed_at in rows
+    ]
+    return {
+        'since': since,
+        'version': changes[-1]['version'] if changes else latest,
+        'latest': latest,
+        'reset': False,
+        'has_more': has_more,
+        'changes': changes,
+    }
@@ -0,0 +1,225 @@
+# =====================================================================================
+#  파일: crawl_limiter.py (크롤러 요청 속도·동시성 제어) - v1.0
+#  - 호스트마다 토큰 버킷으로 초당 요청 수의 상한을 두고, 동시 요청 수는 AIMD 로 조절합니다.
+#    정상 응답이 오면 동시성을 조금씩 늘리고(가산 증가), 429/5xx·연결 오류·느린 응답이 오면
+#    절반으로 줄입니다(승산 감소). 상류 서버가 허용하는 만큼만 빠르게 수집합니다.
+#  - Retry-After 헤더(초 또는 HTTP 날짜)를 따르며, 그동안 같은 호스트로 가는 모든 요청을 멈춥니다.
+#    헤더 없이 429/503 이 오면 연속 횟수에 따라 지수적으로 늘어나는 시간만큼 멈춥니다.
+#  - 한 번의 수집(_fetch_all_naver_data) 안의 모든 요청이 하나의 CrawlLimiter 를 공유합니다.
+# =====================================================================================
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+RATE_PER_SEC = float(os.getenv('CRAWLER_RATE_PER_SEC', '10'))     # 호스트당 초당 요청 상한 (0 이면 제한 없음)
+BURST = int(os.getenv('CRAWLER_RATE_BURST', '10'))                 # 쉬고 난 뒤 한 번에 보낼 수 있는 요청 수
+MAX_CONCURRENCY = int(os.getenv('CRAWLER_MAX_CONCURRENCY', '8'))   # 호스트당 동시 요청 상한
+INITIAL_CONCURRENCY = 4
+SLOW_RESPONSE_SEC = 2.0      # 이보다 오래 걸린 응답은 과부하 신호로 봅니다.
+SLOW_RESPONSE_FACTOR = 4.0   # 평소 응답 시간(EWMA)의 이 배수를 넘어도 느린 응답으로 봅니다. (최소 SLOW_RESPONSE_FLOOR_SEC)
+SLOW_RESPONSE_FLOOR_SEC = 0.5
+THROTTLE_PAUSE_SEC = 1.0     # Retry-After 없이 429/503 을 받았을 때 처음 멈추는 시간
+MAX_PAUSE_SEC = 60.0         # Retry-After 가 이보다 길어도 이만큼만 기다립니다.
+THROTTLE_STATUSES = (429, 503)
+PROBE_SLOWDOWN = 4           # 직전에 제한을 받은 한도 근처에서는 가산 증가를 이만큼 느리게 합니다.
+
+
+def parse_retry_after(value, now=None):
+    """Retry-After 헤더 값(초 또는 HTTP 날짜)을 기다릴 초로 바꿉니다. 해석할 수 없으면 None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max((when - now).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """
+    예약 방식의 토큰 버킷. 토큰이 모자라면 미리 빌려 쓰고(잔량이 음수가 됨) 그만큼 기다릴 시간을 돌려주므로,
+    기다리는 요청들이 순서대로 1/rate 간격으로 나갑니다.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate, self.burst = rate, burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def reserve(self):
+        """토큰 하나를 예약하고, 보내기 전에 기다려야 할 초를 반환합니다."""
+        if not self.rate:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RequestOutcome:
+    """요청 한 번의 결과. _fetch_json 이 응답을 받으면 status 와 retry_after 를 채웁니다."""
+    __slots__ = ('status', 'retry_after')
+
+    def __init__(self):
+        self.status = None
+        self.retry_after = None
+
+
+class HostController:
+    """한 호스트에 대한 토큰 버킷, AIMD 동시성 한도, Retry-After 일시 정지 상태."""
+
+    def __init__(self, limiter):
+        self._limiter = limiter
+        self.bucket = TokenBucket(limiter.rate, limiter.burst)
+        self.limit = float(limiter.initial_concurrency if limiter.adaptive else limiter.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.latency = None          # 정상 응답 시간의 EWMA (초)
+        self._throttle_streak = 0
+        self._last_decrease = 0.0
+        self._ceiling = None         # 마지막으로 동시성을 줄이기 직전의 한도
+        self._slot_freed = asyncio.Condition()
+
+    async def acquire(self):
+        """동시성 한도 안의 자리를 얻고, 일시 정지와 토큰 버킷이 허용할 때까지 기다립니다."""
+        async with self._slot_freed:
+            await self._slot_freed.wait_for(lambda: self.in_flight < max(int(self.limit), 1))
+            self.in_flight += 1
+        self._limiter.peak_in_flight = max(self._limiter.peak_in_flight, self.in_flight)
+        try:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    self._limiter.stats['paused_sec'] += pause
+                    await asyncio.sleep(pause)
+                    continue
+                delay = self.bucket.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.paused_until <= time.monotonic():
+                    return
+        except BaseException:
+            await self._free_slot()
+            raise
+
+    async def release(self, outcome, elapsed):
+        """응답 결과로 동시성 한도와 일시 정지를 조정하고 자리를 돌려줍니다."""
+        try:
+            self._adjust(outcome, elapsed)
+        finally:
+            await self._free_slot()
+
+    async def _free_slot(self):
+        async with self._slot_freed:
+            self.in_flight -= 1
+            self._slot_freed.notify_all()
+
+    def _is_slow(self, elapsed):
+        threshold = SLOW_RESPONSE_SEC
+        if self.latency is not None:
+            threshold = min(threshold, max(SLOW_RESPONSE_FLOOR_SEC, self.latency * SLOW_RESPONSE_FACTOR))
+        return elapsed > threshold
+
+    def _adjust(self, outcome, elapsed):
+        stats = self._limiter.stats
+        status = outcome.status
+        if status in THROTTLE_STATUSES:
+            stats['throttled'] += 1
+            if time.monotonic() >= self.paused_until:
+                # 이미 멈춘 동안 도착한 429 는 같은 묶음에 대한 응답이므로 대기 시간을 더 늘리지 않습니다.
+                self._throttle_streak += 1
+            pause = outcome.retry_after
+            if pause is not None:
+                stats['retry_after'] += 1
+            else:
+                pause = THROTTLE_PAUSE_SEC * 2 ** (max(self._throttle_streak, 1) - 1)
+            self.paused_until = max(self.paused_until, time.monotonic() + min(pause, MAX_PAUSE_SEC))
+            self._decrease()
+        elif status is None or status >= 500:
+            self._decrease()
+        elif self._is_slow(elapsed):
+            stats['slow'] += 1
+            self._decrease()
+        else:
+            self._throttle_streak = 0
+            self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+            if self._limiter.adaptive:
+                # 가산 증가: 한도만큼의 요청이 모두 성공하면 한도가 1 늘어납니다.
+                step = 1 / self.limit
+                if self._ceiling is not None and self.limit + 1 > self._ceiling:
+                    step /= PROBE_SLOWDOWN
+                self.limit = min(self._limiter.max_concurrency, self.limit + step)
+
+    def _decrease(self):
+        if not self._limiter.adaptive:
+            return
+        # 동시에 보낸 요청들이 한꺼번에 실패해도 한 번만 줄이도록, 직전 감소 뒤 응답 한 번 시간 안에는 다시 줄이지 않습니다.
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency or SLOW_RESPONSE_FLOOR_SEC):
+            return
+        self._last_decrease = now
+        self._ceiling = self.limit
+        self.limit = max(1.0, self.limit / 2)
+        self._limiter.stats['backoffs'] += 1
+
+
+class CrawlLimiter:
+    """
+    호스트별 HostController 를 관리합니다. 요청은 `async with limiter.request(url) as outcome:` 안에서 보내고,
+    응답을 받으면 outcome.status / outcome.retry_after 를 채웁니다.
+    adaptive=False 이면 동시성을 max_concurrency 로 고정합니다. (Retry-After 와 429/503 일시 정지는 그대로 따릅니다)
+    """
+
+    def __init__(self, rate=RATE_PER_SEC, burst=BURST, max_concurrency=MAX_CONCURRENCY,
+                 initial_concurrency=INITIAL_CONCURRENCY, adaptive=True):
+        self.rate, self.burst = rate, burst
+        self.max_concurrency = max_concurrency
+        self.initial_concurrency = min(initial_concurrency, max_concurrency)
+        self.adaptive = adaptive
+        self.hosts = {}
+        self.peak_in_flight = 0
+        self.stats = {'throttled': 0, 'retry_after': 0, 'slow': 0, 'backoffs': 0, 'paused_sec': 0.0}
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        controller = self.hosts.get(host)
+        if controller is None:
+            controller = self.hosts[host] = HostController(self)
+        return controller
+
+    @asynccontextmanager
+    async def request(self, url):
+        controller = self._host(url)
+        await controller.acquire()
+        outcome = RequestOutcome()
+        start = time.perf_counter()
+        try:
+            yield outcome
+        finally:
+            await controller.release(outcome, time.perf_counter() - start)
+
+    def summary(self):
+        """실행 기록에 남길 카운터. (동시성 한도는 호스트 중 가장 낮은 값)"""
+        summary = {
+            'throttled': self.stats['throttled'],
+            'retry_after': self.stats['retry_after'],
+            'slow_responses': self.stats['slow'],
+            'concurrency_backoffs': self.stats['backoffs'],
+            'paused_sec': round(self.stats['paused_sec'], 2),
+            'peak_in_flight': self.peak_in_flight,
+        }
+        if self.hosts:
+            summary['final_concurrency'] = min(int(controller.limit) for controller in self.hosts.values())
+        return summary
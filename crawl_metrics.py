@@ -0,0 +1,141 @@
+# =====================================================================================
+#  파일: crawl_metrics.py (크롤러 실행 기록) - v1.1
+#  - 일일 점검의 단계별 소요 시간(수집/분류/알림/동기화 등), URL 별 지연 시간과 재시도 횟수,
+#    다운로드 바이트, 기록한 행 수, 메일 발송 속도를 하나의 실행 기록으로 모읍니다.
+#  - 요청 제어기(crawl_limiter.py)가 받은 429/503, Retry-After 대기, 동시성 조절 횟수도 함께 남깁니다.
+#  - 실행 기록은 crawl_runs 테이블에 쌓이고, 관리자 보고서에 최근 실행과 비교한 요약이 실립니다.
+# =====================================================================================
+
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+
+TREND_RUNS = 7  # 보고서에 함께 보여줄 최근 실행 수
+
+
+# --- 1. 테이블 생성 및 저장 ---
+def create_tables(cursor):
+    """실행 기록 테이블이 없는 경우 생성합니다."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS crawl_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        started_at TEXT NOT NULL,
+        status TEXT NOT NULL,
+        duration REAL NOT NULL,
+        stages TEXT NOT NULL,
+        counters TEXT NOT NULL,
+        requests TEXT NOT NULL,
+        error TEXT
+    )""")
+
+def save(conn, record):
+    """실행 기록 하나를 crawl_runs 에 추가합니다."""
+    conn.execute(
+        "INSERT INTO crawl_runs (started_at, status, duration, stages, counters, requests, error) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            record['started_at'], record['status'], record['duration'],
+            json.dumps(record['stages'], sort_keys=True), json.dumps(record['counters'], sort_keys=True),
+            json.dumps(record['requests'], ensure_ascii=False, sort_keys=True), record.get('error'),
+        )
+    )
+    conn.commit()
+
+def recent_runs(conn, limit=TREND_RUNS):
+    """최근 실행 기록을 최신순으로 반환합니다. (URL 별 상세는 제외)"""
+    rows = conn.execute(
+        "SELECT started_at, status, duration, stages, counters FROM crawl_runs ORDER BY id DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [
+        {'started_at': started_at, 'status': status, 'duration': duration, 'stages': json.loads(stages), 'counters': json.loads(counters)}
+        for started_at, status, duration, stages, counters in rows
+    ]
+
+
+# --- 2. 실행 중 수집 ---
+class RunMetrics:
+    """일일 점검 한 번의 단계별 시간과 카운터를 모읍니다."""
+
+    def __init__(self):
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.requests = {}
+
+    @contextmanager
+    def stage(self, name):
+        """with 블록의 실행 시간을 name 단계에 더합니다."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def incr(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_attempt(self, url, elapsed, status=None, size=0, error=None):
+        """HTTP 요청 한 번(재시도 포함 각 시도)의 결과를 기록합니다."""
+        parts = urlsplit(url)
+        key = f'{parts.path}?{parts.query}' if parts.query else parts.path
+        entry = self.requests.setdefault(key, {'attempts': 0, 'total_ms': 0.0})
+        entry['attempts'] += 1
+        entry['total_ms'] = round(entry['total_ms'] + elapsed * 1000, 1)
+        entry['last_ms'] = round(elapsed * 1000, 1)
+        entry['status'] = status
+        entry['bytes'] = size
+        if error is not None:
+            entry['error'] = error
+        else:
+            entry.pop('error', None)
+        self.incr('http_attempts')
+        self.incr('bytes_downloaded', size)
+        if status == 304:
+            self.incr('not_modified')
+
+    def finish(self, status, error=None):
+        """실행 기록(dict)을 완성합니다. URL 별 결과에서 요청 수·재시도·실패를 집계합니다."""
+        counters = dict(self.counters)
+        counters['requests'] = len(self.requests)
+        counters['retries'] = sum(entry['attempts'] - 1 for entry in self.requests.values())
+        counters['failed_requests'] = sum(1 for entry in self.requests.values() if 'error' in entry)
+        if counters.get('email_seconds'):
+            counters['emails_per_sec'] = round(counters.get('emails_sent', 0) / counters['email_seconds'], 1)
+        return {
+            'started_at': self.started_at,
+            'status': status,
+            'duration': time.perf_counter() - self._start,
+            'stages': {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            'counters': counters,
+            'requests': self.requests,
+            'error': error,
+        }
+
+
+# --- 3. 관리자 보고서용 요약 ---
+def _format_stages(stages):
+    return ', '.join(f'{name} {seconds:.2f}초' for name, seconds in stages.items()) or '없음'
+
+def summarize(record, previous_runs=()):
+    """관리자 보고서에 넣을 실행 기록 요약 문자열을 만듭니다."""
+    counters = record['counters']
+    lines = [
+        f"- 단계별 시간: {_format_stages(record['stages'])}",
+        f"- HTTP: 요청 {counters.get('requests', 0)}개 / 재시도 {counters.get('retries', 0)}회 / 실패 {counters.get('failed_requests', 0)}개"
+        f" / 304 응답 {counters.get('not_modified', 0)}개 / 다운로드 {counters.get('bytes_downloaded', 0) / 1024:.1f}KB",
+        f"- 요청 제어: 429/503 {counters.get('throttled', 0)}회 (Retry-After {counters.get('retry_after', 0)}회, 요청별 대기 합계 {counters.get('paused_sec', 0):.1f}초)"
+        f" / 느린 응답 {counters.get('slow_responses', 0)}회 / 동시성 감소 {counters.get('concurrency_backoffs', 0)}회"
+        f" / 최대 동시 요청 {counters.get('peak_in_flight', 0)}개 (종료 시 한도 {counters.get('final_concurrency', '-')})",
+        f"- DB 기록: 웹툰 {counters.get('rows_written', 0)}행 / 검색 색인 {counters.get('search_rows', 0)}개 / 발송함 {counters.get('outbox_rows', 0)}건",
+        f"- 메일: {counters.get('emails_sent', 0)}통 발송 (실패 {counters.get('emails_failed', 0)}통, 초당 {counters.get('emails_per_sec', 0)}통)",
+    ]
+    slowest = sorted(record['requests'].items(), key=lambda item: item[1]['total_ms'], reverse=True)[:3]
+    if slowest:
+        lines.append("- 가장 느린 URL: " + ', '.join(f"{key} {entry['total_ms']:.0f}ms ({entry['attempts']}회 시도)" for key, entry in slowest))
+    if previous_runs:
+        lines.append(f"\n[최근 {len(previous_runs)}회 실행 추이]")
+        for run in previous_runs:
+            lines.append(f"- {run['started_at']} {run['status']} {run['duration']:.1f}초 ({_format_stages(run['stages'])})")
+    return "\n".join(lines)
@@ -0,0 +1,145 @@
+# =====================================================================================
+#  파일: crawl_state.py (크롤러 단계별 진행 상태와 중간 결과) - v1.0
+#  - 일일 점검을 수집(fetch) → 분류(classify) → 동기화(sync) → 알림(notify) 단계로 나누고,
+#    단계마다 결과를 CRAWLER_STATE_DIR(.crawl_state) 에 저장합니다.
+#      run.json            : 실행 ID 와 단계별 상태(pending/running/done/failed), 단계 요약
+#      fetch.json.gz       : 요일별/완결 목록에서 받은 원본 레코드와 HTTP 캐시 검증자
+#      classify.json.gz    : 분류된 레코드와 '새로 완결된 웹툰' 목록 (동기화 전 DB 기준)
+#    알림 진행 상황은 DB 의 outbox 테이블(건별 커밋)에 남습니다.
+#  - 실패한 단계만 다시 실행하면 되므로, 예를 들어 SMTP 오류 뒤에는 `crawler.py notify --resume`
+#    으로 이미 받은 API 응답과 적용된 동기화를 그대로 두고 알림만 이어서 보냅니다.
+# =====================================================================================
+
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime
+
+STATE_DIR = os.getenv('CRAWLER_STATE_DIR', '.crawl_state')
+STAGES = ('fetch', 'classify', 'sync', 'notify')
+MANIFEST_FILE = 'run.json'
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+RESUME_MAX_AGE_HOURS = 12  # run --resume 이 이어 받을 수 있는 미완료 실행의 최대 나이
+
+
+class StageOrderError(Exception):
+    """앞 단계가 끝나지 않았거나, 다시 실행하면 결과가 어긋나는 단계를 실행하려 할 때 발생합니다."""
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class CrawlState:
+    """한 번의 일일 점검 실행(run)의 단계별 상태와 중간 결과 파일을 관리합니다."""
+
+    def __init__(self, state_dir=STATE_DIR):
+        self.state_dir = state_dir
+        self.manifest = None
+        path = os.path.join(state_dir, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+
+    # --- 실행 단위 ---
+    def start_new(self):
+        """이전 실행의 중간 결과를 지우고 새 실행을 시작합니다."""
+        if os.path.isdir(self.state_dir):
+            shutil.rmtree(self.state_dir)
+        os.makedirs(self.state_dir)
+        self.manifest = {
+            'run_id': datetime.now().strftime('%Y%m%d-%H%M%S'),
+            'started_at': _now(),
+            'stages': {stage: {'status': PENDING} for stage in STAGES},
+        }
+        self._save()
+
+    def is_finished(self):
+        return self.manifest is not None and all(self.status(stage) == DONE for stage in STAGES)
+
+    def can_resume(self, max_age_hours=RESUME_MAX_AGE_HOURS):
+        """끝나지 않은 최근 실행이 있으면 True."""
+        if self.manifest is None or self.is_finished():
+            return False
+        age = datetime.now() - datetime.fromisoformat(self.manifest['started_at'])
+        return age.total_seconds() <= max_age_hours * 3600
+
+    def status(self, stage):
+        return self.manifest['stages'][stage]['status'] if self.manifest else PENDING
+
+    def summary(self, stage):
+        return self.manifest['stages'][stage].get('summary', {}) if self.manifest else {}
+
+    # --- 단계 진행 ---
+    def begin(self, stage):
+        """
+        단계를 실행 중으로 표시합니다. 앞 단계가 모두 끝나 있어야 합니다.
+        동기화가 적용된 뒤에는 '새로 완결' 판단이 달라지므로 수집·분류를 다시 실행할 수 없습니다.
+        """
+        if self.manifest is None:
+            raise StageOrderError('진행 중인 실행이 없습니다. `crawler.py run` 으로 새 실행을 시작하세요.')
+        index = STAGES.index(stage)
+        missing = [previous for previous in STAGES[:index] if self.status(previous) != DONE]
+        if missing:
+            raise StageOrderError(f"'{stage}' 단계 전에 {missing} 단계를 먼저 끝내야 합니다.")
+        if index < STAGES.index('sync') and self.status('sync') == DONE:
+            raise StageOrderError(f"이미 동기화가 적용된 실행이므로 '{stage}' 단계를 다시 실행할 수 없습니다. `crawler.py run` 으로 새 실행을 시작하세요.")
+        # 이 단계의 결과가 바뀌므로 뒤 단계는 다시 실행해야 합니다.
+        for later in STAGES[index + 1:]:
+            self.manifest['stages'][later] = {'status': PENDING}
+        self.manifest['stages'][stage] = {'status': RUNNING, 'started_at': _now()}
+        self._save()
+
+    def complete(self, stage, summary):
+        entry = self.manifest['stages'][stage]
+        entry.update(status=DONE, finished_at=_now(), summary=summary)
+        entry.pop('error', None)
+        self._save()
+
+    def fail(self, stage, error):
+        entry = self.manifest['stages'][stage]
+        entry.update(status=FAILED, finished_at=_now(), error=error)
+        self._save()
+
+    # --- 중간 결과 파일 ---
+    def _artifact_path(self, stage):
+        return os.path.join(self.state_dir, f'{stage}.json.gz')
+
+    def write_artifact(self, stage, data):
+        """단계 결과를 gzip JSON 으로 원자적으로 저장합니다."""
+        path = self._artifact_path(stage)
+        tmp_path = f'{path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def read_artifact(self, stage):
+        path = self._artifact_path(stage)
+        if not os.path.exists(path):
+            raise StageOrderError(f"'{stage}' 단계의 결과 파일이 없습니다: {path}")
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = os.path.join(self.state_dir, MANIFEST_FILE)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    def describe(self):
+        """단계별 상태를 한 줄씩 설명합니다. (crawler.py status, 관리자 보고서)"""
+        if self.manifest is None:
+            return '저장된 실행이 없습니다.'
+        lines = [f"실행 {self.manifest['run_id']} (시작 {self.manifest['started_at']})"]
+        for stage in STAGES:
+            entry = self.manifest['stages'][stage]
+            line = f"- {stage}: {entry['status']}"
+            if entry.get('finished_at'):
+                line += f" ({entry['finished_at']})"
+            if entry.get('error'):
+                line += f" - {entry['error'].strip().splitlines()[-1]}"
+            lines.append(line)
+        return '\n'.join(lines)
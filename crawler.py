@@ -1,13 +1,19 @@
 # =====================================================================================
-#  파일: crawler.py (데이터 수집 및 완결 감지기) - v2.6
-#  - [데이터 정확성 강화] 데이터 분류 우선순위 로직을 도입하여, '요일별 목록'에 없는
-#    장기 휴재작(예: 화산귀환)이 누락되는 문제를 해결합니다.
-#  - [안정성 강화] 페이지네이션 로직을 유지하여 안정적인 데이터 수집 보장
+#  파일: crawler.py (데이터 수집 및 완결 감지기) - v2.22
+#  - [단계별 재실행] 일일 점검을 수집(fetch) → 분류(classify) → 동기화(sync) → 알림(notify) 단계로 나누고
+#    단계마다 결과를 저장합니다. `crawler.py notify --resume` 처럼 실패한 단계만 다시 실행할 수 있습니다.
+#    동기화가 알림보다 먼저 적용되며, 알림 대상은 분류 단계에서 저장한 목록을 씁니다. (crawl_state.py)
+#  - [스키마 버전] setup_database 가 테이블을 직접 만드는 대신 PRAGMA user_version 기준으로 번호가 매겨진
+#    마이그레이션을 적용합니다. 목록·요일 탭 조회용 커버링 인덱스가 첫 추가 단계입니다. (migrations.py)
+#  - [데이터 내보내기] 실행을 마칠 때마다 DB 를 정렬된 NDJSON 텍스트 파일로 내보내고, 워크플로는 바이너리 DB
+#    대신 이 파일을 커밋합니다. DB 가 없거나 파일보다 오래되었으면 시작할 때 파일에서 복원합니다. (dataset_export.py)
 # =====================================================================================
 
 # --- 1. 필요한 라이브러리 불러오기 ---
 import sqlite3
 import os
+import sys
+import argparse
 import smtplib
 from email.mime.text import MIMEText
 import requests
@@ -15,9 +21,23 @@ import time
 import random
 from datetime import datetime
 import traceback
+import math
+import json
 import asyncio
 import aiohttp
-from tenacity import retry, stop_after_attempt, wait_exponential
+import contextlib
+from tenacity import retry, wait_exponential
+import search_index
+import migrations
+from http_cache import HttpCache, FixtureServer
+import crawl_limiter
+import change_log
+import outbox
+import crawl_metrics
+from crawl_metrics import RunMetrics
+import snapshot
+import crawl_state
+import dataset_export
 
 # --- 2. 상수 및 기본 설정 ---
 DATABASE = 'webtoons.db'
@@ -25,100 +45,246 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36'
 }
 WEEKDAYS = {'mon': 'mon', 'tue': 'tue', 'wed': 'wed', 'thu': 'thu', 'fri': 'fri', 'sat': 'sat', 'sun': 'sun', 'daily': 'daily', 'dailyPlus': 'daily'}
+NAVER_API_BASE = os.getenv('NAVER_API_BASE', 'https://comic.naver.com')
+WEEKDAY_API_PATH = "/api/webtoon/titlelist/weekday?week={day}"
+FINISHED_API_PATH = "/api/webtoon/titlelist/finished?order=UPDATE&page={page}&pageSize=100"
+FINISHED_PAGE_CONCURRENCY = int(os.getenv('FINISHED_PAGE_CONCURRENCY', '5'))  # 전체 페이지 수를 모를 때 한 번에 요청할 완결 목록 페이지 수
+HTTP_MAX_ATTEMPTS = 3            # URL 별 최대 시도 횟수
+HTTP_THROTTLED_MAX_ATTEMPTS = 6  # 429/503 응답을 받은 경우의 최대 시도 횟수 (crawl_limiter.py 가 간격을 조절)
+# HTTP 모드: live(기본, 조건부 요청 캐시 사용) / record(응답을 fixture 로 녹화) / replay(녹화된 fixture 로 실행)
+HTTP_MODE = os.getenv('CRAWLER_HTTP_MODE', 'live')
+HTTP_CACHE_DIR = os.getenv('CRAWLER_HTTP_CACHE_DIR', '.http_cache')
+FIXTURE_DIR = os.getenv('CRAWLER_FIXTURE_DIR', 'fixtures/http')
+# SMTP 설정: 기본값은 Gmail. 로컬 대역 서버(aiosmtpd 등)로 측정할 때는 SMTP_HOST/PORT 와 SMTP_STARTTLS=0 사용
+SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '1') == '1'
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', '4'))      # 동시에 사용할 SMTP 세션 수
+SMTP_MAX_ATTEMPTS = int(os.getenv('SMTP_MAX_ATTEMPTS', '3'))  # 메시지별 최대 발송 시도 횟수
 
 
-# --- 3. 데이터베이스 초기 설정 함수 (변경 없음) ---
-def setup_database():
-    """데이터베이스와 테이블이 없는 경우 초기 설정"""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS webtoons (
-        title_id INTEGER PRIMARY KEY,
-        title_text TEXT NOT NULL,
-        author TEXT,
-        weekday TEXT,
-        status TEXT NOT NULL
-    )""")
-    
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS subscriptions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        email TEXT NOT NULL,
-        title_id INTEGER NOT NULL,
-        UNIQUE(email, title_id)
-    )""")
-    
-    conn.commit()
-    conn.close()
-
+# --- 3. 데이터베이스 초기 설정 함수 ---
+def setup_database(database=DATABASE):
+    """데이터베이스가 없으면 만들고, 스키마를 최신 버전으로 올립니다. (migrations.py)"""
+    conn = sqlite3.connect(database, timeout=migrations.BUSY_TIMEOUT_SEC)
+    try:
+        # 스냅샷 파일을 이름 교체로 배포하므로 WAL 이 아닌 기본(DELETE) 저널 모드를 사용합니다. (snapshot.py)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        migrations.apply(conn)
+    finally:
+        conn.close()
 
 # --- 4. 비동기 API 호출 및 데이터 수집 함수 ---
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
-async def _fetch_from_api(session, url):
-    """aiohttp 세션을 사용해 단일 API URL에서 데이터를 비동기적으로 가져옵니다."""
-    async with session.get(url, headers=HEADERS) as response:
-        response.raise_for_status()
-        data = await response.json()
-        return data.get('titleList', data.get('list', []))
-
-async def _fetch_paginated_finished_candidates(session):
+def _is_throttled(error):
+    return isinstance(error, aiohttp.ClientResponseError) and error.status in crawl_limiter.THROTTLE_STATUSES
+
+def _retry_stop(retry_state):
+    # 429/503 은 제어기가 Retry-After 만큼 멈춘 뒤 다시 보내므로 시도 횟수를 더 줍니다.
+    limit = HTTP_THROTTLED_MAX_ATTEMPTS if _is_throttled(retry_state.outcome.exception()) else HTTP_MAX_ATTEMPTS
+    return retry_state.attempt_number >= limit
+
+_backoff_wait = wait_exponential(multiplier=1, min=2, max=10)
+
+def _retry_wait(retry_state):
+    if _is_throttled(retry_state.outcome.exception()):
+        return 0  # 기다리는 시간은 호스트 제어기(Retry-After / 지수적 일시 정지)가 정합니다.
+    return _backoff_wait(retry_state)
+
+@retry(stop=_retry_stop, wait=_retry_wait, reraise=True)
+async def _fetch_json(session, url, http_cache=None, metrics=None, limiter=None):
+    """
+    aiohttp 세션을 사용해 단일 API URL의 JSON 응답 전체를 비동기적으로 가져옵니다.
+    http_cache 가 주어지면 조건부 요청을 보내고, 304 응답이면 저장된 본문을 사용합니다.
+    metrics 가 주어지면 시도(재시도 포함)마다 지연 시간·상태 코드·받은 바이트를 기록합니다.
+    limiter(CrawlLimiter)가 주어지면 시도마다 호스트별 속도·동시성 한도 안에서 보내고 응답 결과를 알려 줍니다.
+    """
+    headers = dict(HEADERS)
+    if http_cache is not None:
+        headers.update(http_cache.conditional_headers(url))
+    async with (limiter.request(url) if limiter is not None else contextlib.nullcontext(crawl_limiter.RequestOutcome())) as outcome:
+        start, size = time.perf_counter(), 0
+        try:
+            async with session.get(url, headers=headers) as response:
+                outcome.status = response.status
+                if response.status == 304 and http_cache is not None:
+                    body = http_cache.load_not_modified(url)
+                else:
+                    if response.status in crawl_limiter.THROTTLE_STATUSES:
+                        outcome.retry_after = crawl_limiter.parse_retry_after(response.headers.get('Retry-After'))
+                    response.raise_for_status()
+                    body = await response.read()
+                    size = len(body)
+                    if http_cache is not None:
+                        http_cache.store(url, body, response.headers)
+        except Exception as e:
+            if metrics is not None:
+                metrics.record_attempt(url, time.perf_counter() - start, outcome.status, size, error=str(e) or type(e).__name__)
+            raise
+        if metrics is not None:
+            metrics.record_attempt(url, time.perf_counter() - start, outcome.status, size)
+    return json.loads(body)
+
+class WebtoonRecord:
+    """
+    API 응답 항목에서 크롤러가 사용하는 필드만 남긴 레코드.
+    응답을 받는 즉시 이 형태로 바꿔, 원본 JSON dict 를 분류가 끝날 때까지 들고 있지 않습니다.
+    """
+    __slots__ = ('title_id', 'title_name', 'author', 'weekday', 'rest', 'status')
+
+    def __init__(self, title_id, title_name, author, weekday=None, rest=False, status=None):
+        self.title_id = title_id
+        self.title_name = title_name
+        self.author = author
+        self.weekday = weekday
+        self.rest = rest
+        self.status = status
+
+    @classmethod
+    def from_api(cls, item):
+        return cls(item['titleId'], item['titleName'], item['author'], item.get('weekday'), bool(item.get('rest', False)))
+
+    def db_row(self):
+        """webtoons 테이블의 (title_text, author, weekday, status) 값."""
+        return (self.title_name, self.author, self.weekday, self.status)
+
+    def to_row(self):
+        """단계별 중간 결과 파일(crawl_state.py)에 저장할 리스트."""
+        return [self.title_id, self.title_name, self.author, self.weekday, self.rest, self.status]
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+def _extract_title_list(data):
+    """API 응답에서 웹툰 목록을 꺼내 WebtoonRecord 목록으로 바꿉니다."""
+    return [WebtoonRecord.from_api(item) for item in data.get('titleList', data.get('list', []))]
+
+async def _fetch_from_api(session, url, http_cache=None, metrics=None, limiter=None):
+    """단일 API URL에서 웹툰 목록만 꺼내 WebtoonRecord 목록으로 반환합니다."""
+    return _extract_title_list(await _fetch_json(session, url, http_cache, metrics, limiter))
+
+def _total_pages(data):
+    """완결 API 응답의 pageInfo 에서 전체 페이지 수를 읽습니다. 정보가 없으면 None."""
+    page_info = data.get('pageInfo') or {}
+    if page_info.get('totalPages'):
+        return int(page_info['totalPages'])
+    if page_info.get('totalRows') and page_info.get('pageSize'):
+        return math.ceil(page_info['totalRows'] / page_info['pageSize'])
+    return None
+
+async def _fetch_paginated_finished_candidates(session, api_base=NAVER_API_BASE, http_cache=None, concurrency=FINISHED_PAGE_CONCURRENCY, metrics=None, limiter=None):
     """
     완결 API를 페이지네이션하여 '완결 및 장기 휴재 후보군' 데이터를 수집합니다.
+    첫 페이지 응답에서 전체 페이지 수를 확인한 뒤 나머지 페이지를 한꺼번에 요청합니다.
+    실제 동시 요청 수는 limiter(CrawlLimiter)가 서버 응답에 맞춰 조절하며, 없으면 최대 concurrency 개로 고정됩니다.
+    반환값: (titleId -> WebtoonRecord, 실패한 페이지 번호 -> 오류 메시지)
     """
-    all_candidates = {}
-    page = 1
-    MAX_PAGES = 20 # 과도한 요청을 방지하기 위한 안전 장치
+    pages, failed_pages = {}, {}
+    if limiter is None:
+        limiter = crawl_limiter.CrawlLimiter(max_concurrency=concurrency, adaptive=False)
 
-    print("\n'완결/장기 휴재 후보' 목록 확보를 위해 페이지네이션 수집 시작...")
-    while page <= MAX_PAGES:
-        try:
-            api_url = f"https://comic.naver.com/api/webtoon/titlelist/finished?order=UPDATE&page={page}&pageSize=100"
-            webtoons_on_page = await _fetch_from_api(session, api_url)
+    print(f"\n'완결/장기 휴재 후보' 목록 확보를 위해 페이지네이션 수집 시작... (동시 요청 최대 {limiter.max_concurrency}개)")
+    try:
+        first_page = await _fetch_json(session, api_base + FINISHED_API_PATH.format(page=1), http_cache, metrics, limiter)
+    except Exception as e:
+        print(f"  -> 1 페이지 수집 중 오류 발생: {e}")
+        return {}, {1: str(e)}
+    pages[1] = _extract_title_list(first_page)
+    total_pages = _total_pages(first_page)
 
-            if not webtoons_on_page:
-                print(f"  -> {page-1} 페이지에서 수집 종료 (데이터 없음).")
-                break
+    async def fetch_page(page):
+        return await _fetch_from_api(session, api_base + FINISHED_API_PATH.format(page=page), http_cache, metrics, limiter)
+
+    async def fetch_pages(page_numbers):
+        results = await asyncio.gather(*(fetch_page(page) for page in page_numbers), return_exceptions=True)
+        for page, result in zip(page_numbers, results):
+            if isinstance(result, Exception):
+                failed_pages[page] = str(result)
+                print(f"  -> {page} 페이지 수집 중 오류 발생: {result}")
+            else:
+                pages[page] = result
 
-            for webtoon in webtoons_on_page:
-                if webtoon['titleId'] not in all_candidates:
-                    all_candidates[webtoon['titleId']] = webtoon
-            
-            print(f"  -> {page} 페이지 수집 완료. (현재 후보군: {len(all_candidates)}개)")
-            page += 1
-            await asyncio.sleep(0.1)
+    if total_pages is not None:
+        print(f"  -> 전체 {total_pages} 페이지 확인.")
+        await fetch_pages(list(range(2, total_pages + 1)))
+    elif pages[1]:
+        # 전체 페이지 수를 알 수 없으면, 빈 페이지가 나올 때까지 concurrency 개씩 묶어서 요청합니다.
+        next_page = 2
+        while True:
+            batch = list(range(next_page, next_page + concurrency))
+            await fetch_pages(batch)
+            if any(page in pages and not pages[page] for page in batch) or all(page in failed_pages for page in batch):
+                break
+            next_page += concurrency
 
-        except Exception as e:
-            print(f"  -> {page} 페이지 수집 중 오류 발생: {e}")
-            break
-            
-    if page > MAX_PAGES:
-        print(f"  -> 최대 {MAX_PAGES} 페이지까지 수집하여 종료합니다.")
+    # 페이지 순서대로 병합하여, 여러 페이지에 걸친 웹툰은 앞 페이지의 데이터를 사용합니다.
+    all_candidates = {}
+    for page in sorted(pages):
+        for record in pages[page]:
+            if record.title_id not in all_candidates:
+                all_candidates[record.title_id] = record
 
-    return all_candidates
+    print(f"  -> {len(pages)} 페이지 수집 완료. (후보군: {len(all_candidates)}개, 실패: {len(failed_pages)} 페이지)")
+    return all_candidates, failed_pages
 
 
-async def _fetch_all_naver_data():
-    """모든 웹툰 데이터를 수집하고 상태를 결정합니다."""
+async def _fetch_sources(api_base=NAVER_API_BASE, http_cache=None, metrics=None, limiter=None):
+    """
+    요일별 목록(1순위)과 완결/장기 휴재 후보 목록(2순위)을 수집합니다. 분류는 하지 않습니다.
+    모든 요청은 하나의 limiter(CrawlLimiter, 기본값은 새로 만든 제어기)를 공유합니다.
+    반환값: (요일별 레코드 목록 또는 Exception 의 리스트, titleId -> 후보 레코드, 실패한 페이지 -> 오류)
+    """
+    metrics = metrics or RunMetrics()
+    limiter = limiter or crawl_limiter.CrawlLimiter()
     print("네이버 웹툰 서버에서 오늘의 최신 데이터를 가져옵니다...")
     async with aiohttp.ClientSession() as session:
         # 1. 연재/휴재 웹툰 API 병렬 호출 (1순위 데이터 소스)
         ongoing_tasks = []
         for api_day in WEEKDAYS.keys():
-            api_url = f"https://comic.naver.com/api/webtoon/titlelist/weekday?week={api_day}"
-            ongoing_tasks.append(_fetch_from_api(session, api_url))
-        
+            api_url = api_base + WEEKDAY_API_PATH.format(day=api_day)
+            ongoing_tasks.append(_fetch_from_api(session, api_url, http_cache, metrics, limiter))
+
         ongoing_results = await asyncio.gather(*ongoing_tasks, return_exceptions=True)
 
         # 2. 완결/장기 휴재 후보군 목록을 페이지네이션으로 수집 (2순위 데이터 소스)
-        finished_candidates = await _fetch_paginated_finished_candidates(session)
+        finished_candidates, failed_pages = await _fetch_paginated_finished_candidates(session, api_base, http_cache, metrics=metrics, limiter=limiter)
+    for name, value in limiter.summary().items():
+        metrics.incr(name, value)
+    return ongoing_results, finished_candidates, failed_pages
 
+def _report_unchanged(http_cache):
+    """http_cache 기준으로 지난 동기화 이후 바뀐 응답이 하나도 없으면 True 를 반환합니다."""
+    if http_cache is None:
+        return False
+    if http_cache.nothing_changed():
+        print(f"\n지난 동기화 이후 변경된 API 응답이 없습니다. ({len(http_cache.unchanged_urls)}개 URL 모두 동일) 분류를 건너뜁니다.")
+        return True
+    print(f"\nAPI 응답 변경: {len(http_cache.changed_urls)}개 URL / 동일: {len(http_cache.unchanged_urls)}개 URL")
+    return False
+
+async def _fetch_all_naver_data(api_base=NAVER_API_BASE, http_cache=None, metrics=None, limiter=None):
+    """
+    모든 웹툰 데이터를 수집하고 상태를 결정합니다. (benchmark.py 가 수집+분류를 한 번에 잴 때 사용)
+    http_cache 기준으로 지난 동기화 이후 바뀐 응답이 하나도 없으면 분류를 건너뛰고 None 을 반환합니다.
+    metrics 가 주어지면 수집(fetch)과 분류(classify) 단계의 시간을 기록합니다.
+    """
+    metrics = metrics or RunMetrics()
+    with metrics.stage('fetch'):
+        ongoing_results, finished_candidates, failed_pages = await _fetch_sources(api_base, http_cache, metrics, limiter)
+    if _report_unchanged(http_cache):
+        return None
+    with metrics.stage('classify'):
+        return _classify_webtoons(ongoing_results, finished_candidates, failed_pages)
+
+def _classify_webtoons(ongoing_results, finished_candidates, failed_pages):
+    """
+    요일별 목록(1순위)과 완결/장기 휴재 후보 목록(2순위)을 우선순위에 따라 연재/휴재/완결로 분류합니다.
+    ongoing_results 는 WEEKDAYS 순서의 요일별 WebtoonRecord 목록(실패한 요일은 Exception)입니다.
+    반환값: titleId -> WebtoonRecord (status 에 '연재중' / '휴재' / '완결' 이 채워짐)
+    """
     # 3. [핵심 로직] 우선순위에 따라 데이터 분류
     print("\n--- 데이터 수집 결과 ---")
-    naver_ongoing_today = {}
-    naver_hiatus_today = {}
-    naver_finished_today = {}
+    records = {}
     
     # 3-1. (1순위) 요일별 목록 처리
     api_days = list(WEEKDAYS.keys())
@@ -128,87 +294,119 @@ async def _fetch_all_naver_data():
             print(f"❌ '{day_key}'요일 데이터 수집 실패: {result}")
             continue
         
-        ongoing_count = sum(1 for w in result if not w.get('rest', False))
-        rest_count = sum(1 for w in result if w.get('rest', False))
+        ongoing_count = sum(1 for record in result if not record.rest)
+        rest_count = len(result) - ongoing_count
         print(f"✅ '{day_key}'요일: 연재 {ongoing_count}개 / 휴재 {rest_count}개")
 
-        for webtoon in result:
-            webtoon['normalized_weekday'] = WEEKDAYS[day_key]
-            if webtoon.get('rest', False):
-                naver_hiatus_today[webtoon['titleId']] = webtoon
-            else:
-                naver_ongoing_today[webtoon['titleId']] = webtoon
+        for record in result:
+            record.weekday = WEEKDAYS[day_key]
+            record.status = '휴재' if record.rest else '연재중'
+            existing = records.get(record.title_id)
+            # 어느 요일에서든 연재 중이면 다른 요일의 휴재 표시보다 우선합니다.
+            if existing is not None and existing.status == '연재중' and record.status == '휴재':
+                continue
+            records[record.title_id] = record
 
     # 3-2. (2순위) 완결/장기 휴재 후보 목록 처리
     print(f"✅ 완결/휴재 후보 목록(페이지네이션): {len(finished_candidates)}개")
-    for tid, data in finished_candidates.items():
+    if failed_pages:
+        print(f"⚠️ 완결 목록 {len(failed_pages)}개 페이지 수집 실패: {sorted(failed_pages)} (해당 페이지의 웹툰은 오늘 갱신되지 않습니다)")
+    for tid, record in finished_candidates.items():
         # 이미 1순위에서 분류되었다면 건너뜀
-        if tid in naver_ongoing_today or tid in naver_hiatus_today:
+        if tid in records:
             continue
         
-        # 1순위 목록에 없는 웹툰만 휴재 또는 완결로 분류
-        if data.get('rest', False):
-            naver_hiatus_today[tid] = data # 장기 휴재
-        else:
-            naver_finished_today[tid] = data # 진짜 완결
+        # 1순위 목록에 없는 웹툰만 휴재(장기 휴재) 또는 완결(진짜 완결)로 분류
+        record.status = '휴재' if record.rest else '완결'
+        records[tid] = record
     
-    print(f"  -> 최종 연재: {len(naver_ongoing_today)}개")
-    print(f"  -> 최종 휴재 (단기+장기): {len(naver_hiatus_today)}개")
-    print(f"  -> 최종 완결: {len(naver_finished_today)}개")
-    
-    # 모든 데이터를 병합
-    all_naver_webtoons_today = {**naver_finished_today, **naver_hiatus_today, **naver_ongoing_today}
+    status_counts = {'연재중': 0, '휴재': 0, '완결': 0}
+    for record in records.values():
+        status_counts[record.status] += 1
+    print(f"  -> 최종 연재: {status_counts['연재중']}개")
+    print(f"  -> 최종 휴재 (단기+장기): {status_counts['휴재']}개")
+    print(f"  -> 최종 완결: {status_counts['완결']}개")
     print("------------------------")
-    print(f"오늘자 데이터 수집 완료: 총 {len(all_naver_webtoons_today)}개 고유 웹툰 확인")
+    print(f"오늘자 데이터 수집 완료: 총 {len(records)}개 고유 웹툰 확인")
     
-    return naver_ongoing_today, naver_hiatus_today, naver_finished_today, all_naver_webtoons_today
+    return records
 
 
-# --- 5. 데이터베이스 동기화 함수 ---
-def _synchronize_database(conn, all_naver_webtoons_today, naver_ongoing_today, naver_hiatus_today, naver_finished_today):
-    print("\nDB를 오늘의 최신 상태로 전체 동기화를 시작합니다...")
+def _synchronize_database(conn, records):
+    """
+    오늘 수집한 데이터와 DB의 기존 행을 비교하여, 새로 생기거나 바뀐 웹툰만 한 트랜잭션으로 기록합니다.
+    바뀐 내용은 같은 트랜잭션에서 webtoon_changes 에도 남깁니다. (change_log.py, /api/changes)
+    완결에서 다시 연재/휴재로 바뀐 웹툰은 알림 기록을 지워, 다음에 완결되면 다시 알리게 합니다. (outbox.reset_titles)
+    변경이 없는 날에는 DB 파일이 전혀 바뀌지 않습니다.
+    반환값: {'new': 신규 수, 'changed': 변경 수, 'unchanged': 변경 없음 수, 'indexed': 갱신한 검색 색인 수,
+             'reopened': 완결이 풀린 웹툰 수}
+    """
+    print("\nDB를 오늘의 최신 상태로 동기화합니다. (변경분만 기록)")
     cursor = conn.cursor()
-    cursor.execute("SELECT title_id FROM webtoons")
-    db_existing_ids = {row[0] for row in cursor.fetchall()}
-    updates, inserts = [], []
-
-    for title_id, webtoon_data in all_naver_webtoons_today.items():
-        status = ''
-        # [핵심 로직] 새로운 기준에 따라 상태 결정
-        if title_id in naver_ongoing_today:
-            status = '연재중'
-        elif title_id in naver_hiatus_today:
-            status = '휴재'
-        elif title_id in naver_finished_today:
-            status = '완결'
-        else: 
+    cursor.execute("SELECT title_id, title_text, author, weekday, status FROM webtoons")
+    db_rows = {row[0]: row[1:] for row in cursor.fetchall()}
+    upserts, changes = [], []
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'indexed': 0, 'reopened': 0}
+
+    for title_id, record in records.items():
+        row = record.db_row()
+        existing = db_rows.get(title_id)
+        if existing == row:
+            counts['unchanged'] += 1
             continue
+        counts['new' if existing is None else 'changed'] += 1
+        upserts.append((title_id, *row))
+        changes.append((title_id, existing, row))
 
-        weekday_to_save = webtoon_data.get('normalized_weekday', webtoon_data.get('weekday'))
-        record = (webtoon_data['titleName'], webtoon_data['author'], weekday_to_save, status, title_id)
-        
-        if title_id in db_existing_ids: 
-            updates.append(record)
-        else: 
-            inserts.append((title_id, webtoon_data['titleName'], webtoon_data['author'], weekday_to_save, status))
-
-    if updates:
-        cursor.executemany("UPDATE webtoons SET title_text = ?, author = ?, weekday = ?, status = ? WHERE title_id = ?", updates)
-        print(f"{len(updates)}개 웹툰 정보 업데이트 완료.")
-    if inserts:
-        cursor.executemany("INSERT INTO webtoons (title_id, title_text, author, weekday, status) VALUES (?, ?, ?, ?, ?)", inserts)
-        print(f"{len(inserts)}개 신규 웹툰 DB 추가 완료.")
+    if upserts:
+        # WHERE 절은 같은 값으로 덮어쓰는 쓰기를 한 번 더 막아주는 안전장치입니다.
+        cursor.executemany("""
+        INSERT INTO webtoons (title_id, title_text, author, weekday, status) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(title_id) DO UPDATE SET
+            title_text = excluded.title_text, author = excluded.author,
+            weekday = excluded.weekday, status = excluded.status
+        WHERE (webtoons.title_text, webtoons.author, webtoons.weekday, webtoons.status)
+              IS NOT (excluded.title_text, excluded.author, excluded.weekday, excluded.status)
+        """, upserts)
+        counts['indexed'] = search_index.refresh(cursor, [row[0] for row in upserts])
+        print(f"검색 색인 갱신 완료: {counts['indexed']}개 웹툰")
+        change_log.record(cursor, changes)
+        # db_row 의 마지막 열이 status 입니다.
+        reopened = [title_id for title_id, existing, row in changes if existing is not None and existing[-1] == '완결' and row[-1] != '완결']
+        if reopened:
+            counts['reopened'] = len(reopened)
+            cleared = outbox.reset_titles(cursor, reopened)
+            print(f"완결이 풀린 웹툰 {len(reopened)}개의 알림 기록 {cleared}건을 지웠습니다. (다시 완결되면 다시 알림)")
+        cursor.execute("""
+        INSERT INTO dataset_meta (key, value) VALUES ('dataset_version', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1""")
     conn.commit()
-    print("DB 동기화 완료.")
-    return len(inserts)
+    print(f"DB 동기화 완료: 신규 {counts['new']}개 / 변경 {counts['changed']}개 / 변경 없음 {counts['unchanged']}개")
+    return counts
 
 
-# --- 6. 이메일 발송 함수들 (변경 없음) ---
-def send_email(recipient_email, subject, body, smtp_server=None):
+# --- 6. 이메일 발송 함수들 ---
+def _smtp_credentials():
+    """발송자 계정을 읽습니다. 로컬 대역 서버(SMTP_STARTTLS=0)에는 비밀번호가 없어도 됩니다."""
     sender_email = os.getenv('EMAIL_ADDRESS')
     sender_password = os.getenv('EMAIL_PASSWORD')
-    if not sender_email or not sender_password:
+    if not sender_email or (SMTP_STARTTLS and not sender_password):
         print("오류: 이메일 발송을 위한 환경 변수가 설정되지 않았습니다.")
+        return None, None
+    return sender_email, sender_password
+
+def _open_smtp_session(sender_email, sender_password):
+    """설정된 SMTP 서버에 접속하여 로그인까지 마친 세션을 반환합니다."""
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+    if SMTP_STARTTLS:
+        server.starttls()
+    if sender_password:
+        server.login(sender_email, sender_password)
+    return server
+
+def send_email(recipient_email, subject, body, smtp_server=None):
+    sender_email, sender_password = _smtp_credentials()
+    if not sender_email:
         return False
     msg = MIMEText(body, _charset='utf-8')
     msg['Subject'] = subject
@@ -216,9 +414,7 @@ def send_email(recipient_email, subject, body, smtp_server=None):
     msg['To'] = recipient_email
     try:
         if smtp_server is None:
-            with smtplib.SMTP('smtp.gmail.com', 587) as server:
-                server.starttls()
-                server.login(sender_email, sender_password)
+            with _open_smtp_session(sender_email, sender_password) as server:
                 server.sendmail(sender_email, recipient_email, msg.as_string())
         else:
             smtp_server.sendmail(sender_email, recipient_email, msg.as_string())
@@ -227,38 +423,88 @@ def send_email(recipient_email, subject, body, smtp_server=None):
         print(f"오류: {recipient_email}에게 이메일 발송 실패 - {e}")
         return False
 
-def send_completion_notifications(cursor, newly_completed_ids, all_naver_webtoons_today):
-    if not newly_completed_ids:
+def _completion_message(title_text):
+    subject = f"웹툰 완결 알림: '{title_text}'가 완결되었습니다!"
+    body = f"안녕하세요! 웹툰 완결 알리미입니다.\n\n회원님께서 구독하신 웹툰 '{title_text}'가 완결되었습니다.\n지금 바로 정주행을 시작해보세요!\n\n감사합니다."
+    return subject, body
+
+def _completion_digest(title_texts):
+    """한 구독자가 구독한 웹툰 여러 개가 같은 날 완결되었을 때 보내는 묶음 메일. (하나뿐이면 일반 알림 메일)"""
+    if len(title_texts) == 1:
+        return _completion_message(title_texts[0])
+    subject = f"웹툰 완결 알림: '{title_texts[0]}' 외 {len(title_texts) - 1}개 웹툰이 완결되었습니다!"
+    title_lines = "\n".join(f"- {title_text}" for title_text in title_texts)
+    body = f"안녕하세요! 웹툰 완결 알리미입니다.\n\n회원님께서 구독하신 웹툰 {len(title_texts)}개가 완결되었습니다.\n\n{title_lines}\n\n지금 바로 정주행을 시작해보세요!\n\n감사합니다."
+    return subject, body
+
+def _title_text(records, title_id):
+    record = records.get(title_id)
+    return record.title_name if record is not None else f'ID {title_id}'
+
+def send_completion_notifications(conn, newly_completed_ids, records, metrics=None):
+    """
+    새로 완결된 웹툰의 구독자 알림을 발송함(outbox)에 넣은 뒤, SMTP 세션 풀로 발송합니다.
+    구독자는 한 번의 쿼리로 모두 조회하며, 한 사람에게는 완결된 웹툰을 모두 담은 메일 한 통만 보냅니다.
+    이전 실행에서 보내지 못한 대기 알림도 함께 발송하며, 이미 보낸 알림은 다시 보내지 않습니다.
+    """
+    cursor = conn.cursor()
+    completed_details = []
+    if newly_completed_ids:
+        print(f"\n🔥 새로운 완결 웹툰 {len(newly_completed_ids)}개 발견! 알림을 발송함에 등록합니다.")
+        completed_ids = sorted(newly_completed_ids)
+        placeholders = ','.join('?' * len(completed_ids))
+        # idx_subscriptions_title (title_id, email) 인덱스만으로 처리되는 단일 조회
+        cursor.execute(f"SELECT title_id, email FROM subscriptions WHERE title_id IN ({placeholders}) ORDER BY email", completed_ids)
+        subscriptions = cursor.fetchall()
+
+        messages, subscriber_counts = [], {}
+        for title_id, email in subscriptions:
+            title_text = _title_text(records, title_id)
+            messages.append((email, title_id, *_completion_message(title_text)))
+            subscriber_counts[title_id] = subscriber_counts.get(title_id, 0) + 1
+        for title_id in completed_ids:
+            title_text = _title_text(records, title_id)
+            print(f"--- '{title_text}'(ID:{title_id}) 완결 알림 발송 대상: {subscriber_counts.get(title_id, 0)}명 ---")
+        queued = outbox.enqueue(conn, messages)
+        if metrics is not None:
+            metrics.incr('outbox_rows', queued)
+        recipients = len({email for _, email in subscriptions})
+        print(f"발송함 등록: {queued}건, 수신자 {recipients}명 (이미 등록된 알림 {len(messages) - queued}건 제외)")
+    else:
         print("\n새롭게 완결된 웹툰이 없습니다.")
-        return [], 0
-    print(f"\n🔥 새로운 완결 웹툰 {len(newly_completed_ids)}개 발견! 알림 발송을 시작합니다.")
-    completed_details, total_notified_users = [], 0
-    sender_email = os.getenv('EMAIL_ADDRESS')
-    sender_password = os.getenv('EMAIL_PASSWORD')
-    if not sender_email or not sender_password:
-        print("오류: 이메일 발송을 위한 환경 변수가 설정되지 않았습니다.")
-        return [], 0
-    try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as smtp_server:
-            smtp_server.starttls()
-            smtp_server.login(sender_email, sender_password)
-            for title_id in newly_completed_ids:
-                title_text = all_naver_webtoons_today.get(title_id, {}).get('titleName', f'ID {title_id}')
-                cursor.execute("SELECT email FROM subscriptions WHERE title_id = ?", (title_id,))
-                subscribers = [row[0] for row in cursor.fetchall()]
-                print(f"--- '{title_text}'(ID:{title_id}) 완결 알림 발송 대상: {len(subscribers)}명 ---")
-                if not subscribers:
-                    completed_details.append(f"- '{title_text}' (ID:{title_id}) : 구독자 없음")
-                    continue
-                subject = f"웹툰 완결 알림: '{title_text}'가 완결되었습니다!"
-                body = f"안녕하세요! 웹툰 완결 알리미입니다.\n\n회원님께서 구독하신 웹툰 '{title_text}'가 완결되었습니다.\n지금 바로 정주행을 시작해보세요!\n\n감사합니다."
-                for email in subscribers:
-                    send_email(email, subject, body, smtp_server)
-                total_notified_users += len(subscribers)
-                completed_details.append(f"- '{title_text}' (ID:{title_id}) : {len(subscribers)}명에게 알림 발송")
-    except Exception as e:
-        print(f"❌ 이메일 서버 연결 또는 발송 중 심각한 오류 발생: {e}")
-    return completed_details, total_notified_users
+
+    cursor.execute("SELECT COUNT(*) FROM outbox WHERE status = ?", (outbox.PENDING,))
+    pending_count = cursor.fetchone()[0]
+    delivery = {'sent': 0, 'failed': 0, 'notifications': 0, 'elapsed': 0.0}
+    if pending_count:
+        sender_email, sender_password = _smtp_credentials()
+        if sender_email:
+            print(f"대기 중인 알림 {pending_count}건을 수신자별로 묶어 SMTP 세션 {SMTP_POOL_SIZE}개로 발송합니다...")
+            delivery = outbox.deliver(
+                conn, lambda: _open_smtp_session(sender_email, sender_password), sender_email, _completion_digest,
+                workers=SMTP_POOL_SIZE, max_attempts=SMTP_MAX_ATTEMPTS
+            )
+            rate = delivery['sent'] / delivery['elapsed'] if delivery['elapsed'] else 0
+            if metrics is not None:
+                metrics.incr('emails_sent', delivery['sent'])
+                metrics.incr('emails_failed', delivery['failed'])
+                metrics.incr('email_seconds', delivery['elapsed'])
+            print(f"알림 발송 완료: 메일 {delivery['sent']}통 (알림 {delivery['notifications']}건) / 실패 {delivery['failed']}통 ({delivery['elapsed']:.2f}초, {rate:.1f}통/초)")
+
+    summary = outbox.count_by_status(conn, newly_completed_ids) if newly_completed_ids else {}
+    for title_id in sorted(newly_completed_ids):
+        title_text = _title_text(records, title_id)
+        counts = summary.get(title_id)
+        if not counts:
+            completed_details.append(f"- '{title_text}' (ID:{title_id}) : 구독자 없음")
+            continue
+        detail = f"- '{title_text}' (ID:{title_id}) : {counts.get(outbox.SENT, 0)}명에게 알림 발송"
+        if counts.get(outbox.FAILED) or counts.get(outbox.PENDING):
+            detail += f" (실패 {counts.get(outbox.FAILED, 0)}명, 대기 {counts.get(outbox.PENDING, 0)}명)"
+        completed_details.append(detail)
+    if delivery['failed']:
+        completed_details.append(f"- 발송 실패 메일 {delivery['failed']}통은 outbox 테이블에 'failed' 상태로 남아 있습니다.")
+    return completed_details, delivery['sent']
 
 def send_admin_report(report_data):
     admin_email = os.getenv('ADMIN_EMAIL')
@@ -268,51 +514,257 @@ def send_admin_report(report_data):
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     if report_data['status'] == '성공':
         subject = f"✅ [성공] 웹툰 알리미 일일 보고서 ({now})"
-        body = f"안녕하세요, 관리자님.\n웹툰 알리미 자동화 작업이 성공적으로 완료되었습니다.\n\n- 작업 시간: {now}\n- 실행 시간: {report_data['duration']:.2f}초\n- 신규 DB 등록 웹툰: {report_data.get('new_webtoons', 0)}개\n- 총 알림 발송 인원: {report_data.get('total_notified', 0)}명\n\n[금일 완결 처리 및 알림 발송 내역]\n"
+        body = f"안녕하세요, 관리자님.\n웹툰 알리미 자동화 작업이 성공적으로 완료되었습니다.\n\n- 작업 시간: {now}\n- 실행 시간: {report_data['duration']:.2f}초\n- 신규 DB 등록 웹툰: {report_data.get('new_webtoons', 0)}개\n- 정보 변경 웹툰: {report_data.get('changed_webtoons', 0)}개 (변경 없음: {report_data.get('unchanged_webtoons', 0)}개)\n- 총 알림 발송 인원: {report_data.get('total_notified', 0)}명\n\n[금일 완결 처리 및 알림 발송 내역]\n"
         body += "\n".join(report_data['completed_details']) if report_data['completed_details'] else "없음"
     else:
         subject = f"❌ [실패] 웹툰 알리미 자동화 작업 오류 보고서 ({now})"
         body = f"안녕하세요, 관리자님.\n웹툰 알리미 자동화 작업 중 오류가 발생했습니다.\n\n- 작업 시간: {now}\n- 오류 내용:\n{report_data['error_message']}\n\nGitHub Actions 로그를 확인해주세요."
+    if report_data.get('stages'):
+        body += f"\n\n[단계별 진행]\n{report_data['stages']}"
+    if report_data.get('run_summary'):
+        body += f"\n\n[실행 기록]\n{report_data['run_summary']}"
     send_email(admin_email, subject, body)
 
 
-# --- 7. 메인 실행 함수 ---
-async def run_daily_check(conn):
-    cursor = conn.cursor()
-    print("=== 일일 웹툰 상태 점검 시작 ===")
-    cursor.execute("SELECT title_id, status FROM webtoons")
-    db_state_before_sync = {row[0]: row[1] for row in cursor.fetchall()}
+# --- 7. 단계별 실행 함수 (수집 → 분류 → 동기화 → 알림, 결과는 crawl_state.py 에 저장) ---
+async def _fetch_with_http_mode(mode, metrics):
+    """HTTP 모드에 맞게 캐시/녹화/재생 환경을 구성한 뒤 수집합니다. 반환값: (수집 결과, HttpCache 또는 None)"""
+    if mode == 'replay':
+        # 녹화된 fixture 를 로컬 대역 서버로 제공하여 네트워크 없이 실행합니다. (조건부 캐시는 사용하지 않음)
+        async with FixtureServer(FIXTURE_DIR) as base_url:
+            print(f"[replay] {FIXTURE_DIR} 의 녹화 응답으로 실행합니다. ({base_url})")
+            return await _fetch_sources(base_url, metrics=metrics), None
+    record_dir = FIXTURE_DIR if mode == 'record' else None
+    http_cache = HttpCache(HTTP_CACHE_DIR, record_dir=record_dir)
+    return await _fetch_sources(http_cache=http_cache, metrics=metrics), http_cache
+
+def fetch_stage(state, metrics, mode=HTTP_MODE):
+    """
+    요일별/완결 목록을 받아 원본 레코드를 저장합니다. 이후 단계는 네트워크 없이 이 결과만 사용합니다.
+    HTTP 캐시의 새 검증자는 동기화가 끝난 뒤에 저장하도록 함께 넘깁니다.
+    """
+    with metrics.stage('fetch'):
+        (ongoing_results, finished_candidates, failed_pages), http_cache = asyncio.run(_fetch_with_http_mode(mode, metrics))
+    unchanged = _report_unchanged(http_cache)
+    state.write_artifact('fetch', {
+        'unchanged': unchanged,
+        'ongoing': [{'error': str(result)} if isinstance(result, Exception) else [record.to_row() for record in result] for result in ongoing_results],
+        'finished': [record.to_row() for record in finished_candidates.values()],
+        'failed_pages': {str(page): error for page, error in failed_pages.items()},
+        'http_cache': http_cache.pending_index() if http_cache is not None else None,
+    })
+    return {
+        'unchanged': unchanged,
+        'failed_weekdays': sum(1 for result in ongoing_results if isinstance(result, Exception)),
+        'finished_candidates': len(finished_candidates),
+        'failed_pages': len(failed_pages),
+    }
+
+def _load_db_statuses(database=DATABASE):
+    """운영 DB 의 titleId -> 상태를 읽기 전용으로 읽습니다. DB 가 아직 없으면 빈 dict."""
+    if not os.path.exists(database):
+        return {}
+    conn = sqlite3.connect(f'file:{database}?mode=ro', uri=True)
+    try:
+        return {row[0]: row[1] for row in conn.execute("SELECT title_id, status FROM webtoons")}
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+
+def classify_stage(state, metrics):
+    """
+    수집 결과를 분류하고, 동기화 전 운영 DB 와 비교해 '새로 완결된 웹툰'을 정합니다.
+    이 목록을 저장해 두므로 동기화가 먼저 적용된 뒤에도 알림 단계가 같은 대상에게 보낼 수 있습니다.
+    """
+    fetched = state.read_artifact('fetch')
+    if fetched['unchanged']:
+        state.write_artifact('classify', {'unchanged': True})
+        return {'unchanged': True}
+    with metrics.stage('load_state'):
+        db_state_before_sync = _load_db_statuses()
     print(f"어제자 DB 상태 기준: 총 {len(db_state_before_sync)}개 웹툰")
-    
-    naver_ongoing_today, naver_hiatus_today, naver_finished_today, all_naver_webtoons_today = await _fetch_all_naver_data()
-    
-    # [핵심 로직] 완결 감지 로직 수정
-    newly_completed_ids = {
+
+    with metrics.stage('classify'):
+        ongoing_results = [
+            Exception(result['error']) if isinstance(result, dict) else [WebtoonRecord.from_row(row) for row in result]
+            for result in fetched['ongoing']
+        ]
+        finished_candidates = {row[0]: WebtoonRecord.from_row(row) for row in fetched['finished']}
+        failed_pages = {int(page): error for page, error in fetched['failed_pages'].items()}
+        records = _classify_webtoons(ongoing_results, finished_candidates, failed_pages)
+    # [핵심 로직] 어제 연재/휴재였던 웹툰이 오늘 완결로 분류되면 새로 완결된 것으로 봅니다.
+    newly_completed_ids = sorted(
         title_id for title_id, status in db_state_before_sync.items()
-        if status in ('연재중', '휴재') 
-        and title_id in naver_finished_today
-    }
-    
-    completed_details, total_notified_users = send_completion_notifications(cursor, newly_completed_ids, all_naver_webtoons_today)
-    newly_added_to_db = _synchronize_database(conn, all_naver_webtoons_today, naver_ongoing_today, naver_hiatus_today, naver_finished_today)
-    print("\n=== 일일 점검 완료 ===")
-    return newly_added_to_db, completed_details, total_notified_users
+        if status in ('연재중', '휴재')
+        and title_id in records and records[title_id].status == '완결'
+    )
+    state.write_artifact('classify', {
+        'unchanged': False,
+        'records': [record.to_row() for record in records.values()],
+        'newly_completed': newly_completed_ids,
+    })
+    return {'unchanged': False, 'records': len(records), 'newly_completed': len(newly_completed_ids)}
+
+def sync_stage(state, metrics):
+    """
+    분류 결과를 운영 DB 복사본에 동기화한 뒤 검증하고 한 번에 교체합니다. (snapshot.py)
+    교체가 끝난 뒤에만 이번 응답을 다음 실행의 비교 기준(HTTP 캐시)으로 저장합니다.
+    """
+    classified = state.read_artifact('classify')
+    if classified['unchanged']:
+        print("\n변경된 API 응답이 없어 DB 동기화를 건너뜁니다.")
+        return {'new': 0, 'changed': 0, 'unchanged': len(_load_db_statuses()), 'indexed': 0}
+    records = {row[0]: WebtoonRecord.from_row(row) for row in classified['records']}
+
+    with metrics.stage('sync'):
+        # 운영 DB 복사본에서 작업한 뒤 마지막에 한 번에 교체합니다. 실패하면 운영 DB 는 그대로입니다.
+        snapshot_file, baseline = snapshot.prepare(DATABASE)
+        try:
+            setup_database(snapshot_file)
+            conn = sqlite3.connect(snapshot_file)
+            try:
+                sync_counts = _synchronize_database(conn, records)
+            finally:
+                conn.close()
+            version = snapshot.publish(snapshot_file, DATABASE, baseline)
+        except BaseException:
+            snapshot.discard(snapshot_file)
+            raise
+    print(f"스냅샷 v{version} 교체 완료: {DATABASE}")
+    metrics.incr('rows_written', sync_counts['new'] + sync_counts['changed'])
+    metrics.incr('search_rows', sync_counts['indexed'])
+
+    pending = state.read_artifact('fetch')['http_cache']
+    if pending is not None:
+        HttpCache(HTTP_CACHE_DIR).commit(pending)
+    return dict(sync_counts, snapshot_version=version)
+
+def notify_stage(state, metrics):
+    """
+    분류 단계에서 정한 새로 완결된 웹툰의 구독자에게 운영 DB 의 발송함(outbox)으로 알림을 보냅니다.
+    발송 결과는 건마다 커밋되므로, 다시 실행하면 보내지 못한 알림(실패 포함)만 보냅니다.
+    """
+    classified = state.read_artifact('classify')
+    newly_completed_ids = set(classified.get('newly_completed', ()))
+    records = {row[0]: WebtoonRecord.from_row(row) for row in classified.get('records', ()) if row[0] in newly_completed_ids}
+    setup_database(DATABASE)
+    conn = sqlite3.connect(DATABASE, timeout=snapshot.BUSY_TIMEOUT_SEC)
+    try:
+        requeued = outbox.requeue_failed(conn, newly_completed_ids)
+        if requeued:
+            print(f"이전 시도에서 발송에 실패한 알림 {requeued}건을 다시 보냅니다.")
+        with metrics.stage('notify'):
+            completed_details, total_notified = send_completion_notifications(conn, newly_completed_ids, records, metrics)
+        failed = sum(counts.get(outbox.FAILED, 0) for counts in outbox.count_by_status(conn, newly_completed_ids).values())
+    finally:
+        conn.close()
+    if failed:
+        raise RuntimeError(f"알림 {failed}건을 보내지 못했습니다. `crawler.py notify --resume` 으로 실패한 알림만 다시 보낼 수 있습니다.")
+    return {'completed_details': completed_details, 'total_notified': total_notified}
+
+STAGE_FUNCTIONS = {'fetch': fetch_stage, 'classify': classify_stage, 'sync': sync_stage, 'notify': notify_stage}
+
+def run_stage(state, stage, metrics, resume=False):
+    """단계 하나를 실행하고 결과를 기록합니다. resume 이면 이미 끝난 단계는 건너뜁니다."""
+    if resume and state.status(stage) == crawl_state.DONE:
+        print(f"\n[{stage}] 이미 완료된 단계이므로 건너뜁니다.")
+        return state.summary(stage)
+    state.begin(stage)
+    print(f"\n=== [{stage}] 단계 시작 (실행 {state.manifest['run_id']}) ===")
+    try:
+        summary = STAGE_FUNCTIONS[stage](state, metrics)
+    except BaseException:
+        state.fail(stage, traceback.format_exc())
+        raise
+    state.complete(stage, summary)
+    return summary
 
 
 # --- 8. 메인 실행 블록 ---
-if __name__ == '__main__':
+def _save_run_record(record, database=DATABASE):
+    """실행 기록을 crawl_runs 에 추가하고, 보고서용 요약(최근 실행 추이 포함)을 반환합니다."""
+    previous_runs = []
+    if not os.path.exists(database):
+        print("경고: 운영 DB 가 아직 없어 실행 기록을 저장하지 않습니다.")
+        return crawl_metrics.summarize(record, previous_runs)
+    try:
+        conn = sqlite3.connect(database, timeout=snapshot.BUSY_TIMEOUT_SEC)
+        try:
+            previous_runs = crawl_metrics.recent_runs(conn)
+            crawl_metrics.save(conn, record)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"경고: 실행 기록 저장 실패 - {e}")
+    return crawl_metrics.summarize(record, previous_runs)
+
+def _restore_from_export(database=DATABASE):
+    """체크아웃에 DB 가 없거나 내보내기 파일보다 오래되었으면 내보내기 파일로 DB 를 만듭니다."""
+    restored = dataset_export.restore_if_stale(database)
+    if restored is not None:
+        meta, counts, elapsed = restored
+        print(f"{dataset_export.EXPORT_PATH} 에서 DB 복원 (데이터 버전 {meta['dataset_version']}, {elapsed:.2f}초): {counts}")
+
+def _write_export(database=DATABASE):
+    """실행 결과(동기화·알림 발송 현황·실행 기록)를 내보내기 파일에 씁니다. 실패한 실행도 진행된 만큼 남깁니다."""
+    if not os.path.exists(database):
+        return
+    try:
+        counts = dataset_export.export(database)
+        print(f"{dataset_export.EXPORT_PATH} 저장 ({os.path.getsize(dataset_export.EXPORT_PATH):,} bytes): {counts}")
+    except (sqlite3.Error, OSError) as e:
+        print(f"경고: 데이터 내보내기 실패 - {e}")
+
+def _stages_to_run(state, command, resume):
+    """명령에 따라 실행할 단계 목록을 정합니다. run/fetch 는 이어 받을 실행이 없으면 새 실행을 시작합니다."""
+    if command in ('run', 'fetch') and not (resume and state.can_resume()):
+        state.start_new()
+        print(f"새 실행을 시작합니다: {state.manifest['run_id']}")
+    elif resume:
+        print(f"실행 {state.manifest['run_id'] if state.manifest else '-'} 을(를) 이어서 진행합니다.")
+    return list(crawl_state.STAGES) if command == 'run' else [command]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='네이버 웹툰 일일 점검 (수집 → 분류 → 동기화 → 알림)')
+    parser.add_argument('command', nargs='?', default='run', choices=('run', *crawl_state.STAGES, 'status'),
+                        help='run: 모든 단계 실행 (기본값) / fetch·classify·sync·notify: 한 단계만 실행 / status: 진행 상태 출력')
+    parser.add_argument('--resume', action='store_true', help='끝나지 않은 최근 실행을 이어서 진행하고, 이미 완료된 단계는 건너뜁니다.')
+    args = parser.parse_args(argv)
+    state = crawl_state.CrawlState()
+    if args.command == 'status':
+        print(state.describe())
+        return 0
+
     start_time = time.time()
     report = {'status': '성공'}
+    metrics = RunMetrics()
+    restored = False  # 복원에 실패한 DB(내보내기 파일보다 오래된 DB)로 파일을 덮어쓰지 않도록 합니다.
     try:
-        setup_database()
-        conn = sqlite3.connect(DATABASE)
-        new_webtoons, completed_details, total_notified = asyncio.run(run_daily_check(conn))
-        report.update({'new_webtoons': new_webtoons, 'completed_details': completed_details, 'total_notified': total_notified})
-        conn.close()
+        _restore_from_export()
+        restored = True
+        for stage in _stages_to_run(state, args.command, args.resume):
+            run_stage(state, stage, metrics, resume=args.resume or args.command == 'run')
+        print("\n=== 일일 점검 완료 ===")
     except Exception as e:
         print(f"치명적 오류 발생: {e}")
         report['status'] = '실패'
         report['error_message'] = traceback.format_exc()
     finally:
-        report['duration'] = time.time() - start_time
+        sync_summary = state.summary('sync') if state.status('sync') == crawl_state.DONE else {}
+        notify_summary = state.summary('notify') if state.status('notify') == crawl_state.DONE else {}
+        report.update({
+            'new_webtoons': sync_summary.get('new', 0), 'changed_webtoons': sync_summary.get('changed', 0),
+            'unchanged_webtoons': sync_summary.get('unchanged', 0),
+            'completed_details': notify_summary.get('completed_details', []), 'total_notified': notify_summary.get('total_notified', 0),
+            'stages': state.describe(), 'duration': time.time() - start_time,
+        })
+        record = metrics.finish(report['status'], report.get('error_message'))
+        report['run_summary'] = _save_run_record(record)
+        if restored:
+            _write_export()
         send_admin_report(report)
+    return 0 if report['status'] == '성공' else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,277 @@
+# =====================================================================================
+#  파일: dataset_export.py (데이터셋 내보내기/복원) - v1.0
+#  - 저장소에는 바이너리 webtoons.db 대신, 크롤러가 실행마다 만드는 정렬된 NDJSON 텍스트
+#    webtoons.ndjson 을 커밋합니다. 같은 데이터면 바이트까지 같은 파일이 나오고(정렬, 고정 JSON 형식),
+#    바뀐 행만 diff 에 나타납니다.
+#  - 파일을 직접 압축하지 않는 이유: git 은 객체를 zlib 으로 압축하고 이전 버전과의 차이(delta)만 저장하지만,
+#    gzip 파일은 몇 줄만 바뀌어도 거의 전체가 달라져 매번 통째로 쌓입니다. (15일 이력 기준 팩 크기
+#    평문 0.6MB / gzip 8.9MB) 다른 용도로 압축본이 필요하면 DATASET_EXPORT 를 .gz 경로로 지정합니다.
+#    (gzip 헤더의 시각을 0 으로 고정하므로 압축본도 같은 데이터면 같은 바이트입니다)
+#  - 담는 것: 웹툰, 구독, 변경 기록(/api/changes), 최근 실행 기록(관리자 보고서의 추이에 쓰는 TREND_RUNS 개),
+#    알림 발송 장부(outbox 의 (이메일, 웹툰 ID, 상태) - 보낸 알림도 남겨야 복원 뒤 같은 알림을 다시
+#    보내지 않습니다. 완결이 풀린 웹툰의 기록은 동기화 단계가 지우므로 다시 완결되면 다시 알립니다),
+#    데이터 버전과 AUTOINCREMENT 순번.
+#  - 공개 저장소에 커밋되므로 복원에 필요 없는 것은 담지 않습니다: 알림 제목/본문(보낼 때 웹툰 제목으로
+#    다시 만듭니다), SMTP 오류 메시지, 실행 기록의 URL 별 상세. 검색 색인과 상태별 카운터는 복원할 때 다시 만듭니다.
+#  - 형식: 첫 줄은 메타 정보, 이후 테이블마다 {"table": 이름, "columns": [...]} 줄과 행 배열 줄들.
+#      {"dataset_version":12,"format":1,"schema":2,"sequences":{...}}
+#      {"columns":["title_id","title_text","author","weekday","status"],"table":"webtoons"}
+#      [650000,"제목","작가","mon","연재중"]
+#  - 복원(restore)은 마이그레이션으로 만든 빈 DB 에 행을 넣은 뒤 snapshot.publish 로 운영 DB 자리에
+#    교체하므로, 교체 직전까지 API 서버가 받은 구독도 합쳐집니다.
+#      python dataset_export.py export   : webtoons.db → webtoons.ndjson
+#      python dataset_export.py restore  : webtoons.ndjson → webtoons.db
+# =====================================================================================
+
+import argparse
+import fcntl
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import crawl_metrics
+import migrations
+import search_index
+import snapshot
+
+DATABASE = 'webtoons.db'
+EXPORT_PATH = os.getenv('DATASET_EXPORT', 'webtoons.ndjson')   # .gz 로 끝나면 gzip 으로 압축합니다.
+FORMAT_VERSION = 1
+IMPORT_SUFFIX = '.import'
+
+# (테이블, 열, 정렬, 조건) - 정렬은 파일이 항상 같은 순서가 되도록 기본 키 또는 유일 키 기준입니다.
+TABLES = (
+    ('webtoons', ('title_id', 'title_text', 'author', 'weekday', 'status'), 'title_id', ''),
+    ('subscriptions', ('email', 'title_id'), 'title_id, email', ''),
+    ('webtoon_changes', ('version', 'title_id', 'kind', 'title_text', 'author', 'weekday', 'status',
+                         'old_weekday', 'old_status', 'changed_at'), 'version', ''),
+    # 보고서 추이에 쓰는 최근 실행만 남깁니다. (실행마다 한 줄씩 파일이 계속 커지지 않도록)
+    ('crawl_runs', ('id', 'started_at', 'status', 'duration', 'stages', 'counters', 'error'), 'id',
+     f"WHERE id IN (SELECT id FROM crawl_runs ORDER BY id DESC LIMIT {crawl_metrics.TREND_RUNS})"),
+    # 보낸 알림도 남겨야 복원한 DB 에서 outbox.enqueue 가 UNIQUE(email, title_id) 로 중복 발송을 막습니다.
+    # 장부는 이번 완결에 대한 기록만 담습니다. (완결이 풀리면 동기화 단계가 지웁니다 - outbox.reset_titles)
+    ('outbox', ('id', 'email', 'title_id', 'status', 'attempts', 'created_at', 'sent_at'), 'id', ''),
+)
+SEQUENCE_TABLES = ('webtoon_changes', 'crawl_runs', 'outbox')
+# 내보내지 않는 NOT NULL 열에 복원할 때 넣는 값. (이전 형식 파일에 이 열이 있으면 그 값을 씁니다)
+RESTORE_DEFAULTS = {
+    'crawl_runs': {'requests': '{}'},
+    'outbox': {'subject': '', 'body': '', 'last_error': None},  # 빈 본문은 발송할 때 다시 만듭니다. (outbox.py)
+}
+
+
+class ExportFormatError(Exception):
+    """내보내기 파일의 형식이나 스키마 버전을 이 코드가 읽을 수 없을 때 발생합니다."""
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+def _is_compressed(path):
+    return path.endswith('.gz')
+
+def _reader(path):
+    return gzip.open(path, 'rt', encoding='utf-8') if _is_compressed(path) else open(path, encoding='utf-8')
+
+def _writer(path, compress):
+    if compress:
+        # 파일 이름과 시각을 gzip 헤더에 넣지 않아야 같은 내용이 같은 바이트가 됩니다.
+        raw = open(path, 'wb')
+        return _ClosingText(gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=9, mtime=0), raw)
+    return open(path, 'w', encoding='utf-8', newline='\n')
+
+
+class _ClosingText:
+    """GzipFile 과 그 아래 파일을 함께 닫는 텍스트 쓰기 래퍼."""
+
+    def __init__(self, gzip_file, raw):
+        self._gzip, self._raw = gzip_file, raw
+
+    def write(self, text):
+        self._gzip.write(text.encode('utf-8'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._gzip.close()
+        finally:
+            self._raw.close()
+
+
+# --- 1. 내보내기 ---
+def _sequences(conn):
+    """번호를 함께 내보내는 테이블의 AUTOINCREMENT 순번. (구독의 id 는 내보내지 않으므로 제외합니다)"""
+    return dict(sorted((name, seq) for name, seq in conn.execute("SELECT name, seq FROM sqlite_sequence") if name in SEQUENCE_TABLES))
+
+def export(database=DATABASE, path=EXPORT_PATH):
+    """DB 를 내보내기 파일로 씁니다. (임시 파일에 쓴 뒤 교체) 반환값: {테이블: 행 수}"""
+    conn = sqlite3.connect(f'file:{os.path.abspath(database)}?mode=ro', uri=True, timeout=migrations.BUSY_TIMEOUT_SEC)
+    tmp = f'{path}.tmp'
+    counts = {}
+    try:
+        # 모든 테이블을 한 읽기 트랜잭션에서 읽어, 중간에 구독이 추가되어도 일관된 파일이 됩니다.
+        conn.execute("BEGIN")
+        version = conn.execute("SELECT value FROM dataset_meta WHERE key = 'dataset_version'").fetchone()
+        meta = {
+            'format': FORMAT_VERSION,
+            'schema': migrations.current_version(conn),
+            'dataset_version': version[0] if version else 0,
+            'sequences': _sequences(conn),
+        }
+        with _writer(tmp, _is_compressed(path)) as f:
+            f.write(_dumps(meta) + '\n')
+            for table, columns, order_by, where in TABLES:
+                f.write(_dumps({'table': table, 'columns': list(columns)}) + '\n')
+                cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY {order_by}")
+                count = 0
+                for row in cursor:
+                    f.write(_dumps(row) + '\n')
+                    count += 1
+                counts[table] = count
+        conn.rollback()
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return counts
+
+
+# --- 2. 복원 ---
+def read_meta(path=EXPORT_PATH):
+    """내보내기 파일의 첫 줄(메타 정보)만 읽습니다."""
+    with _reader(path) as f:
+        meta = json.loads(f.readline())
+    if meta.get('format') != FORMAT_VERSION:
+        raise ExportFormatError(f"지원하지 않는 내보내기 형식입니다: {meta.get('format')}")
+    if meta.get('schema', 0) > migrations.LATEST_VERSION:
+        raise ExportFormatError(f"내보내기 파일의 스키마(v{meta['schema']})가 코드가 아는 최신 버전(v{migrations.LATEST_VERSION})보다 높습니다.")
+    return meta
+
+def _database_version(database):
+    conn = sqlite3.connect(f'file:{os.path.abspath(database)}?mode=ro', uri=True)
+    try:
+        row = conn.execute("SELECT value FROM dataset_meta WHERE key = 'dataset_version'").fetchone()
+        return row[0] if row else 0
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+def is_stale(database=DATABASE, path=EXPORT_PATH):
+    """내보내기 파일이 있고, DB 가 없거나 DB 의 데이터 버전이 파일보다 낮으면 True."""
+    if not os.path.exists(path):
+        return False
+    if not os.path.exists(database):
+        return True
+    return _database_version(database) < read_meta(path)['dataset_version']
+
+def _load(conn, path):
+    """빈 DB(마이그레이션 적용 완료)에 내보내기 파일의 행을 넣습니다. 반환값: (메타 정보, {테이블: 행 수})"""
+    known = {table: set(columns) | set(RESTORE_DEFAULTS.get(table, ())) for table, columns, _, _ in TABLES}
+    counts = {}
+    cursor = conn.cursor()
+    with _reader(path) as f:
+        meta = json.loads(f.readline())
+        table, sql, defaults, batch = None, None, [], []
+        for line in f:
+            item = json.loads(line)
+            if isinstance(item, list):
+                batch.append(item + defaults)
+                if len(batch) >= 5000:
+                    cursor.executemany(sql, batch)
+                    batch = []
+                continue
+            if batch:
+                cursor.executemany(sql, batch)
+                batch = []
+            table, columns = item['table'], item['columns']
+            if table not in known or not set(columns) <= known[table]:
+                raise ExportFormatError(f"알 수 없는 테이블 또는 열입니다: {table} {columns}")
+            missing = [(column, value) for column, value in RESTORE_DEFAULTS.get(table, {}).items() if column not in columns]
+            columns = columns + [column for column, _ in missing]
+            defaults = [value for _, value in missing]
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+            counts[table] = 0
+        if batch:
+            cursor.executemany(sql, batch)
+    for table in counts:
+        counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    # 지워진 행의 번호가 다시 쓰이지 않도록 AUTOINCREMENT 순번을 이어 받습니다. (/api/changes 의 version 등)
+    for name, seq in meta.get('sequences', {}).items():
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (seq, name))
+        if not cursor.rowcount:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (name, seq))
+    cursor.execute("INSERT INTO dataset_meta (key, value) VALUES ('dataset_version', ?)", (meta['dataset_version'],))
+    search_index.rebuild(cursor)
+    conn.commit()
+    return meta, counts
+
+def restore(database=DATABASE, path=EXPORT_PATH):
+    """
+    내보내기 파일로 새 DB 를 만들어 운영 DB 자리로 교체합니다. (운영 DB 에만 있는 구독은 합쳐집니다)
+    반환값: (메타 정보, {테이블: 행 수})
+    """
+    read_meta(path)
+    import_file = database + IMPORT_SUFFIX
+    snapshot.discard(import_file)
+    try:
+        conn = sqlite3.connect(import_file)
+        try:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            migrations.apply(conn)
+            result = _load(conn, path)
+        finally:
+            conn.close()
+        snapshot.publish(import_file, database, baseline=0)
+    except BaseException:
+        snapshot.discard(import_file)
+        raise
+    return result
+
+def restore_if_stale(database=DATABASE, path=EXPORT_PATH):
+    """
+    DB 가 내보내기 파일보다 오래되었으면 복원합니다. 반환값: 복원했으면 (메타 정보, 행 수, 걸린 초), 아니면 None
+    여러 프로세스(gunicorn 워커)가 동시에 불러도 내보내기 파일의 잠금을 잡은 뒤 다시 확인하므로 한 번만 복원합니다.
+    """
+    if not is_stale(database, path):
+        return None
+    with open(path, 'rb') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if not is_stale(database, path):
+                return None
+            start = time.perf_counter()
+            meta, counts = restore(database, path)
+            return meta, counts, time.perf_counter() - start
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# --- 3. 명령줄 ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='데이터셋 내보내기(NDJSON) / 복원')
+    parser.add_argument('command', choices=('export', 'restore'))
+    parser.add_argument('--database', default=DATABASE)
+    parser.add_argument('--path', default=EXPORT_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == 'export':
+        counts = export(args.database, args.path)
+        print(f"{args.path} 저장 ({os.path.getsize(args.path):,} bytes, {time.perf_counter() - start:.2f}초): {counts}")
+    else:
+        meta, counts = restore(args.database, args.path)
+        print(f"{args.database} 복원 (데이터 버전 {meta['dataset_version']}, {time.perf_counter() - start:.2f}초): {counts}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
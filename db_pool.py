@@ -0,0 +1,142 @@
+# =====================================================================================
+#  파일: db_pool.py (SQLite 연결 관리) - v1.1
+#  - 요청마다 연결을 새로 열고 닫는 대신, 워커의 스레드마다 읽기 전용 연결을 하나씩 만들어
+#    계속 재사용합니다. (파일 열기·스키마 파싱·페이지 캐시 워밍업 비용 제거)
+#  - 읽기 연결은 mode=ro URI + query_only 로 열어 실수로도 쓰기가 일어나지 않게 하고,
+#    mmap_size / cache_size 를 키워 읽기 성능을 높입니다.
+#  - 쓰기(구독 등)는 요청마다 짧게 여는 별도의 쓰기 연결을 사용합니다.
+#  - 크롤러는 DB 파일을 새 스냅샷으로 통째로 교체합니다. (snapshot.py) 풀은 파일이 바뀐 것을
+#    (장치, inode) 로 감지해 각 스레드가 다음 요청에서 새 파일로 연결을 다시 엽니다.
+#    교체 전의 연결은 이전 파일을 끝까지 일관되게 읽으므로 서버를 재시작할 필요가 없습니다.
+# =====================================================================================
+
+import os
+import sqlite3
+import threading
+import time
+
+MMAP_SIZE = 256 * 1024 * 1024   # 256MB (DB 파일이 이보다 작으면 파일 전체가 매핑됩니다)
+CACHE_SIZE_KIB = 16 * 1024      # 연결당 페이지 캐시 16MB
+BUSY_TIMEOUT_SEC = 5.0
+RELOAD_CHECK_INTERVAL = 1.0     # DB 파일 교체 여부를 확인하는 최소 간격(초)
+
+
+def _file_identity(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+class WriterConnection(sqlite3.Connection):
+    """연결할 때의 DB 파일 (장치, inode) 를 기억하는 쓰기 연결."""
+    file_identity = None
+
+
+class ReadConnectionPool:
+    """스레드마다 하나씩 유지되는 읽기 전용 SQLite 연결 풀."""
+
+    def __init__(self, database):
+        self.database = database
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # 스레드 ident -> 연결 (통계 및 정리용)
+        self._stats = {'opened': 0, 'acquired': 0, 'in_use': 0, 'errors': 0, 'writer_opened': 0, 'reloads': 0}
+        self._identity = _file_identity(database)
+        self._generation = 0
+        self._last_check = time.monotonic()
+
+    def _open(self):
+        uri = f'file:{os.path.abspath(self.database)}?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, timeout=BUSY_TIMEOUT_SEC, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA query_only = ON')
+        conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+        conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KIB}')
+        return conn
+
+    def _check_reload(self):
+        """RELOAD_CHECK_INTERVAL 마다 DB 파일이 교체되었는지 확인하고, 교체되었으면 세대를 올립니다."""
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return
+        self._last_check = now
+        identity = _file_identity(self.database)
+        if identity is not None and identity != self._identity:
+            with self._lock:
+                if identity != self._identity:
+                    self._identity = identity
+                    self._generation += 1
+                    self._stats['reloads'] += 1
+
+    def acquire(self):
+        """현재 스레드의 읽기 연결을 반환합니다. 없거나 DB 파일이 교체되었으면 새로 엽니다."""
+        self._check_reload()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.generation != self._generation:
+            # 이전 파일을 가리키는 연결은 이 스레드에서만 쓰므로 여기서 닫아도 안전합니다.
+            with self._lock:
+                self._connections.pop(threading.get_ident(), None)
+            conn.close()
+            conn = None
+        if conn is None:
+            try:
+                conn = self._open()
+            except sqlite3.Error:
+                with self._lock:
+                    self._stats['errors'] += 1
+                raise
+            self._local.conn = conn
+            self._local.generation = self._generation
+            with self._lock:
+                self._connections[threading.get_ident()] = conn
+                self._stats['opened'] += 1
+        with self._lock:
+            self._stats['acquired'] += 1
+            self._stats['in_use'] += 1
+        return conn
+
+    def release(self, conn, exception=None):
+        """요청이 끝나면 호출됩니다. 연결은 닫지 않고, 열려 있던 트랜잭션만 정리합니다."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._stats['in_use'] -= 1
+            if exception is not None:
+                self._stats['errors'] += 1
+
+    def open_writer(self):
+        """구독 등 쓰기 요청용의 짧게 사용하는 쓰기 연결을 엽니다. (닫기는 호출자가 담당)"""
+        identity = _file_identity(self.database)
+        conn = sqlite3.connect(self.database, timeout=BUSY_TIMEOUT_SEC, factory=WriterConnection)
+        conn.file_identity = identity
+        conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._stats['writer_opened'] += 1
+        return conn
+
+    def is_current(self, conn):
+        """
+        쓰기 연결이 아직 현재 DB 파일을 가리키는지 확인합니다. 쓰기 잠금을 얻은 뒤에 호출해야 합니다.
+        크롤러는 운영 DB 의 쓰기 잠금을 잡은 채로 파일을 교체하므로, 잠금을 얻은 시점에 파일이 같다면
+        이 연결의 쓰기는 새 스냅샷에 반영됩니다.
+        """
+        return conn.file_identity is not None and conn.file_identity == _file_identity(self.database)
+
+    def close_all(self):
+        """모든 읽기 연결을 닫습니다. (DB 파일 교체나 종료 시 사용)"""
+        with self._lock:
+            connections, self._connections = self._connections, {}
+        for conn in connections.values():
+            conn.close()
+        self._local = threading.local()
+
+    def stats(self):
+        """풀 사용 현황. 종료된 스레드의 연결은 이 시점에 정리합니다."""
+        alive = {thread.ident for thread in threading.enumerate()}
+        with self._lock:
+            dead = [ident for ident in self._connections if ident not in alive]
+            for ident in dead:
+                self._connections.pop(ident).close()
+            return dict(self._stats, open_connections=len(self._connections))
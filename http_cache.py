@@ -0,0 +1,247 @@
+# =====================================================================================
+#  파일: http_cache.py (크롤러 HTTP 캐시 및 녹화/재생) - v1.2
+#  - 네이버 API 응답의 ETag / Last-Modified / 본문 해시를 디스크에 저장하고, 다음 실행에서
+#    조건부 요청(If-None-Match / If-Modified-Since)을 보냅니다.
+#  - 모든 응답이 지난 동기화 때와 같으면 크롤러가 분류·DB 동기화를 건너뛸 수 있습니다.
+#    캐시 색인은 DB 동기화가 성공한 뒤에만 저장(commit)되므로, 중간에 실패한 실행이
+#    다음 실행을 '변경 없음'으로 착각하게 만들지 않습니다. (수집과 동기화가 다른 프로세스에서
+#    실행되어도 수집 때의 검증자를 넘겨받아 저장할 수 있습니다)
+#  - record 모드: 받은 응답을 fixture 폴더에 녹화합니다.
+#  - replay 모드: 녹화된 fixture 를 로컬 대역 서버(FixtureServer)로 제공하여, 네트워크 없이
+#    전체 분류·동기화 경로를 재현 가능하게 실행/측정할 수 있습니다.
+#    대역 서버는 지연 시간, 오류 응답, 동시 요청 한도 초과 시 429(Retry-After)를 흉내 낼 수 있어
+#    요청 제어기(crawl_limiter.py)의 동작을 네트워크 없이 확인할 수 있습니다.
+#  - 사용법(대역 서버 단독 실행): python http_cache.py serve fixtures/http --port 8080
+#                                 python http_cache.py serve fixtures/http --latency 0.05 --error-rate 0.05 --max-concurrency 3 --retry-after 1
+# =====================================================================================
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+INDEX_FILE = 'index.json'
+MANIFEST_FILE = 'manifest.json'
+
+
+def _request_key(url):
+    """호스트와 무관하게 같은 요청을 식별하기 위한 키 (경로 + 쿼리)."""
+    parts = urlsplit(url)
+    return f'{parts.path}?{parts.query}' if parts.query else parts.path
+
+def _read_json_file(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json_file(path, data):
+    """임시 파일에 쓴 뒤 교체하여, 쓰는 도중 중단되어도 기존 파일이 깨지지 않게 합니다."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# --- 1. 조건부 요청 캐시 ---
+class HttpCache:
+    """URL 별 검증자(ETag/Last-Modified)와 본문을 디스크에 보관하는 캐시."""
+
+    def __init__(self, cache_dir, record_dir=None):
+        self.cache_dir = cache_dir
+        self.record_dir = record_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+        self._index = _read_json_file(os.path.join(cache_dir, INDEX_FILE), {})
+        self._pending = {}
+        self.changed_urls, self.unchanged_urls = set(), set()
+
+    def conditional_headers(self, url):
+        """저장된 본문이 있는 URL 에 대해 조건부 요청 헤더를 만듭니다."""
+        if not self.can_revalidate(url):
+            return {}
+        entry = self._index[_request_key(url)]
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load_not_modified(self, url):
+        """304 응답을 받은 URL 의 저장된 본문을 반환합니다."""
+        key = _request_key(url)
+        entry = self._index[key]
+        self.unchanged_urls.add(key)
+        self._pending[key] = entry
+        with open(os.path.join(self.cache_dir, entry['file']), 'rb') as f:
+            body = f.read()
+        self._record(key, body)
+        return body
+
+    def can_revalidate(self, url):
+        entry = self._index.get(_request_key(url))
+        return entry is not None and os.path.exists(os.path.join(self.cache_dir, entry['file']))
+
+    def store(self, url, body, headers):
+        """200 응답을 저장하고, 지난 동기화 때와 본문이 달라졌는지 반환합니다."""
+        key = _request_key(url)
+        digest = hashlib.sha256(body).hexdigest()
+        file_name = f'{digest[:32]}.json'
+        body_path = os.path.join(self.cache_dir, file_name)
+        if not os.path.exists(body_path):
+            with open(body_path, 'wb') as f:
+                f.write(body)
+        previous = self._index.get(key)
+        changed = previous is None or previous['sha256'] != digest
+        (self.changed_urls if changed else self.unchanged_urls).add(key)
+        self._pending[key] = {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'sha256': digest,
+            'file': file_name,
+        }
+        self._record(key, body)
+        return changed
+
+    def nothing_changed(self):
+        """이번 실행의 모든 응답이 지난 동기화 때와 같고, 요청한 URL 집합도 같으면 True."""
+        return bool(self.unchanged_urls) and not self.changed_urls and set(self._pending) == set(self._index)
+
+    def pending_index(self):
+        """이번 실행에서 받은 응답의 검증자. 다른 프로세스에서 commit(pending) 으로 저장할 수 있게 합니다."""
+        return dict(self._pending)
+
+    def commit(self, pending=None):
+        """
+        DB 동기화가 끝난 뒤 호출하여 이번 실행의 검증자를 다음 실행의 기준으로 저장합니다.
+        수집과 동기화가 다른 프로세스에서 실행되면 수집 때의 pending_index() 를 넘겨받습니다.
+        """
+        self._index = dict(self._pending if pending is None else pending)
+        _write_json_file(os.path.join(self.cache_dir, INDEX_FILE), self._index)
+        referenced = {entry['file'] for entry in self._index.values()} | {INDEX_FILE}
+        for file_name in os.listdir(self.cache_dir):
+            if file_name not in referenced:
+                os.remove(os.path.join(self.cache_dir, file_name))
+
+    def _record(self, key, body):
+        if not self.record_dir:
+            return
+        file_name = f'{hashlib.sha1(key.encode()).hexdigest()[:16]}.json'
+        with open(os.path.join(self.record_dir, file_name), 'wb') as f:
+            f.write(body)
+        manifest_path = os.path.join(self.record_dir, MANIFEST_FILE)
+        manifest = _read_json_file(manifest_path, {})
+        manifest[key] = file_name
+        _write_json_file(manifest_path, manifest)
+
+
+# --- 2. 녹화된 응답을 제공하는 로컬 대역 서버 ---
+class FixtureServer:
+    """
+    record 모드로 녹화한 fixture 를 네이버 API 와 같은 경로로 제공하는 로컬 서버.
+    `async with FixtureServer(dir) as base_url:` 안에서 base_url 을 API 주소 대신 사용합니다.
+    장애 주입 옵션:
+      latency         - 응답마다 더할 지연 시간(초)
+      error_rate      - error_status 로 응답할 확률 (0~1)
+      max_concurrency - 동시에 처리 중인 요청이 이보다 많으면 429 로 응답
+      retry_after     - 429/503 응답에 붙일 Retry-After 초 (None 이면 헤더 없음)
+    """
+
+    def __init__(self, fixture_dir, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, error_status=503,
+                 max_concurrency=None, retry_after=None, seed=None):
+        self.fixture_dir = fixture_dir
+        self.host, self.port = host, port
+        self.manifest = _read_json_file(os.path.join(fixture_dir, MANIFEST_FILE), {})
+        self.latency, self.error_rate, self.error_status = latency, error_rate, error_status
+        self.max_concurrency, self.retry_after = max_concurrency, retry_after
+        self._rng = random.Random(seed)
+        self.request_count = 0
+        self.error_count = 0
+        self.throttled_count = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._runner = None
+
+    def _error_response(self, status):
+        headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None and status in (429, 503) else None
+        return web.json_response({'error': status}, status=status, headers=headers)
+
+    async def _handle(self, request):
+        self.request_count += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.max_concurrency is not None and self.in_flight > self.max_concurrency:
+                self.throttled_count += 1
+                return self._error_response(429)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.error_count += 1
+                return self._error_response(self.error_status)
+            file_name = self.manifest.get(_request_key(str(request.rel_url)))
+            if file_name is None:
+                # 녹화되지 않은 페이지는 네이버 API 와 같이 빈 목록으로 응답합니다.
+                return web.json_response({'titleList': []})
+            with open(os.path.join(self.fixture_dir, file_name), 'rb') as f:
+                body = f.read()
+            return web.Response(body=body, content_type='application/json')
+        finally:
+            self.in_flight -= 1
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route('GET', '/{tail:.*}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return f'http://{self.host}:{self.port}'
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+# --- 3. 대역 서버 단독 실행 ---
+async def _serve_forever(fixture_dir, host, port, **faults):
+    server = FixtureServer(fixture_dir, host, port, **faults)
+    base_url = await server.start()
+    print(f"fixture {len(server.manifest)}개를 {base_url} 에서 제공합니다. (종료: Ctrl+C)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='녹화된 네이버 API 응답을 제공하는 로컬 대역 서버')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve')
+    serve_parser.add_argument('fixture_dir')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8080)
+    serve_parser.add_argument('--latency', type=float, default=0.0, help='응답마다 더할 지연 시간(초)')
+    serve_parser.add_argument('--error-rate', type=float, default=0.0, help='오류로 응답할 확률 (0~1)')
+    serve_parser.add_argument('--error-status', type=int, default=503)
+    serve_parser.add_argument('--max-concurrency', type=int, default=None, help='동시 요청이 이보다 많으면 429 로 응답')
+    serve_parser.add_argument('--retry-after', type=int, default=None, help='429/503 응답의 Retry-After 초')
+    serve_parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(_serve_forever(
+        args.fixture_dir, args.host, args.port, latency=args.latency, error_rate=args.error_rate, error_status=args.error_status,
+        max_concurrency=args.max_concurrency, retry_after=args.retry_after, seed=args.seed,
+    ))
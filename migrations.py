@@ -0,0 +1,214 @@
+# =====================================================================================
+#  파일: migrations.py (DB 스키마 버전 관리) - v1.0
+#  - 스키마 버전을 DB 파일의 PRAGMA user_version 에 기록하고, 그보다 새로운 마이그레이션만
+#    번호 순서대로 한 트랜잭션씩 적용합니다. (중간에 실패하면 그 단계는 통째로 취소됩니다)
+#  - crawler.py(setup_database)와 app.py(시작 시) 가 모두 apply() 를 호출하므로, 어느 쪽이 먼저
+#    새 코드로 실행되어도 같은 스키마가 됩니다. 새 테이블·인덱스는 각 모듈의 create_tables 를 고치지
+#    말고 MIGRATIONS 끝에 새 단계로 추가합니다.
+#  - 자주 쓰는 조회가 의도한 (커버링) 인덱스를 타는지 EXPLAIN QUERY PLAN 으로 확인합니다.
+#      python migrations.py check                 : webtoons.db 의 실행 계획 검사 (회귀 시 종료 코드 1)
+#      python migrations.py check --database :memory:  : 마이그레이션만으로 만든 빈 DB 에서 검사
+# =====================================================================================
+
+import argparse
+import sqlite3
+import sys
+
+import change_log
+import crawl_metrics
+import outbox
+import search_index
+
+DATABASE = 'webtoons.db'
+BUSY_TIMEOUT_SEC = 30.0
+
+
+class SchemaVersionError(Exception):
+    """DB 의 스키마 버전이 이 코드가 아는 최신 버전보다 높을 때 발생합니다."""
+
+
+# --- 1. 마이그레이션 단계 ---
+def _base_schema(cursor):
+    """버전 관리 이전부터 있던 테이블·트리거·인덱스. (기존 DB 에는 IF NOT EXISTS 로 그대로 적용됩니다)"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS webtoons (
+        title_id INTEGER PRIMARY KEY,
+        title_text TEXT NOT NULL,
+        author TEXT,
+        weekday TEXT,
+        status TEXT NOT NULL
+    )""")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS subscriptions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT NOT NULL,
+        title_id INTEGER NOT NULL,
+        UNIQUE(email, title_id)
+    )""")
+    # 완결 웹툰의 구독자 조회(title_id 기준)를 위한 커버링 인덱스
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_subscriptions_title ON subscriptions (title_id, email)")
+
+    # 휴재/완결 목록 API의 전체 개수는 매 요청 COUNT(*) 대신 트리거로 유지되는 카운터를 사용합니다.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS webtoon_status_counts (
+        status TEXT PRIMARY KEY,
+        count INTEGER NOT NULL
+    )""")
+    cursor.execute("""
+    INSERT INTO webtoon_status_counts (status, count)
+    SELECT status, COUNT(*) FROM webtoons
+    WHERE NOT EXISTS (SELECT 1 FROM webtoon_status_counts)
+    GROUP BY status""")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS webtoons_count_insert AFTER INSERT ON webtoons BEGIN
+        INSERT INTO webtoon_status_counts (status, count) VALUES (NEW.status, 1)
+        ON CONFLICT(status) DO UPDATE SET count = count + 1;
+    END""")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS webtoons_count_delete AFTER DELETE ON webtoons BEGIN
+        UPDATE webtoon_status_counts SET count = count - 1 WHERE status = OLD.status;
+    END""")
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS webtoons_count_update AFTER UPDATE OF status ON webtoons
+    WHEN OLD.status IS NOT NEW.status BEGIN
+        UPDATE webtoon_status_counts SET count = count - 1 WHERE status = OLD.status;
+        INSERT INTO webtoon_status_counts (status, count) VALUES (NEW.status, 1)
+        ON CONFLICT(status) DO UPDATE SET count = count + 1;
+    END""")
+    # 상태별 목록을 rowid 순으로 탐색(keyset 페이지네이션)할 수 있도록 합니다.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_webtoons_status ON webtoons (status)")
+
+    # 크롤러가 새 데이터를 기록할 때마다 올리는 데이터 버전 (app.py 의 응답 캐시 무효화에 사용)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS dataset_meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )""")
+
+    search_index.create_tables(cursor)
+    outbox.create_tables(cursor)
+    crawl_metrics.create_tables(cursor)
+    change_log.create_tables(cursor)
+
+def _covering_list_indexes(cursor):
+    """
+    휴재/완결 목록과 요일 탭 조회가 테이블을 읽지 않고 인덱스만으로 끝나도록 합니다.
+    title_id 는 rowid 의 별칭이므로 (status, title_id, ...) 순서의 인덱스가 'ORDER BY rowid DESC' 를 그대로 만족합니다.
+    """
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_webtoons_status_list ON webtoons (status, title_id, title_text, author)")
+    # 같은 앞부분(status)을 가진 이전 인덱스는 새 인덱스가 대신합니다.
+    cursor.execute("DROP INDEX IF EXISTS idx_webtoons_status")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_webtoons_weekday ON webtoons (weekday, title_id, title_text, author, status)")
+
+# (버전, 설명, 적용 함수) - 이미 배포된 단계는 고치지 말고 새 단계를 추가합니다.
+MIGRATIONS = (
+    (1, '기본 스키마', _base_schema),
+    (2, '목록/요일 탭 조회용 커버링 인덱스', _covering_list_indexes),
+)
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# --- 2. 적용 ---
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply(conn):
+    """
+    아직 적용되지 않은 마이그레이션을 순서대로 적용합니다. 반환값: 적용한 버전 목록
+    여러 프로세스(gunicorn 워커, 크롤러)가 동시에 호출해도, 쓰기 잠금을 얻은 뒤 버전을 다시 읽으므로 한 번만 적용됩니다.
+    """
+    version = current_version(conn)
+    if version > LATEST_VERSION:
+        raise SchemaVersionError(f'DB 스키마 버전({version})이 코드가 아는 최신 버전({LATEST_VERSION})보다 높습니다. 코드를 갱신하세요.')
+    applied = []
+    for target, description, migrate in MIGRATIONS:
+        if target <= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if current_version(conn) >= target:
+                conn.rollback()
+                continue
+            migrate(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        print(f"DB 스키마 v{target} 적용: {description}")
+        applied.append(target)
+    return applied
+
+
+# --- 3. 실행 계획 검사 ---
+# (이름, SQL, 파라미터, 사용해야 하는 인덱스, 정렬용 임시 B-트리 허용 여부)
+HOT_QUERIES = (
+    ('status_page',
+     "SELECT title_id, title_text, author, status FROM webtoons WHERE status = ? ORDER BY rowid DESC LIMIT ? OFFSET ?",
+     ('완결', 101, 0), 'idx_webtoons_status_list', False),
+    ('status_cursor',
+     "SELECT title_id, title_text, author, status FROM webtoons WHERE status = ? AND rowid < ? ORDER BY rowid DESC LIMIT ?",
+     ('휴재', 1000, 101), 'idx_webtoons_status_list', False),
+    ('status_count',
+     "SELECT COUNT(*) FROM webtoons WHERE status = ?",
+     ('완결',), 'idx_webtoons_status_list', False),
+    ('ongoing_weekdays',
+     "SELECT title_id, title_text, author, weekday, status FROM webtoons WHERE weekday IN ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun', 'daily')",
+     (), 'idx_webtoons_weekday', False),
+    # 수신자별 묶음 메일을 위해 email 순으로 정렬합니다. (새로 완결된 웹툰의 구독자만 정렬하므로 임시 정렬 허용)
+    ('subscribers_by_title',
+     "SELECT title_id, email FROM subscriptions WHERE title_id IN (?, ?) ORDER BY email",
+     (1, 2), 'idx_subscriptions_title', True),
+)
+
+def query_plan(conn, sql, params=()):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+def check_query_plans(conn):
+    """HOT_QUERIES 의 실행 계획을 검사합니다. 반환값: [(이름, 실행 계획, 문제 또는 None)]"""
+    results = []
+    for name, sql, params, index, allow_temp_sort in HOT_QUERIES:
+        plan = query_plan(conn, sql, params)
+        problem = None
+        if not any(f'USING COVERING INDEX {index}' in step for step in plan):
+            problem = f'커버링 인덱스 {index} 를 사용하지 않습니다.'
+        elif any(step.startswith('SCAN ') for step in plan):
+            problem = '테이블 또는 인덱스 전체를 훑습니다.'
+        elif not allow_temp_sort and any('TEMP B-TREE' in step for step in plan):
+            problem = '정렬에 임시 B-트리를 사용합니다.'
+        results.append((name, plan, problem))
+    return results
+
+
+# --- 4. 명령줄 ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='DB 스키마 마이그레이션 및 실행 계획 검사')
+    parser.add_argument('command', choices=('status', 'apply', 'check'),
+                        help='status: 스키마 버전 출력 / apply: 마이그레이션 적용 / check: 실행 계획 검사')
+    parser.add_argument('--database', default=DATABASE)
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.database, timeout=BUSY_TIMEOUT_SEC)
+    try:
+        if args.command == 'apply' or args.database == ':memory:':
+            apply(conn)
+        version = current_version(conn)
+        print(f"{args.database}: 스키마 v{version} (최신 v{LATEST_VERSION})")
+        if args.command != 'check':
+            return 0
+        failed = 0
+        for name, plan, problem in check_query_plans(conn):
+            print(f"[{'실패' if problem else 'OK'}] {name}: {' / '.join(plan)}")
+            if problem:
+                print(f"       -> {problem}")
+                failed += 1
+        if version < LATEST_VERSION:
+            print(f"스키마가 최신이 아닙니다. `python migrations.py apply --database {args.database}` 로 적용하세요.")
+            failed += 1
+        return 1 if failed else 0
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# =====================================================================================
+#  파일: outbox.py (완결 알림 발송함) - v1.4
+#  - 보낼 알림을 먼저 outbox 테이블에 (이메일, 웹툰 ID) 단위로 기록한 뒤 발송합니다.
+#    같은 구독자에게 같은 웹툰 알림은 한 번만 기록되므로, 재실행해도 중복 발송되지 않습니다.
+#  - 한 번 완결된 웹툰이 새 시즌으로 다시 연재되면 동기화 단계가 그 웹툰의 알림 기록을 지웁니다.
+#    (reset_titles) 그래서 중복 방지는 '완결될 때마다 한 번' 이며, 다시 완결되면 구독자에게 다시 알립니다.
+#  - 같은 수신자의 대기 알림은 한 통의 묶음(digest) 메일로 합쳐 SMTP 왕복을 줄입니다.
+#  - 여러 개의 SMTP 세션을 재사용하는 스레드 풀이 대기(pending) 알림을 동시에 발송하고,
+#    메시지별로 재시도(지수 백오프)합니다. 발송 결과는 건마다 즉시 커밋되어, 중간에
+#    실패하거나 프로세스가 종료되어도 누가 이미 알림을 받았는지 남습니다.
+#  - 크롤러의 알림(notify) 단계를 다시 실행하면 그 실행에서 실패한 알림만 대기 상태로 돌려 다시 보냅니다.
+#  - 내보내기 파일(dataset_export.py)에서 복원한 알림은 제목/본문이 비어 있으므로 보낼 때 웹툰 제목으로 다시 만듭니다.
+# =====================================================================================
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from email.mime.text import MIMEText
+
+PENDING, SENT, FAILED = 'pending', 'sent', 'failed'
+
+
+# --- 1. 테이블 생성 및 적재 ---
+def create_tables(cursor):
+    """알림 발송함 테이블이 없는 경우 생성합니다."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT NOT NULL,
+        title_id INTEGER NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        created_at TEXT NOT NULL,
+        sent_at TEXT,
+        UNIQUE(email, title_id)
+    )""")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status)")
+
+def enqueue(conn, messages):
+    """(email, title_id, subject, body) 목록을 발송함에 넣습니다. 이미 있는 알림은 무시합니다."""
+    now = datetime.now().isoformat(timespec='seconds')
+    cursor = conn.cursor()
+    before = conn.total_changes
+    cursor.executemany(
+        "INSERT OR IGNORE INTO outbox (email, title_id, subject, body, created_at) VALUES (?, ?, ?, ?, ?)",
+        [(email, title_id, subject, body, now) for email, title_id, subject, body in messages]
+    )
+    conn.commit()
+    return conn.total_changes - before
+
+def reset_titles(cursor, title_ids):
+    """
+    title_ids 의 알림 기록(보낸 알림 포함)을 지웁니다. 완결이 풀린 웹툰에 대해 동기화 트랜잭션 안에서 호출하며,
+    아직 보내지 못한 알림도 더는 맞지 않으므로 함께 지웁니다. (커밋은 호출자가 담당) 반환값: 지운 건수
+    """
+    title_ids = list(title_ids)
+    deleted = 0
+    for start in range(0, len(title_ids), 500):
+        chunk = title_ids[start:start + 500]
+        cursor.execute(f"DELETE FROM outbox WHERE title_id IN ({','.join('?' * len(chunk))})", chunk)
+        deleted += cursor.rowcount
+    return deleted
+
+def requeue_failed(conn, title_ids):
+    """title_ids 의 발송 실패 알림을 다시 대기 상태로 돌립니다. (crawler.py notify --resume) 반환값: 돌린 건수"""
+    title_ids = list(title_ids)
+    if not title_ids:
+        return 0
+    placeholders = ','.join('?' * len(title_ids))
+    cursor = conn.execute(f"UPDATE outbox SET status = ? WHERE status = ? AND title_id IN ({placeholders})", (PENDING, FAILED, *title_ids))
+    conn.commit()
+    return cursor.rowcount
+
+def count_by_status(conn, title_ids=None):
+    """{title_id: {status: count}} 형태로 발송 현황을 집계합니다."""
+    cursor = conn.cursor()
+    if title_ids is None:
+        cursor.execute("SELECT title_id, status, COUNT(*) FROM outbox GROUP BY title_id, status")
+    else:
+        title_ids = list(title_ids)
+        placeholders = ','.join('?' * len(title_ids))
+        cursor.execute(f"SELECT title_id, status, COUNT(*) FROM outbox WHERE title_id IN ({placeholders}) GROUP BY title_id, status", title_ids)
+    summary = {}
+    for title_id, status, count in cursor.fetchall():
+        summary.setdefault(title_id, {})[status] = count
+    return summary
+
+
+# --- 2. SMTP 세션 풀을 이용한 발송 ---
+class _SessionPool:
+    """워커 스레드마다 SMTP 세션을 하나씩 열어 재사용합니다."""
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions = []
+
+    def get(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._session_factory()
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def discard(self):
+        """연결이 끊긴 세션을 버려, 다음 시도에서 새 세션을 열게 합니다."""
+        session = getattr(self._local, 'session', None)
+        self._local.session = None
+        if session is not None:
+            with self._lock:
+                if session in self._sessions:
+                    self._sessions.remove(session)
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def close_all(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            try:
+                session.quit()
+            except Exception:
+                pass
+
+
+def _send_with_retry(pool, sender_email, message, max_attempts, backoff_base):
+    """한 메시지를 최대 max_attempts 번까지 보냅니다. 반환값: (outbox id 목록, 성공 여부, 시도 횟수, 오류)"""
+    outbox_ids, email, subject, body = message
+    msg = MIMEText(body, _charset='utf-8')
+    msg['Subject'] = subject
+    msg['From'] = sender_email
+    msg['To'] = email
+    error = None
+    for attempt in range(1, max_attempts + 1):
+        try:
+            pool.get().sendmail(sender_email, email, msg.as_string())
+            return outbox_ids, True, attempt, None
+        except Exception as e:
+            error = str(e)
+            pool.discard()
+            if attempt < max_attempts:
+                time.sleep(backoff_base * (2 ** (attempt - 1)))
+    return outbox_ids, False, max_attempts, error
+
+
+def _pending_messages(conn, compose_digest):
+    """
+    대기 중인 알림을 수신자별로 묶어 메시지 목록을 만듭니다.
+    알림이 하나뿐이면 저장된 제목/본문을 그대로, 여러 개면 compose_digest(웹툰 제목 목록)로 묶음 메일을 만듭니다.
+    저장된 본문이 없으면(내보내기 파일에서 복원한 알림) 하나여도 compose_digest 로 만듭니다.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+    SELECT o.id, o.email, o.subject, o.body, COALESCE(w.title_text, 'ID ' || o.title_id)
+    FROM outbox o LEFT JOIN webtoons w ON w.title_id = o.title_id
+    WHERE o.status = ?
+    ORDER BY o.email, o.id""", (PENDING,))
+    by_email = {}
+    for row in cursor.fetchall():
+        by_email.setdefault(row[1], []).append(row)
+
+    messages = []
+    for email, rows in by_email.items():
+        outbox_ids = [row[0] for row in rows]
+        if len(rows) == 1 and rows[0][3]:
+            subject, body = rows[0][2], rows[0][3]
+        else:
+            subject, body = compose_digest([row[4] for row in rows])
+        messages.append((outbox_ids, email, subject, body))
+    return messages
+
+
+def deliver(conn, session_factory, sender_email, compose_digest, workers=4, max_attempts=3, backoff_base=1.0):
+    """
+    대기 중인 알림을 수신자당 한 통의 메일로 묶어 workers 개의 SMTP 세션으로 동시에 발송합니다.
+    결과는 메일마다 바로 커밋합니다.
+    반환값: {'sent': 보낸 메일 수, 'failed': 실패한 메일 수, 'notifications': 처리된 알림(웹툰) 수, 'elapsed': 초}
+    """
+    messages = _pending_messages(conn, compose_digest)
+    result = {'sent': 0, 'failed': 0, 'notifications': 0, 'elapsed': 0.0}
+    if not messages:
+        return result
+
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    pool = _SessionPool(session_factory)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_send_with_retry, pool, sender_email, message, max_attempts, backoff_base) for message in messages]
+            for future in as_completed(futures):
+                outbox_ids, ok, attempts, error = future.result()
+                if ok:
+                    sent_at = datetime.now().isoformat(timespec='seconds')
+                    cursor.executemany(
+                        "UPDATE outbox SET status = ?, attempts = attempts + ?, last_error = NULL, sent_at = ? WHERE id = ?",
+                        [(SENT, attempts, sent_at, outbox_id) for outbox_id in outbox_ids]
+                    )
+                    result['sent'] += 1
+                    result['notifications'] += len(outbox_ids)
+                else:
+                    cursor.executemany(
+                        "UPDATE outbox SET status = ?, attempts = attempts + ?, last_error = ? WHERE id = ?",
+                        [(FAILED, attempts, error, outbox_id) for outbox_id in outbox_ids]
+                    )
+                    result['failed'] += 1
+                conn.commit()
+    finally:
+        pool.close_all()
+    result['elapsed'] = time.perf_counter() - start
+    return result
@@ -0,0 +1,249 @@
+# =====================================================================================
+#  파일: request_metrics.py (API 성능 지표) - v1.2
+#  - 라우트별 응답 시간 히스토그램, SQLite 조회 시간, 반환 행 수, 응답 바이트, 응답 캐시 적중률을
+#    기록하고 /metrics 에서 Prometheus 텍스트 형식으로 제공합니다.
+#  - gunicorn 워커마다 지표를 메모리에 모으고 최대 FLUSH_INTERVAL 간격으로 워커별 파일에 저장합니다.
+#    /metrics 는 모든 워커의 파일을 합산하므로, 어느 워커가 응답해도 서버 전체 값이 나옵니다.
+#    (종료된 워커의 파일도 남겨 두어 누적 카운터가 줄어들지 않게 합니다)
+#  - 저장은 워커 안에서 한 번에 하나씩만 하며(요청 스레드와 백그라운드 스레드가 겹치지 않도록),
+#    저장에 실패해도 요청 응답에는 영향을 주지 않습니다.
+#  - 요청 속도 제한(api_limiter.py)으로 거절한 요청 수도 라우트별로 셉니다.
+#  - 지표 폴더는 METRICS_DIR 환경 변수로 지정하며, 기본값은 gunicorn 마스터 프로세스마다 다른
+#    임시 폴더입니다.
+# =====================================================================================
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+FLUSH_INTERVAL = 1.0
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+HELP = {
+    'webtoon_http_request_duration_seconds': ('histogram', '라우트별 요청 처리 시간'),
+    'webtoon_db_query_duration_seconds': ('histogram', '요청당 SQLite 조회/쓰기 시간'),
+    'webtoon_db_rows_returned_total': ('counter', '라우트별 DB 에서 읽거나 기록한 행 수'),
+    'webtoon_http_response_bytes_total': ('counter', '라우트별 응답 본문 바이트'),
+    'webtoon_response_cache_requests_total': ('counter', '응답 캐시 조회 결과 (hit/miss)'),
+    'webtoon_rate_limited_total': ('counter', '요청 속도 제한으로 429 응답한 요청 수 (api_limiter.py)'),
+}
+
+
+class MetricsRegistry:
+    """워커 프로세스 안의 지표 저장소. 워커별 파일로 저장하고, 모든 워커의 파일을 합산해 내보냅니다."""
+
+    def __init__(self, directory=None, flush_interval=FLUSH_INTERVAL):
+        self._directory = directory or os.getenv('METRICS_DIR')
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # 파일 저장 직렬화 (지표 기록은 _lock 으로 따로 막습니다)
+        self._histograms = {}  # (name, labels) -> [버킷별 개수..., sum, count]
+        self._counters = {}    # (name, labels) -> 값
+        self._last_flush = 0.0
+        self._dirty = False
+        self._flusher_pid = None
+
+    @property
+    def directory(self):
+        # 워커 안에서 처음 사용할 때 정해야 gunicorn --preload 에서도 마스터 pid 기준이 됩니다.
+        if self._directory is None:
+            self._directory = os.path.join(tempfile.gettempdir(), f'webtoon-metrics-{os.getppid()}')
+        return self._directory
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+            self._dirty = True
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._dirty = True
+
+    def _snapshot(self):
+        with self._lock:
+            self._dirty = False
+            return {
+                'histograms': [[name, dict(labels), list(entry)] for (name, labels), entry in self._histograms.items()],
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+            }
+
+    def flush(self):
+        """이 워커의 지표를 워커별 파일에 원자적으로 저장합니다."""
+        with self._flush_lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'worker-{os.getpid()}.json')
+        snapshot = self._snapshot()
+        # 임시 파일 이름을 저장마다 따로 만들어, 다른 프로세스가 같은 pid 파일을 남겨 두었어도 겹치지 않게 합니다.
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.worker-{os.getpid()}-', suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with self._lock:
+                self._dirty = True  # 저장하지 못한 지표는 다음 저장 때 다시 씁니다.
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._last_flush = time.monotonic()
+
+    def maybe_flush(self):
+        """요청이 끝날 때 호출됩니다. 요청이 끊긴 워커도 파일이 최신이 되도록 백그라운드 저장 스레드를 띄웁니다."""
+        if self._flusher_pid != os.getpid():
+            # fork 된 워커에는 마스터의 스레드가 없으므로 프로세스마다 한 번 시작합니다.
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._flush_periodically, name='metrics-flusher', daemon=True).start()
+        if not (self._dirty and time.monotonic() - self._last_flush >= self.flush_interval):
+            return
+        # 다른 스레드가 저장 중이면 그 저장이 이 요청의 지표까지 담으므로 기다리지 않습니다.
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._flush_locked()
+        except OSError as e:
+            # 지표 저장 실패로 정상 응답이 500 이 되지 않도록 기록만 합니다.
+            print(f"경고: 성능 지표를 저장하지 못했습니다 - {e}")
+        finally:
+            self._flush_lock.release()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                try:
+                    self.flush()
+                except OSError as e:
+                    print(f"경고: 성능 지표를 저장하지 못했습니다 - {e}")
+
+    def collect(self):
+        """모든 워커 파일을 합산한 (histograms, counters) 를 반환합니다."""
+        histograms, counters = {}, {}
+        for file_name in os.listdir(self.directory):
+            if not (file_name.startswith('worker-') and file_name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, file_name), encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, entry in snapshot['histograms']:
+                key = (name, tuple(sorted(labels.items())))
+                merged = histograms.setdefault(key, [0] * len(entry))
+                for i, value in enumerate(entry):
+                    merged[i] += value
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(sorted(labels.items())))
+                counters[key] = counters.get(key, 0) + value
+        return histograms, counters
+
+    def render(self):
+        """Prometheus 텍스트 형식(0.0.4)으로 내보냅니다."""
+        self.flush()
+        histograms, counters = self.collect()
+        lines = []
+        for name, (kind, help_text) in HELP.items():
+            entries = sorted((key, value) for key, value in (histograms if kind == 'histogram' else counters).items() if key[0] == name)
+            if not entries:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for (_, labels), value in entries:
+                if kind == 'counter':
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+                    continue
+                buckets = LATENCY_BUCKETS if name == 'webtoon_http_request_duration_seconds' else DB_BUCKETS
+                cumulative = 0
+                for bound, count in zip(buckets, value):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", repr(bound)),))} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {value[-1]}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {value[-2]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+# --- Flask 연동 ---
+registry = MetricsRegistry()
+
+def _route():
+    return request.endpoint or 'unmatched'
+
+@contextmanager
+def db_timer():
+    """with 블록의 실행 시간을 현재 요청의 SQLite 시간에 더합니다."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        g._metrics_db = g.get('_metrics_db', 0.0) + time.perf_counter() - start
+
+def add_rows(count):
+    """현재 요청이 DB 에서 읽거나 기록한 행 수를 더합니다."""
+    g._metrics_rows = g.get('_metrics_rows', 0) + count
+
+def record_cache(hit):
+    registry.inc('webtoon_response_cache_requests_total', {'route': _route(), 'result': 'hit' if hit else 'miss'})
+
+def record_rate_limited(policy_name, wait):
+    registry.inc('webtoon_rate_limited_total', {'route': _route(), 'policy': policy_name})
+
+def init_app(app):
+    """요청 시간 측정 훅과 /metrics 라우트를 등록합니다."""
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('_metrics_start', None)
+        route = _route()
+        if start is None or route == 'metrics':
+            return response
+        labels = {'route': route, 'method': request.method, 'status': str(response.status_code)}
+        registry.observe('webtoon_http_request_duration_seconds', labels, time.perf_counter() - start, LATENCY_BUCKETS)
+        db_seconds = g.pop('_metrics_db', None)
+        if db_seconds is not None:
+            registry.observe('webtoon_db_query_duration_seconds', {'route': route}, db_seconds, DB_BUCKETS)
+        rows = g.pop('_metrics_rows', None)
+        if rows is not None:
+            registry.inc('webtoon_db_rows_returned_total', {'route': route}, rows)
+        if not response.is_streamed:
+            registry.inc('webtoon_http_response_bytes_total', {'route': route}, response.content_length or 0)
+        registry.maybe_flush()
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
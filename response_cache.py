@@ -0,0 +1,88 @@
+# =====================================================================================
+#  파일: response_cache.py (목록 API 응답 캐시) - v1.1
+#  - 데이터는 하루 한 번 크롤러가 갱신할 때만 바뀌므로, 목록 API 응답을 데이터 버전마다
+#    한 번만 JSON 직렬화·압축(gzip/brotli)해 두고 재사용합니다.
+#  - 강한 ETag 를 부여하여 If-None-Match 요청에는 본문 없이 304 로 응답할 수 있게 합니다.
+#  - 데이터 버전 확인은 CHECK_INTERVAL 초마다 한 번만 수행하여, 평소 요청은 SQLite 접근 없이
+#    메모리의 바이트를 그대로 돌려줍니다.
+#  - 키에는 클라이언트가 보낸 cursor/page/since 값이 들어가므로 항목 수가 MAX_ENTRIES 를 넘으면 가장 오래
+#    쓰이지 않은 항목부터 버립니다. (임의의 값으로 캐시를 채워도 자주 쓰이는 응답은 남습니다)
+# =====================================================================================
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+try:
+    import brotli
+except ImportError:  # brotli 는 선택 의존성입니다. 없으면 gzip 만 제공합니다.
+    brotli = None
+
+CachedPayload = namedtuple('CachedPayload', ['etag', 'identity', 'gzip', 'br'])
+
+
+def encode_payload(version, obj):
+    """파이썬 객체를 JSON 바이트로 직렬화하고 압축본과 ETag 를 함께 만듭니다."""
+    body = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    digest = hashlib.sha1(body).hexdigest()[:16]
+    return CachedPayload(
+        etag=f'{version}-{digest}',
+        identity=body,
+        gzip=gzip.compress(body, compresslevel=9, mtime=0),
+        br=brotli.compress(body) if brotli else None,
+    )
+
+
+class PayloadCache:
+    """데이터 버전별로 직렬화된 응답을 보관하는 LRU 캐시. 버전이 바뀌면 전체를 비웁니다."""
+
+    CHECK_INTERVAL = 5.0   # 데이터 버전을 다시 확인하기까지의 최소 간격(초)
+    MAX_ENTRIES = 256      # 넘으면 가장 오래 쓰이지 않은 항목을 버립니다.
+
+    def __init__(self, version_loader):
+        self._version_loader = version_loader
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._entries = OrderedDict()
+
+    def current_version(self):
+        """캐시된 데이터 버전을 반환하고, 확인 간격이 지났으면 version_loader 로 다시 읽습니다."""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.CHECK_INTERVAL:
+            return self._version
+        version = self._version_loader()
+        with self._lock:
+            if version != self._version:
+                self._entries = OrderedDict()
+                self._version = version
+            self._checked_at = now
+        return version
+
+    def get(self, key, builder):
+        """key 에 해당하는 응답을 반환합니다. 없으면 builder() 결과를 직렬화해 저장합니다."""
+        version = self.current_version()
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                return payload
+        payload = encode_payload(version, builder())
+        with self._lock:
+            if self._version == version:
+                self._entries[key] = payload
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.MAX_ENTRIES:
+                    self._entries.popitem(last=False)
+        return payload
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._version = None
@@ -0,0 +1,185 @@
+# =====================================================================================
+#  파일: search_index.py (제목/작가 검색 색인) - v1.2
+#  - [검색 성능 개선] 제목과 작가를 띄어쓰기 제거·소문자화한 뒤 1~2글자 n-gram 색인으로
+#    저장하여, 매 검색마다 전체 테이블에 REPLACE() LIKE 를 수행하지 않도록 합니다.
+#  - [초성 검색] 제목의 한글 초성 문자열도 함께 색인하여 'ㅎㅅㄱㅎ' 같은 입력을 지원합니다.
+#  - [자모 분해] 입력 중인 글자('화산귀ㅎ', '호' → '화')도 접두 일치하도록 음절을 자모로 나누는
+#    to_jamo 를 제공합니다. (suggest_index.py 의 자동완성에서 사용)
+#  - 색인은 crawler.py 의 DB 동기화 단계에서 만들어지고(변경된 웹툰만 갱신), app.py 의 검색 API 가
+#    조회합니다.
+# =====================================================================================
+
+import re
+
+# --- 1. 상수 ---
+HANGUL_BASE, HANGUL_LAST = 0xAC00, 0xD7A3
+CHOSUNG_LIST = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+CHOSUNG_SET = frozenset(CHOSUNG_LIST)
+JUNGSUNG_LIST = ['ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅘ', 'ㅙ', 'ㅚ', 'ㅛ', 'ㅜ', 'ㅝ', 'ㅞ', 'ㅟ', 'ㅠ', 'ㅡ', 'ㅢ', 'ㅣ']
+JONGSUNG_LIST = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+# 입력기가 두 번에 나눠 입력하는 겹모음·겹받침은 구성 자모로 풉니다. (된소리 ㄲ/ㅆ 등은 한 번에 입력되므로 그대로 둡니다)
+COMPOUND_JAMO = {
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+}
+_WHITESPACE = re.compile(r'\s+')
+
+
+# --- 2. 문자열 정규화 ---
+def normalize(text):
+    """띄어쓰기를 모두 제거하고 소문자로 바꿔, 검색어와 색인을 같은 형태로 맞춥니다."""
+    return _WHITESPACE.sub('', text or '').lower()
+
+def _syllable_table(convert):
+    """모든 한글 음절(11172자)의 변환 결과를 str.translate 용 표로 만듭니다. (글자별 파이썬 반복 없이 변환)"""
+    return {HANGUL_BASE + code: convert(code) for code in range(HANGUL_LAST - HANGUL_BASE + 1)}
+
+_CHOSUNG_TABLE = _syllable_table(lambda code: CHOSUNG_LIST[code // 588])
+_JAMO_TABLE = _syllable_table(lambda code: ''.join(
+    COMPOUND_JAMO.get(jamo, jamo) for jamo in (CHOSUNG_LIST[code // 588], JUNGSUNG_LIST[code % 588 // 28], JONGSUNG_LIST[code % 28])
+))
+_JAMO_TABLE.update({ord(jamo): parts for jamo, parts in COMPOUND_JAMO.items()})
+
+def to_chosung(text):
+    """한글 음절을 초성으로 바꿉니다. (예: '화산귀환' → 'ㅎㅅㄱㅎ') 한글이 아닌 글자는 그대로 둡니다."""
+    return text.translate(_CHOSUNG_TABLE)
+
+def to_jamo(text):
+    """한글 음절을 자모 순서열로 풉니다. (예: '화산' → 'ㅎㅗㅏㅅㅏㄴ') 한글이 아닌 글자는 그대로 둡니다."""
+    return text.translate(_JAMO_TABLE)
+
+def is_chosung_query(query):
+    """검색어에 완성형 한글 없이 초성 자음이 포함되어 있으면 초성 검색으로 간주합니다."""
+    has_chosung = False
+    for ch in query:
+        if HANGUL_BASE <= ord(ch) <= HANGUL_LAST:
+            return False
+        if ch in CHOSUNG_SET:
+            has_chosung = True
+    return has_chosung
+
+def ngrams(text):
+    """색인용 1글자·2글자 n-gram 집합을 만듭니다."""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+def _query_grams(query):
+    """검색어 후보 조회에 사용할 n-gram 목록. 2글자 이상이면 2-gram 만으로 충분합니다."""
+    if len(query) == 1:
+        return [query]
+    return sorted({query[i:i + 2] for i in range(len(query) - 1)})
+
+
+# --- 3. 색인 테이블 생성 및 갱신 (crawler.py 에서 호출) ---
+def create_tables(cursor):
+    """검색 색인 테이블이 없는 경우 생성합니다."""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS search_index (
+        title_id INTEGER PRIMARY KEY,
+        title_norm TEXT NOT NULL,
+        author_norm TEXT NOT NULL,
+        title_chosung TEXT NOT NULL
+    )""")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS search_ngrams (
+        gram TEXT NOT NULL,
+        title_id INTEGER NOT NULL,
+        PRIMARY KEY (gram, title_id)
+    ) WITHOUT ROWID""")
+
+def _index_rows(title_id, title_text, author):
+    title_norm, author_norm = normalize(title_text), normalize(author)
+    title_chosung = to_chosung(title_norm)
+    grams = ngrams(title_norm) | ngrams(author_norm) | ngrams(title_chosung)
+    return (title_id, title_norm, author_norm, title_chosung), [(gram, title_id) for gram in grams]
+
+def _insert(cursor, webtoon_rows):
+    index_rows, gram_rows = [], []
+    for title_id, title_text, author in webtoon_rows:
+        index_row, title_grams = _index_rows(title_id, title_text, author)
+        index_rows.append(index_row)
+        gram_rows.extend(title_grams)
+    cursor.executemany("INSERT INTO search_index (title_id, title_norm, author_norm, title_chosung) VALUES (?, ?, ?, ?)", index_rows)
+    cursor.executemany("INSERT INTO search_ngrams (gram, title_id) VALUES (?, ?)", gram_rows)
+    return len(index_rows)
+
+def rebuild(cursor):
+    """webtoons 테이블 전체를 기준으로 검색 색인을 다시 만듭니다. (트랜잭션 커밋은 호출자가 담당)"""
+    cursor.execute("DELETE FROM search_index")
+    cursor.execute("DELETE FROM search_ngrams")
+    cursor.execute("SELECT title_id, title_text, author FROM webtoons")
+    return _insert(cursor, cursor.fetchall())
+
+def refresh(cursor, title_ids):
+    """
+    지정한 웹툰들의 색인만 다시 만듭니다. 색인이 아직 비어 있으면 전체를 새로 만듭니다.
+    기존 n-gram 은 저장된 정규화 문자열에서 다시 계산하여 (gram, title_id) 기본 키로 삭제합니다.
+    """
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM search_index)")
+    if not cursor.fetchone()[0]:
+        return rebuild(cursor)
+
+    title_ids = list(title_ids)
+    stale_grams = []
+    for chunk_start in range(0, len(title_ids), 500):
+        chunk = title_ids[chunk_start:chunk_start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f"SELECT title_id, title_norm, author_norm, title_chosung FROM search_index WHERE title_id IN ({placeholders})", chunk)
+        for title_id, title_norm, author_norm, title_chosung in cursor.fetchall():
+            grams = ngrams(title_norm) | ngrams(author_norm) | ngrams(title_chosung)
+            stale_grams.extend((gram, title_id) for gram in grams)
+    cursor.executemany("DELETE FROM search_ngrams WHERE gram = ? AND title_id = ?", stale_grams)
+    cursor.executemany("DELETE FROM search_index WHERE title_id = ?", [(title_id,) for title_id in title_ids])
+
+    webtoon_rows = []
+    for chunk_start in range(0, len(title_ids), 500):
+        chunk = title_ids[chunk_start:chunk_start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f"SELECT title_id, title_text, author FROM webtoons WHERE title_id IN ({placeholders})", chunk)
+        webtoon_rows.extend(cursor.fetchall())
+    return _insert(cursor, webtoon_rows)
+
+
+# --- 4. 검색 (app.py 에서 호출) ---
+def search(conn, query, limit=100):
+    """
+    색인을 이용해 제목/작가/초성이 검색어를 포함하는 웹툰을 찾습니다.
+    정렬 순서: 제목 접두 일치 → 제목 포함 → 작가 접두 일치 → 작가 포함 → 초성 일치, 같은 순위는 최신 등록순.
+    색인 테이블이 없으면 sqlite3.OperationalError 가 발생합니다.
+    """
+    query_norm = normalize(query)
+    if not query_norm:
+        return []
+
+    grams = _query_grams(query_norm)
+    params = {f'g{i}': gram for i, gram in enumerate(grams)}
+    candidates_sql = " INTERSECT ".join(f"SELECT title_id FROM search_ngrams WHERE gram = :{key}" for key in params)
+    # 초성 검색어는 완성형 제목과 겹치지 않으므로 초성 열만 비교합니다.
+    chosung_only = is_chosung_query(query_norm)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT w.title_id, w.title_text, w.author, w.status
+        FROM ({candidates_sql}) AS c
+        JOIN search_index s ON s.title_id = c.title_id
+        JOIN webtoons w ON w.title_id = c.title_id
+        WHERE (:chosung_only = 0 AND (instr(s.title_norm, :q) > 0 OR instr(s.author_norm, :q) > 0))
+           OR instr(s.title_chosung, :q) > 0
+        ORDER BY
+            CASE
+                WHEN instr(s.title_norm, :q) = 1 THEN 0
+                WHEN instr(s.title_norm, :q) > 1 THEN 1
+                WHEN instr(s.author_norm, :q) = 1 THEN 2
+                WHEN instr(s.author_norm, :q) > 1 THEN 3
+                WHEN instr(s.title_chosung, :q) = 1 THEN 4
+                ELSE 5
+            END,
+            w.rowid DESC
+        LIMIT :limit
+        """,
+        {**params, 'q': query_norm, 'chosung_only': int(chosung_only), 'limit': limit}
+    )
+    return [dict(zip(('title_id', 'title_text', 'author', 'status'), row)) for row in cursor.fetchall()]
@@ -0,0 +1,147 @@
+# =====================================================================================
+#  파일: snapshot.py (데이터셋 스냅샷 교체) - v1.0
+#  - 크롤러는 운영 중인 webtoons.db 에 직접 쓰지 않고, 복사본(webtoons.db.next)에서 동기화·알림
+#    기록을 모두 마친 뒤 검증하고 os.replace 로 한 번에 교체합니다.
+#    API 서버는 교체 전까지 이전 파일을, 교체 후에는 새 파일을 온전히 읽으므로 반쯤 적용된
+#    데이터를 보거나 크롤러의 긴 쓰기 트랜잭션에 막히지 않습니다.
+#  - 파일 이름 교체와 함께 쓸 수 없는 WAL 대신 기본(DELETE) 저널 모드를 사용합니다.
+#    (WAL 은 -wal/-shm 파일을 이름으로 찾으므로 교체된 파일과 짝이 어긋날 수 있습니다)
+#    이전 버전이 WAL 로 만든 운영 DB 는 첫 스냅샷을 만들기 전에 한 번 DELETE 모드로 바꿉니다.
+#  - 복사 이후 API 서버에 들어온 구독은, 운영 DB 의 쓰기 잠금을 잡은 상태에서 스냅샷에 합친 뒤
+#    교체하므로 잃어버리지 않습니다. (쓰기 연결은 잠금을 얻은 뒤 파일이 바뀌었는지 다시 확인합니다)
+# =====================================================================================
+
+import os
+import sqlite3
+import time
+
+SNAPSHOT_SUFFIX = '.next'
+REQUIRED_TABLES = ('webtoons', 'subscriptions', 'webtoon_status_counts', 'dataset_meta', 'search_index', 'outbox', 'webtoon_changes')
+BUSY_TIMEOUT_SEC = 30.0
+
+
+class SnapshotValidationError(Exception):
+    """스냅샷이 검증을 통과하지 못해 교체하지 않았을 때 발생합니다."""
+
+
+def snapshot_path(live_path):
+    return live_path + SNAPSHOT_SUFFIX
+
+def _webtoon_count(conn):
+    try:
+        return conn.execute("SELECT COUNT(*) FROM webtoons").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+
+def _leave_wal_mode(live_path):
+    """
+    운영 DB 가 WAL 모드이면 DELETE 모드로 바꿉니다. (-wal 내용을 본 파일에 반영하고 -wal 파일을 지웁니다)
+    WAL 모드인 채로 파일을 교체하면 남은 -wal 파일이 새 파일에 잘못 적용되므로, 바꿀 수 없으면 중단합니다.
+    """
+    conn = sqlite3.connect(live_path, timeout=BUSY_TIMEOUT_SEC)
+    try:
+        if conn.execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+            return
+        try:
+            mode = conn.execute("PRAGMA journal_mode=DELETE").fetchone()[0]
+        except sqlite3.OperationalError as e:
+            mode = f'wal ({e})'
+    finally:
+        conn.close()
+    if mode != 'delete':
+        raise sqlite3.OperationalError(f'운영 DB 를 WAL 에서 DELETE 모드로 바꾸지 못했습니다: {mode}. DB 를 연 프로세스를 모두 종료한 뒤 다시 실행하세요.')
+
+
+# --- 1. 스냅샷 준비 ---
+def prepare(live_path):
+    """
+    운영 DB 를 VACUUM INTO 로 일관되게 복사해 스냅샷 파일을 만듭니다. 운영 DB 가 없으면 빈 파일로 시작합니다.
+    반환값: (스냅샷 경로, 복사 시점의 웹툰 수)
+    """
+    path = snapshot_path(live_path)
+    for leftover in (path, path + '-journal'):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    baseline = 0
+    if os.path.exists(live_path):
+        _leave_wal_mode(live_path)
+        source = sqlite3.connect(live_path, timeout=BUSY_TIMEOUT_SEC)
+        try:
+            # VACUUM INTO 는 하나의 읽기 트랜잭션으로 복사하므로 API 서버가 동시에 구독을 기록해도 일관된 사본이 됩니다.
+            # (웹툰 행은 크롤러만 기록하므로 복사 전후의 웹툰 수는 같습니다)
+            baseline = _webtoon_count(source)
+            source.execute("VACUUM INTO ?", (path,))
+        finally:
+            source.close()
+    target = sqlite3.connect(path)
+    try:
+        target.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        target.close()
+    return path, baseline
+
+
+# --- 2. 검증 ---
+def validate(conn, baseline):
+    """교체 전에 스냅샷의 무결성과 기본 불변식을 확인합니다. 문제가 있으면 SnapshotValidationError."""
+    result = conn.execute("PRAGMA quick_check").fetchone()[0]
+    if result != 'ok':
+        raise SnapshotValidationError(f'quick_check 실패: {result}')
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    missing = [table for table in REQUIRED_TABLES if table not in tables]
+    if missing:
+        raise SnapshotValidationError(f'필수 테이블 없음: {missing}')
+    # 동기화는 행을 지우지 않으므로, 복사 시점보다 웹툰 수가 줄었다면 잘못 만들어진 스냅샷입니다.
+    count = _webtoon_count(conn)
+    if count < baseline:
+        raise SnapshotValidationError(f'웹툰 수 감소: {baseline} -> {count}')
+    counted = dict(conn.execute("SELECT status, COUNT(*) FROM webtoons GROUP BY status").fetchall())
+    stored = {status: n for status, n in conn.execute("SELECT status, count FROM webtoon_status_counts") if n}
+    if counted != stored:
+        raise SnapshotValidationError(f'상태별 카운터 불일치: {stored} != {counted}')
+
+
+# --- 3. 교체 ---
+def publish(path, live_path, baseline):
+    """
+    스냅샷을 검증하고 버전을 기록한 뒤 운영 DB 자리로 원자적으로 교체합니다.
+    운영 DB 의 쓰기 잠금(BEGIN IMMEDIATE)을 잡은 동안 그사이 추가된 구독을 합치고 교체하므로,
+    교체 직전에 기록된 구독도 새 파일에 남습니다. 반환값: 새 스냅샷 버전
+    """
+    live = None
+    if os.path.exists(live_path):
+        _leave_wal_mode(live_path)
+        live = sqlite3.connect(live_path, timeout=BUSY_TIMEOUT_SEC, isolation_level=None)
+        live.execute("BEGIN IMMEDIATE")
+    try:
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SEC)
+        try:
+            if live is not None:
+                conn.execute("ATTACH DATABASE ? AS live", (live_path,))
+                conn.execute("INSERT OR IGNORE INTO main.subscriptions (email, title_id) SELECT email, title_id FROM live.subscriptions")
+                conn.commit()
+                conn.execute("DETACH DATABASE live")
+            validate(conn, baseline)
+            conn.execute("""
+            INSERT INTO dataset_meta (key, value) VALUES ('snapshot_version', 1)
+            ON CONFLICT(key) DO UPDATE SET value = value + 1""")
+            conn.execute("""
+            INSERT INTO dataset_meta (key, value) VALUES ('published_at', ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value""", (int(time.time()),))
+            conn.commit()
+            version = conn.execute("SELECT value FROM dataset_meta WHERE key = 'snapshot_version'").fetchone()[0]
+        finally:
+            conn.close()
+        os.replace(path, live_path)
+    finally:
+        if live is not None:
+            live.execute("ROLLBACK")
+            live.close()
+    return version
+
+def discard(path):
+    """검증에 실패했거나 사용하지 않을 스냅샷 파일을 지웁니다."""
+    for leftover in (path, path + '-journal'):
+        if os.path.exists(leftover):
+            os.remove(leftover)
@@ -0,0 +1,237 @@
+# =====================================================================================
+#  파일: suggest_index.py (검색어 자동완성 색인) - v1.1
+#  - 제목, 제목의 두 번째 이후 단어부터의 뒷부분, 작가 이름을 정규화(search_index.normalize)한 뒤
+#    자모로 풀어(to_jamo) 정렬된 배열에 담고, 입력한 검색어로 시작하는 범위를 bisect 로 찾습니다.
+#    자모 단위로 비교하므로 입력 중인 글자('화산귀ㅎ')도 '화산귀환'과 일치합니다.
+#    초성만 입력하면('ㅎㅅㄱ') 제목 초성 배열에서 찾습니다.
+#  - 후보는 상태(연재중 → 휴재 → 완결), 일치 종류(제목 → 단어 → 작가), 최신 등록순으로 정렬합니다.
+#    순위는 정수 하나로 부호화하여 범위 안의 상위 k 개를 정수 비교만으로 고릅니다.
+#  - 한 글자 입력처럼 범위가 큰 접두어는 색인을 만들 때 상위 후보를 미리 계산해 두므로,
+#    어떤 입력이든 SQLite 조회 없이 수십 마이크로초 안에 답합니다.
+#  - app.py 는 데이터 버전(dataset_version)이 바뀔 때마다 색인을 새로 만듭니다. (python benchmark.py suggest)
+#    색인은 워커마다 백그라운드 스레드 하나가 만들고, 새 색인이 준비될 때까지 요청에는 이전 버전의 색인으로
+#    답합니다. (10만 개 기준 수 초가 걸리는 생성을 요청 안에서 기다리지 않도록)
+# =====================================================================================
+
+import heapq
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from search_index import is_chosung_query, normalize, to_chosung, to_jamo
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+COLD_WAIT_SEC = 1.0    # 아직 색인이 하나도 없을 때 요청이 생성을 기다리는 최대 시간
+RETRY_SEC = 5.0        # 색인 생성이 실패한 뒤 다시 시도하기까지의 최소 간격
+SCAN_LIMIT = 256       # 접두 범위가 이보다 크면 색인을 만들 때 계산해 둔 상위 후보를 사용합니다.
+MAX_WORD_KEYS = 4      # 제목 하나에서 만들 단어 시작 키의 최대 수
+STATUS_RANK = {'연재중': 0, '휴재': 1, '완결': 2}
+TITLE, WORD, AUTHOR = 0, 1, 2
+_ID_MASK = 0xFFFFFFFF
+_KEY_END = chr(0x10FFFF)
+_AUTHOR_SEPARATORS = re.compile(r'[/,]')
+
+
+def _rank(status, kind, title_id):
+    """작을수록 앞에 오는 순위 값: (상태, 일치 종류, 최신 등록순) 을 정수 하나에 담습니다."""
+    return ((STATUS_RANK.get(status, len(STATUS_RANK)) * 4 + kind) << 32) | (_ID_MASK - (title_id & _ID_MASK))
+
+def _title_id(rank):
+    return _ID_MASK - (rank & _ID_MASK)
+
+def _top_titles(ranks, k):
+    """순위 값 목록에서 서로 다른 웹툰 k 개의 순위를 작은 순서로 고릅니다. (한 웹툰이 여러 키로 일치할 수 있음)"""
+    candidates = sorted(ranks) if len(ranks) <= SCAN_LIMIT else heapq.nsmallest(k * 4, ranks)
+    top, seen = [], set()
+    for rank in candidates:
+        title_id = _title_id(rank)
+        if title_id not in seen:
+            seen.add(title_id)
+            top.append(rank)
+            if len(top) == k:
+                return top
+    if len(candidates) < len(ranks):
+        # 한 웹툰의 키가 유난히 많이 겹친 경우에만 전체를 정렬합니다.
+        return _top_titles_sorted(ranks, k)
+    return top
+
+def _top_titles_sorted(ranks, k):
+    top, seen = [], set()
+    for rank in sorted(ranks):
+        title_id = _title_id(rank)
+        if title_id not in seen:
+            seen.add(title_id)
+            top.append(rank)
+            if len(top) == k:
+                break
+    return top
+
+def _keys(title_text, author):
+    """(일치 종류, 정규화된 키) 목록: 제목 전체, 두 번째 이후 단어로 시작하는 제목 뒷부분, 작가별 이름."""
+    keys = {(TITLE, normalize(title_text))}
+    words = (title_text or '').split()
+    for start in range(1, min(len(words), MAX_WORD_KEYS + 1)):
+        keys.add((WORD, normalize(''.join(words[start:]))))
+    for name in _AUTHOR_SEPARATORS.split(author or ''):
+        keys.add((AUTHOR, normalize(name)))
+    return [(kind, key) for kind, key in keys if key]
+
+
+class _PrefixArray:
+    """정렬된 키 배열과 같은 순서의 순위 배열. 범위가 큰 접두어의 상위 후보는 hot 에 미리 계산해 둡니다."""
+    __slots__ = ('keys', 'ranks', 'hot')
+
+    def __init__(self, entries):
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.ranks = array('Q', [rank for _, rank in entries])  # 정수 객체 대신 8바이트씩 담습니다.
+        self.hot = {}
+        self._precompute_hot()
+
+    def _precompute_hot(self):
+        """접두어 길이를 1 부터 늘려 가며, 범위가 SCAN_LIMIT 를 넘는 접두어만 다음 길이로 내려갑니다."""
+        keys, ranks = self.keys, self.ranks
+        regions = [(0, len(keys))] if len(keys) > SCAN_LIMIT else []
+        length = 1
+        while regions:
+            next_regions = []
+            for lo, hi in regions:
+                i = lo
+                while i < hi:
+                    if len(keys[i]) < length:
+                        i += 1
+                        continue
+                    prefix = keys[i][:length]
+                    j = bisect_left(keys, prefix + _KEY_END, i, hi)
+                    if j - i > SCAN_LIMIT:
+                        self.hot[prefix] = _top_titles(ranks[i:j], MAX_LIMIT)
+                        next_regions.append((i, j))
+                    i = j
+            regions = next_regions
+            length += 1
+
+    def top(self, prefix, k):
+        hot = self.hot.get(prefix)
+        if hot is not None:
+            return hot[:k]
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + _KEY_END, lo)
+        return _top_titles(self.ranks[lo:hi], k) if hi > lo else []
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class SuggestIndex:
+    """(title_id, title_text, author, status) 행으로 만든 자동완성 색인."""
+
+    def __init__(self, rows):
+        self.titles = {}
+        text_entries, chosung_entries = [], []
+        for title_id, title_text, author, status in rows:
+            self.titles[title_id] = (title_text, author, status)
+            for kind, key in _keys(title_text, author):
+                rank = _rank(status, kind, title_id)
+                text_entries.append((to_jamo(key), rank))
+                if kind != AUTHOR:
+                    chosung_entries.append((to_chosung(key), rank))
+        self._text = _PrefixArray(text_entries)
+        self._chosung = _PrefixArray(chosung_entries)
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """query 로 시작하는 제목/작가를 가진 웹툰을 최대 limit 개 반환합니다."""
+        query_norm = normalize(query)
+        if not query_norm:
+            return []
+        if is_chosung_query(query_norm):
+            ranks = self._chosung.top(query_norm, limit)
+        else:
+            ranks = self._text.top(to_jamo(query_norm), limit)
+        results = []
+        for rank in ranks:
+            title_id = _title_id(rank)
+            title_text, author, status = self.titles[title_id]
+            results.append({'title_id': title_id, 'title_text': title_text, 'author': author, 'status': status})
+        return results
+
+    def stats(self):
+        return {'titles': len(self.titles), 'keys': len(self._text) + len(self._chosung),
+                'hot_prefixes': len(self._text.hot) + len(self._chosung.hot)}
+
+
+class SuggestIndexCache:
+    """
+    데이터 버전마다 한 번만 색인을 만듭니다. 생성은 백그라운드 스레드 하나가 맡고(한 번에 하나만),
+    get() 은 기다리지 않고 가장 최근에 완성된 색인을 반환합니다. 색인이 아직 하나도 없으면
+    cold_wait 초까지만 기다리고, 그래도 없으면 None 을 반환합니다.
+    row_loader 는 백그라운드 스레드에서 호출되므로 요청 문맥에 기대지 않아야 합니다.
+    """
+
+    def __init__(self, row_loader, cold_wait=COLD_WAIT_SEC, retry_interval=RETRY_SEC):
+        self._row_loader = row_loader
+        self.cold_wait, self.retry_interval = cold_wait, retry_interval
+        self._lock = threading.Lock()
+        self._built = threading.Condition(self._lock)  # 생성 시도가 끝날 때마다 알립니다.
+        self._version = None
+        self._index = None
+        self._wanted = None         # 가장 최근에 요청된 데이터 버전
+        self._builder_pid = None    # 생성 스레드가 돌고 있는 프로세스 (fork 된 워커에는 스레드가 없습니다)
+        self._failed_at = None
+
+    def get(self, version):
+        index = self._index
+        if index is not None and self._version == version:
+            return index
+        self.refresh(version)
+        if index is None:
+            with self._built:
+                self._built.wait_for(lambda: self._index is not None or self._builder_pid != os.getpid(), self.cold_wait)
+            index = self._index
+        return index
+
+    def refresh(self, version):
+        """version 의 색인 생성을 예약합니다. 생성 중이면 끝난 뒤 이 버전으로 한 번 더 만듭니다."""
+        with self._lock:
+            self._wanted = version
+            if self._builder_pid == os.getpid() or (self._index is not None and self._version == version):
+                return
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval:
+                return
+            self._builder_pid = os.getpid()
+        threading.Thread(target=self._build, name='suggest-index-builder', daemon=True).start()
+
+    def _build(self):
+        while True:
+            with self._lock:
+                version = self._wanted
+            try:
+                index = SuggestIndex(self._row_loader())
+            except Exception as e:
+                # 다음 요청이 retry_interval 뒤에 다시 시도합니다. 그동안은 이전 색인으로 답합니다.
+                print(f"경고: 자동완성 색인을 만들지 못했습니다 - {e}")
+                with self._built:
+                    self._failed_at = time.monotonic()
+                    self._builder_pid = None
+                    self._built.notify_all()
+                return
+            with self._built:
+                self._index, self._version = index, version
+                self._failed_at = None
+                self._built.notify_all()
+                if self._wanted == version:
+                    self._builder_pid = None
+                    return
+
+    def wait(self, timeout=None):
+        """이 프로세스에서 진행 중인 색인 생성이 끝날 때까지 기다립니다. (벤치마크가 측정 전에 사용)"""
+        with self._built:
+            return self._built.wait_for(lambda: self._builder_pid != os.getpid(), timeout)
+
+    def stats(self):
+        index = self._index
+        return {'version': self._version, 'building': self._builder_pid == os.getpid(),
+                **(index.stats() if index is not None else {})}
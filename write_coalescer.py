@@ -0,0 +1,191 @@
+# =====================================================================================
+#  파일: write_coalescer.py (구독 쓰기 묶음 처리기) - v1.3
+#  - 구독 요청마다 INSERT + COMMIT(fsync)를 하던 대신, 동시에 들어온 구독 요청들을
+#    전용 쓰기 스레드가 짧은 시간(MAX_WAIT_SEC) 동안 모아 하나의 트랜잭션으로 기록합니다.
+#    요청 스레드끼리 SQLite 쓰기 잠금을 두고 경쟁하지 않고, 커밋 횟수가 묶음 수로 줄어듭니다.
+#  - 묶음 안의 모든 웹툰 ID는 webtoons 테이블에 대해 한 번의 쿼리로 검증합니다.
+#  - 요청마다 웹툰 ID별 결과(subscribed / already_subscribed / not_found)를 돌려줍니다.
+#  - 쓰기 스레드가 밀려 제한 시간 안에 결과가 없으면 아직 묶음에 들어가지 않은 요청은 취소하고
+#    WriteTimeout 을 냅니다. (구독 기록은 INSERT OR IGNORE 이므로 다시 요청해도 안전합니다)
+#  - 묶음 트랜잭션이 실패하면 요청마다 따로 다시 기록하여, 잘못된 요청 하나 때문에 같은 묶음의
+#    다른 요청까지 실패하지 않게 합니다.
+# =====================================================================================
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+SUBSCRIBED, ALREADY_SUBSCRIBED, NOT_FOUND = 'subscribed', 'already_subscribed', 'not_found'
+
+MAX_WAIT_SEC = 0.005   # 첫 요청이 들어온 뒤 다른 요청을 기다리는 최대 시간
+MAX_BATCH_ITEMS = 500  # 한 트랜잭션에 기록할 최대 (이메일, 웹툰 ID) 수
+
+
+class WriteTimeout(Exception):
+    """제한 시간 안에 구독 결과를 받지 못했습니다. cancelled 가 True 면 요청이 기록되지 않았음이 확실합니다."""
+
+    def __init__(self, cancelled):
+        super().__init__('구독 쓰기 대기 시간을 초과했습니다.')
+        self.cancelled = cancelled
+
+
+class SubscriptionWriter:
+    """
+    구독 요청을 모아 일정 주기로 한 번에 커밋하는 쓰기 전용 스레드.
+    connection_factory 는 쓰기 스레드 안에서 묶음마다 호출되어 새 쓰기 연결을 반환해야 합니다.
+    is_current(conn) 가 주어지면 쓰기 잠금을 얻은 뒤 연결이 교체 전의 DB 파일을 가리키는지 확인하고,
+    그렇다면 새 파일로 다시 연결합니다. (snapshot.py 의 파일 교체 대비)
+    """
+
+    def __init__(self, connection_factory, max_wait=MAX_WAIT_SEC, max_items=MAX_BATCH_ITEMS, is_current=None):
+        self._connection_factory = connection_factory
+        self._is_current = is_current
+        self.max_wait, self.max_items = max_wait, max_items
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'items': 0, 'batches': 0, 'errors': 0}
+
+    def submit(self, email, title_ids):
+        """구독 요청을 큐에 넣고, [(title_id, 결과), ...] 를 돌려줄 Future 를 반환합니다."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((email, list(title_ids), future))
+        return future
+
+    def subscribe(self, email, title_ids, timeout=10.0):
+        """
+        submit 후 결과를 기다립니다. DB 오류는 sqlite3.Error 로 그대로 전달됩니다.
+        timeout 안에 결과가 없으면 요청을 취소해 보고 WriteTimeout 을 냅니다.
+        """
+        future = self.submit(email, title_ids)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            cancelled = future.cancel()
+            if not cancelled and future.done():
+                return future.result()  # 취소하려는 사이에 기록이 끝난 경우
+            raise WriteTimeout(cancelled) from None
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats, queued=self._queue.qsize())
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='subscription-writer', daemon=True)
+                self._thread.start()
+
+    def _next_request(self, timeout=None):
+        """취소되지 않은 다음 요청을 꺼냅니다. 꺼낸 요청의 Future 는 실행 중으로 바뀌어 더는 취소되지 않습니다."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            request = self._queue.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+            if request[2].set_running_or_notify_cancel():
+                return request
+
+    def _collect_batch(self):
+        """첫 요청을 기다린 뒤, max_wait 동안 또는 max_items 에 이를 때까지 요청을 더 모읍니다."""
+        batch = [self._next_request()]
+        item_count = len(batch[0][1])
+        wait_until = time.monotonic() + self.max_wait
+        while item_count < self.max_items:
+            remaining = wait_until - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._next_request(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            item_count += len(request[1])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            results = self._write_batch(batch)
+            failed = sum(1 for result in results if isinstance(result, Exception))
+            with self._stats_lock:
+                self._stats['requests'] += len(batch)
+                self._stats['items'] += sum(len(title_ids) for _, title_ids, _ in batch)
+                self._stats['batches'] += 1
+                self._stats['errors'] += failed
+            for (_, _, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _connect_locked(self):
+        """쓰기 잠금(BEGIN IMMEDIATE)을 잡은 현재 DB 파일의 연결을 반환합니다."""
+        for _ in range(3):
+            conn = self._connection_factory()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                if self._is_current is None or self._is_current(conn):
+                    return conn
+                # 잠금을 기다리는 동안 DB 파일이 새 스냅샷으로 교체되었습니다.
+                conn.rollback()
+            except BaseException:
+                conn.close()  # 잠금을 얻지 못한 연결(database is locked 등)도 닫습니다.
+                raise
+            conn.close()
+        raise sqlite3.OperationalError('DB 파일이 계속 교체되어 쓰기 연결을 열 수 없습니다.')
+
+    def _write_batch(self, batch):
+        """
+        묶음 전체를 한 트랜잭션으로 기록하고, 요청별 결과 목록을 반환합니다. (실패한 요청의 자리에는 예외)
+        묶음이 실패하면 요청마다 따로 다시 기록하여, 실패의 원인이 된 요청만 예외를 받게 합니다.
+        """
+        try:
+            return self._write_requests(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                return [e]
+        results = []
+        for request in batch:
+            try:
+                results.extend(self._write_requests([request]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _write_requests(self, batch):
+        """요청들을 한 트랜잭션으로 기록합니다. 하나라도 실패하면 전체를 되돌리고 예외를 냅니다."""
+        conn = self._connect_locked()
+        try:
+            cursor = conn.cursor()
+            all_ids = sorted({title_id for _, title_ids, _ in batch for title_id in title_ids})
+            known_ids = set()
+            for start in range(0, len(all_ids), 500):
+                chunk = all_ids[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f"SELECT title_id FROM webtoons WHERE title_id IN ({placeholders})", chunk)
+                known_ids.update(row[0] for row in cursor.fetchall())
+
+            results = []
+            for email, title_ids, _ in batch:
+                result = []
+                for title_id in title_ids:
+                    if title_id not in known_ids:
+                        result.append((title_id, NOT_FOUND))
+                        continue
+                    cursor.execute("INSERT OR IGNORE INTO subscriptions (email, title_id) VALUES (?, ?)", (email, title_id))
+                    result.append((title_id, SUBSCRIBED if cursor.rowcount else ALREADY_SUBSCRIBED))
+                results.append(result)
+            conn.commit()
+            return results
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
+